@@ -0,0 +1,154 @@
+"""
+Tyson Reimer
+University of Manitoba
+October 19th, 2026
+"""
+
+import sys
+import time
+import subprocess
+import numpy as np
+
+from umbmid import get_proj_path, get_script_logger
+
+###############################################################################
+
+# The modules whose import time is benchmarked
+__MODULES = [
+    'numpy',
+    'umbmid',
+    'umbmid.sigproc',
+    'umbmid.loadsave',
+    'umbmid.build',
+    'umbmid.content',
+    'umbmid.ai.logreg',
+    'umbmid.shared',
+]
+
+# The heavy dependencies that should only be imported when used
+__HEAVY_MODULES = ['pandas', 'scipy', 'h5py', 'matplotlib']
+
+__N_RUNS = 10  # The num of times each import is timed
+
+###############################################################################
+
+
+def time_import(module, n_runs=10):
+    """Times the import of a module in new interpreter processes
+
+    Each import is timed in a new process, so that it includes all of
+    the imports of the module, as a new worker process would. The
+    first run is discarded, so that the .pyc files are cached.
+
+    Parameters
+    ----------
+    module : str
+        The name of the module to import
+    n_runs : int
+        The num of times the import is timed
+
+    Returns
+    -------
+    import_times : array_like
+        The time of each import, in ms
+    heavy_imported : list
+        The heavy dependencies that were imported by the module
+    """
+
+    # The code that imports the module, timing only the import, and
+    # prints the heavy dependencies that were imported
+    code = ('import sys, time; t0 = time.perf_counter(); import %s; '
+            'print((time.perf_counter() - t0) * 1e3); '
+            'print(",".join(m for m in %r if m in sys.modules))'
+            % (module, __HEAVY_MODULES))
+
+    import_times = []
+    heavy_imported = []
+
+    for run_idx in range(n_runs + 1):  # For each run, and one warm-up
+
+        output = subprocess.run([sys.executable, '-c', code],
+                                cwd=get_proj_path(), capture_output=True,
+                                text=True, check=True).stdout.split('\n')
+
+        if run_idx > 0:  # Discard the warm-up run
+            import_times.append(float(output[0]))
+
+        heavy_imported = [mod for mod in output[1].split(',') if mod != '']
+
+    return np.array(import_times), heavy_imported
+
+
+def get_slowest_imports(module, n_slowest=10):
+    """Returns the slowest imports of a module, via -X importtime
+
+    Parameters
+    ----------
+    module : str
+        The name of the module to import
+    n_slowest : int
+        The num of slowest imports to return
+
+    Returns
+    -------
+    slowest : list
+        The (cumulative time in ms, module name) of the slowest
+        imports, including their own imports
+    """
+
+    stderr = subprocess.run([sys.executable, '-X', 'importtime', '-c',
+                             'import %s' % module],
+                            cwd=get_proj_path(), capture_output=True,
+                            text=True, check=True).stderr
+
+    import_times = []
+
+    for line in stderr.split('\n'):
+
+        # Each line is 'import time: self [us] | cumulative | name'
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+
+        _, cumulative, name = line[len('import time:'):].split('|')
+        import_times.append((int(cumulative) / 1e3, name.strip()))
+
+    return sorted(import_times, reverse=True)[:n_slowest]
+
+
+###############################################################################
+
+if __name__ == '__main__':
+
+    logger = get_script_logger(__file__)
+
+    logger.info('Benchmarking import times, over %d runs each...', __N_RUNS)
+
+    for module in __MODULES:  # For each module
+
+        import_times, heavy_imported = time_import(module, n_runs=__N_RUNS)
+
+        logger.info('\t%s:\t%.1f ms median\t(%.1f - %.1f ms)\t'
+                    'heavy imports: %s', module, np.median(import_times),
+                    np.min(import_times), np.max(import_times),
+                    ', '.join(heavy_imported) or 'none')
+
+    # Report the slowest imports of the package
+    logger.info('Slowest imports of umbmid.build:')
+
+    for cumulative_ms, name in get_slowest_imports('umbmid.build'):
+        logger.info('\t%.1f ms\t%s', cumulative_ms, name)
+
+    # Time the start-up of a new worker process, with and without the
+    # import of the package
+    for code in ['pass', 'import umbmid.build']:
+
+        start_times = []
+
+        for run_idx in range(__N_RUNS):
+            start_time = time.perf_counter()
+            subprocess.run([sys.executable, '-c', code], cwd=get_proj_path(),
+                           check=True)
+            start_times.append((time.perf_counter() - start_time) * 1e3)
+
+        logger.info('Interpreter start-up running \'%s\': %.1f ms median',
+                    code, np.median(start_times))
@@ -8,14 +8,15 @@ import os
 import numpy as np
 import matplotlib.pyplot as plt
 
-from umbmid import get_proj_path, verify_path, get_script_logger
+from umbmid import (get_proj_path, get_data_dir, verify_path,
+                    get_script_logger)
 from umbmid.loadsave import load_pickle
 from umbmid.content import report_metadata_content
 from umbmid.sigproc import iczt
 
 ###############################################################################
 
-__DATA_DIR = os.path.join(get_proj_path(), 'datasets')
+__DATA_DIR = get_data_dir()
 __OUTPUT_DIR = os.path.join(get_proj_path(), 'output/figs/')
 verify_path(__OUTPUT_DIR)
 
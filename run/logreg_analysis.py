@@ -8,31 +8,63 @@ import os
 import numpy as np
 from sklearn.metrics import roc_auc_score
 
-from umbmid import get_proj_path, get_script_logger
+from umbmid import (get_data_dir, get_proj_path, verify_path,
+                    get_script_logger)
 from umbmid.loadsave import load_pickle
 from umbmid.ai.logreg import LogisticRegression
-from umbmid.ai.preprocessing import normalize_samples
+from umbmid.ai.features import FeatureStore, get_td_features
+from umbmid.ai.preprocessing import RandomizedPCA
+from umbmid.ai.stats import (bootstrap_metrics, permutation_test,
+                             get_pred_labels)
+from umbmid.profiling import Profiler, set_profiler, get_script_report_path
 
 ###############################################################################
 
-__DATA_DIR = os.path.join(get_proj_path(), 'datasets/gen-one/clean/')
+__DATA_DIR = os.path.join(get_data_dir(), 'gen-one/clean/')
+
+# The dir of the feature store, in which the features are saved once
+# they are extracted, and the max size of the store, in bytes; the
+# store is scratch space, so it is kept with the outputs, not the data
+__FEATURE_DIR = os.path.join(get_proj_path(), 'output/feature-store/')
+__FEATURE_STORE_BYTES = 2**33
+verify_path(os.path.join(get_proj_path(), 'output/'))
+
+# If not None, the features are the magnitudes of this num of harmonics
+# across the antenna positions at each time-point, which do not depend
+# on the rotation of the scan
+__N_HARMONICS = None
+
+# The keyword arguments of the feature extraction (see
+# umbmid.ai.preprocessing.extract_td_features()): the abs-value of the
+# IDFT of each sample in the time-domain window [5:40], normalized to
+# have a maximum of unity, and flattened to a 1D feature vector
+__FEATURE_CONFIG = {
+    'transform': 'ifft',
+    'window': (5, 40),
+    'normalize': 'max',
+    'n_harmonics': __N_HARMONICS,
+}
+
+# If not None, the features are reduced to this num of principal
+# components (fit on the training set) before classification
+__N_COMPONENTS = None
 
 __LEARN_RATE = 1  # Set the learning rate for gradient descent
 __MAX_ITER = 10000  # Set the number of iterations used to train
 
+# The path of the saved model of the final run, with its feature
+# config and threshold, for scoring new scans
+__MODEL_DIR = os.path.join(get_proj_path(), 'output/models/')
+
 ###############################################################################
 
-# Load the training data, labels, and metadata
-train_data = load_pickle(os.path.join(__DATA_DIR,
-                                      'train_data.pickle'))
+# Load the training labels and metadata
 train_labels = load_pickle(os.path.join(__DATA_DIR,
                                         'train_labels.pickle'))
 train_md = load_pickle(os.path.join(__DATA_DIR,
                                     'train_md.pickle'))
 
-# Load the test data, labels, and metadata
-test_data = load_pickle(os.path.join(__DATA_DIR,
-                                     'test_data.pickle'))
+# Load the test labels and metadata
 test_labels = load_pickle(os.path.join(__DATA_DIR,
                                        'test_labels.pickle'))
 test_md = load_pickle(os.path.join(__DATA_DIR,
@@ -40,26 +72,25 @@ test_md = load_pickle(os.path.join(__DATA_DIR,
 
 ###############################################################################
 
-# Convert each train sample from the frequency-domain to the time-domain
-for sample_idx in range(np.size(train_data, axis=0)):
-    train_data[sample_idx, :, :] = np.fft.ifft(train_data[sample_idx, :, :],
-                                               axis=0)
-# Convert each test sample from the frequency-domain to the time-domain
-for sample_idx in range(np.size(test_data, axis=0)):
-    test_data[sample_idx, :, :] = np.fft.ifft(test_data[sample_idx, :, :],
-                                              axis=0)
+feature_store = FeatureStore(__FEATURE_DIR,
+                             max_bytes=__FEATURE_STORE_BYTES)
+
+# Get the features of each train and test sample. The features are
+# extracted once, then loaded from the feature store
+train_data = get_td_features(os.path.join(__DATA_DIR, 'train_data.pickle'),
+                             feature_store, **__FEATURE_CONFIG)
+test_data = get_td_features(os.path.join(__DATA_DIR, 'test_data.pickle'),
+                            feature_store, **__FEATURE_CONFIG)
 
-# Take the abs-value of ecah sample, and apply the time-domain window
-train_data = np.abs(train_data[:, 5:40, :])
-test_data = np.abs(test_data[:, 5:40, :])
+pca = None  # The projection of the features, if reducing them
 
-# Normalize each sample to have a maximum of unity
-train_data = normalize_samples(train_data)
-test_data = normalize_samples(test_data)
+if __N_COMPONENTS is not None:  # If reducing the features
 
-# Flatten the feature arrays of each sample to be a 1D feature vector
-train_data = np.reshape(train_data, [np.size(train_data, axis=0), 35 * 72])
-test_data = np.reshape(test_data, [np.size(test_data, axis=0), 35 * 72])
+    # Fit the projection on the training set only, and save it
+    pca = RandomizedPCA(n_components=__N_COMPONENTS)
+    train_data = pca.fit_transform(train_data)
+    test_data = pca.transform(test_data)
+    pca.save(os.path.join(__FEATURE_DIR, 'logreg_analysis_pca.npz'))
 
 ###############################################################################
 
@@ -75,7 +106,9 @@ def get_best_acc(labels, preds, fixed_threshold=-1.0):
         The predicted scores of each sample
     fixed_threshold : float
         If set to -1.0, will not use a fixed threshold. If set to any
-        other value, will find the acc/sens/spec at that threshold
+        other value, will find the acc/sens/spec at that threshold.
+        A sample is predicted positive if its score is at or above the
+        threshold (see umbmid.ai.stats.get_pred_labels())
 
     Returns
     -------
@@ -113,11 +146,15 @@ def get_best_acc(labels, preds, fixed_threshold=-1.0):
 
     for thresh in possible_thresholds:  # For each threshold
 
+        # Find the predicted labels at this threshold, with the same
+        # convention as the bootstrap/permutation metrics
+        pred_labels = get_pred_labels(preds, thresh)
+
         # Find the true positives/negatives, false postives/negatives
-        tp = np.sum(np.logical_and(labels == 1, preds > thresh))
-        tn = np.sum(np.logical_and(labels == 0, preds < thresh))
-        fn = np.sum(np.logical_and(labels == 1, preds < thresh))
-        fp = np.sum(np.logical_and(labels == 0, preds > thresh))
+        tp = np.sum(np.logical_and(labels == 1, pred_labels))
+        tn = np.sum(np.logical_and(labels == 0, ~pred_labels))
+        fn = np.sum(np.logical_and(labels == 1, ~pred_labels))
+        fp = np.sum(np.logical_and(labels == 0, pred_labels))
 
         # Get the accuracy/sensitivity/specificity at this threshold
         acc = (tp + tn) / (fn + fp + tn + tp)
@@ -198,6 +235,10 @@ if __name__ == '__main__':
     # Define the logger and output init statements
     logger = get_script_logger(__file__)
     logger.info('\tBEGINNING...')
+
+    # Record the time of each stage (ex: fit) of the analysis
+    profiler = Profiler()
+    set_profiler(profiler)
     logger.info('\tMax Iter: %d\tLearn Rate: %.3f' % (__MAX_ITER,
                                                       __LEARN_RATE))
 
@@ -211,6 +252,10 @@ if __name__ == '__main__':
     test_acc, test_roc = [], []
     test_sens, test_spec = [], []
 
+    # Init lists for the test set scores and train set threshold of
+    # each run, for the confidence intervals
+    test_preds, thresholds = [], []
+
     for run_idx in range(n_runs):  # For each run
 
         logger.info('Working on run [%3d / %3d]' %
@@ -252,6 +297,9 @@ if __name__ == '__main__':
         test_sens.append(sens)
         test_spec.append(spec)
 
+        test_preds.append(logreg.predict_proba(test_data))
+        thresholds.append(threshold)
+
     # Convert the lists to np arrays
     train_acc = np.array(train_acc)
     train_roc = np.array(train_roc)
@@ -276,3 +324,31 @@ if __name__ == '__main__':
                 (np.mean(test_sens), np.std(test_sens)))
     logger.info('Spec:\t%.6f +/- %.6f' %
                 (np.mean(test_spec), np.std(test_spec)))
+
+    # Find the bootstrap 95% confidence intervals and the permutation
+    # test p-values of the metrics of the test set scores, averaged
+    # over the runs, to report the uncertainty due to the test set
+    mean_preds = np.mean(test_preds, axis=0)
+    boot_results = bootstrap_metrics(test_labels, mean_preds,
+                                     threshold=np.mean(thresholds),
+                                     n_boot=10000)
+    p_vals = permutation_test(test_labels, mean_preds,
+                              threshold=np.mean(thresholds), n_perm=10000)
+
+    logger.info('Test (mean scores over runs), 95%% CI, p-value:')
+    for metric in ['auc', 'acc', 'sens', 'spec']:
+        logger.info('%s:\t%.3f [%.3f, %.3f]\tp = %.4f', metric.upper(),
+                    boot_results[metric]['value'],
+                    boot_results[metric]['ci_low'],
+                    boot_results[metric]['ci_high'], p_vals[metric])
+
+    # Save the model of the final run, with the feature config and
+    # the threshold from the training set, for scoring new scans
+    verify_path(__MODEL_DIR)
+    logreg.feature_config = __FEATURE_CONFIG
+    logreg.pca = pca
+    logreg.threshold = threshold
+    logreg.save(os.path.join(__MODEL_DIR, 'logreg.npz'))
+
+    # Save the report of the time of each stage of the analysis
+    profiler.save_report(get_script_report_path(__file__))
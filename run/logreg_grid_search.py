@@ -0,0 +1,85 @@
+"""
+Tyson Reimer
+University of Manitoba
+October 19th, 2026
+"""
+
+import os
+
+from umbmid import get_data_dir, get_proj_path, verify_path, get_script_logger
+from umbmid.loadsave import load_pickle
+from umbmid.ai.traintestsplit import split_to_train_test
+from umbmid.ai.gridsearch import (make_param_grid, sample_param_grid,
+                                  run_grid_search, load_grid_results)
+
+###############################################################################
+
+__DATA_DIR = os.path.join(get_data_dir(), 'gen-one/clean/')
+
+# The SQLite file of the results table of the searches, kept with the
+# outputs rather than in the dataset root
+__RESULTS_PATH = os.path.join(get_proj_path(),
+                              'output/logreg-grid-search.sqlite')
+verify_path(os.path.join(get_proj_path(), 'output/'))
+
+__SEARCH_NAME = 'gen-one-idft'  # The name of the search in the table
+
+# The candidate time-domain windows, normalizations, learning rates
+# and regularization strengths
+__WINDOWS = [(start, stop) for start in range(0, 25, 5)
+             for stop in range(30, 75, 10)]
+__NORMALIZATIONS = ['max', 'l2']
+__LEARN_RATES = [0.1, 1, 10]
+__REG_STRENGTHS = [0, 0.1, 1, 10]
+__MAX_ITER = 10000
+
+# If not None, the number of configs randomly sampled from the grid
+# (random search), otherwise every config is run
+__N_RANDOM = None
+
+__N_WORKERS = None  # The num of worker processes, None for one per CPU
+
+###############################################################################
+
+if __name__ == '__main__':
+
+    logger = get_script_logger(__file__)
+
+    logger.info('Beginning...Logistic Regression Grid Search...')
+
+    # Load the training data, labels, and metadata; the test set is
+    # not used, so that it is not used to select the config
+    train_data = load_pickle(os.path.join(__DATA_DIR, 'train_data.pickle'))
+    train_labels = load_pickle(os.path.join(__DATA_DIR,
+                                            'train_labels.pickle'))
+    train_md = load_pickle(os.path.join(__DATA_DIR, 'train_md.pickle'))
+
+    # Split the training set into the samples used to fit the models
+    # and the samples used to validate them
+    fit_data, val_data, fit_labels, val_labels, _, _ = \
+        split_to_train_test(train_data, train_labels, train_md,
+                            test_portion=0.2, init_seed=0, logger=logger)
+
+    param_grid = make_param_grid(windows=__WINDOWS,
+                                 normalizations=__NORMALIZATIONS,
+                                 learn_rates=__LEARN_RATES,
+                                 reg_strengths=__REG_STRENGTHS,
+                                 max_iters=[__MAX_ITER])
+
+    if __N_RANDOM is not None:  # If running a random search
+        param_grid = sample_param_grid(param_grid, __N_RANDOM)
+
+    run_grid_search(fit_data, fit_labels, val_data, val_labels, param_grid,
+                    results_path=__RESULTS_PATH, search_name=__SEARCH_NAME,
+                    n_workers=__N_WORKERS, logger=logger)
+
+    # Report the best configs
+    logger.info('Best configs:')
+
+    for result in load_grid_results(__RESULTS_PATH, __SEARCH_NAME, limit=10):
+        logger.info('\twindow [%d:%d]\tnorm: %s\tlearn rate: %g\treg: %g'
+                    '\t|\tval AUC: %.3f\tval acc: %.3f',
+                    result['win_start'], result['win_stop'],
+                    result['normalize'], result['learn_rate'],
+                    result['reg_strength'], result['val_auc'],
+                    result['val_acc'])
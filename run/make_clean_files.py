@@ -7,22 +7,50 @@ October 13th, 2019
 import os
 import numpy as np
 
-from umbmid import get_proj_path, verify_path, get_script_logger, null_logger
-from umbmid.loadsave import save_pickle, save_mat
-from umbmid.build import import_fd_cal_dataset
-from umbmid.sigproc import iczt
+from umbmid import get_data_dir, verify_path, get_script_logger, null_logger
+from umbmid.loadsave import (save_pickle, save_mat, save_mat_chunked,
+                             save_mat_v73, save_md_v73, check_h5py)
+from umbmid.build import (import_fd_cal_multiport_dataset,
+                          get_sparam_views, convert_to_iczt_dataset)
+from umbmid.datasource import CleanStore
+from umbmid.release import make_clean_release, domain_prefixes
+from umbmid.profiling import Profiler, set_profiler, get_script_report_path
 
 ###############################################################################
 
-__OUTPUT_DIR = os.path.join(get_proj_path(),
-                            'datasets/')
+__OUTPUT_DIR = get_data_dir()
 verify_path(__OUTPUT_DIR)
 
+# The complex dtype of the saved clean data, use np.complex64 to save
+# single-precision clean files
+__DTYPE = complex
+
+# If True, also makes the time-domain (ICZT) clean files, converting
+# __CHUNK_SIZE expts at a time directly to an on-disk array
+__SAVE_TD = False
+__CHUNK_SIZE = 16
+
+# If True, also saves v7.3 (HDF5) .mat files, chunked by expt and
+# compressed, with the metadata as a table (requires h5py, which is
+# not in requirements.txt: pip install h5py)
+__SAVE_V73 = False
+
+# If True, builds the full release (every cal_type, sparam and domain)
+# as a graph of tasks run in parallel by __N_WORKERS processes (one
+# per CPU if None), importing the raw data of each gen only once
+__PARALLEL = True
+__N_WORKERS = None
+
+# If True, records the time, bytes and memory of each stage of the
+# build, and saves a .json report to the output/logs/ dir
+__PROFILE = True
+
 ###############################################################################
 
 
 def make_clean_files(gen='one', cal_type='emp', sparams='s11',
-                     logger=null_logger):
+                     logger=null_logger, dtype=complex, save_td=False,
+                     chunk_size=16, save_v73=False):
     """Makes and saves the clean .mat and .pickle files
 
     Parameters
@@ -32,25 +60,49 @@ def make_clean_files(gen='one', cal_type='emp', sparams='s11',
     cal_type : str
         The type of calibration to be performed, must be in
         ['emp', 'adi'
-    sparams : str
-        The type of sparam to save, must be in ['s11', 's21']
+    sparams : str or list
+        The type of sparam to save, must be in ['s11', 's21'], or a
+        list of sparams, which are all imported in a single pass
     logger :
         A logger for logging progress
+    dtype :
+        The complex dtype of the saved data, complex (complex128) or
+        np.complex64 for single-precision clean files
+    save_td : bool
+        If True, also makes and saves the time-domain data, obtained
+        via the ICZT. The conversion is streamed to an on-disk array
+        in the gen-<gen>/clean-store/ dir, and the .pickle and .mat
+        files are exported from that array, so that the peak memory
+        use does not grow with the size of the time-domain dataset
+    chunk_size : int
+        The number of expts converted to the time-domain at once, if
+        save_td
+    save_v73 : bool
+        If True, also saves the data and metadata to v7.3 (HDF5) .mat
+        files (with the suffix _v73), which are chunked by expt and
+        compressed, and have no limit on the size of the data
     """
 
     assert gen in ['one', 'two', 'three'], \
         "Error: gen must be in ['one', 'two', 'three']"
 
-    assert sparams in ['s11', 's21'], \
+    if isinstance(sparams, str):  # If a single sparam, make a list
+        sparams = [sparams]
+
+    assert all(sparam in ['s11', 's21'] for sparam in sparams), \
         "Error: sparams must be in ['s11', 's21']"
 
-    # Load the frequency-domain dataset
+    if save_v73:  # Check for h5py before the build, not at the export
+        check_h5py()
+
+    # Load the frequency-domain dataset of all the sparams at once
     logger.info('\tImporting FD data and metadata...')
-    fd_data, fd_md = import_fd_cal_dataset(cal_type=cal_type,
-                                           prune=True,
-                                           gen=gen,
-                                           sparams=sparams,
-                                           logger=logger)
+    mp_data, fd_md = import_fd_cal_multiport_dataset(cal_type=cal_type,
+                                                     prune=True,
+                                                     gen=gen,
+                                                     sparams=sparams,
+                                                     logger=logger,
+                                                     dtype=dtype)
 
     logger.info('\tImport complete. Saving to .pickle and .mat files...')
 
@@ -59,22 +111,89 @@ def make_clean_files(gen='one', cal_type='emp', sparams='s11',
                                    'gen-%s/clean/' % gen)
     verify_path(this_output_dir)  # Verify that this dir exists
 
-    logger.info('Num data samples:\t\t%s' % np.size(fd_data, axis=0))
+    logger.info('Num data samples:\t\t%s' % np.size(mp_data, axis=0))
     logger.info('Length of metadata:\t\t%s' % len(fd_md))
 
-    # Save the frequency-domain data and metadata
-    save_pickle(fd_md,
-                os.path.join(this_output_dir, 'md_list_%s_%s.pickle' %
-                             (sparams, cal_type)))
-    save_pickle(fd_data,
-                os.path.join(this_output_dir, 'fd_data_%s_%s.pickle' %
-                             (sparams, cal_type)))
-    save_mat(fd_data, 'fd_data_%s' % sparams,
-             os.path.join(this_output_dir, 'fd_data_%s_%s.mat'
-                          % (sparams, cal_type)))
-    save_mat(fd_md, 'md_%s' % sparams,
-                os.path.join(this_output_dir, 'md_list_%s_%s.mat'
-                             % (sparams, cal_type)))
+    if save_td:  # If also making the time-domain data
+
+        store = CleanStore(os.path.join(__OUTPUT_DIR,
+                                        'gen-%s/clean-store/' % gen))
+
+        # Move the frequency-domain data to the store, and
+        # memory-map it, so that only one chunk is in memory at once
+        mp_name = 'fd_data_%s_%s' % ('_'.join(sparams), cal_type)
+        store.save_array(mp_data, mp_name)
+        del mp_data
+        mp_data = store.load_array(mp_name)
+
+    # Get the dataset of each sparam (views, no copies)
+    fd_views = get_sparam_views(mp_data, sparams)
+
+    for sparam in sparams:  # For each sparam
+
+        fd_data = fd_views[sparam]
+
+        # Save the frequency-domain data and metadata
+        save_pickle(fd_md,
+                    os.path.join(this_output_dir, 'md_list_%s_%s.pickle' %
+                                 (sparam, cal_type)))
+        save_pickle(fd_data,
+                    os.path.join(this_output_dir, 'fd_data_%s_%s.pickle' %
+                                 (sparam, cal_type)))
+        save_mat(fd_data, 'fd_data_%s' % sparam,
+                 os.path.join(this_output_dir, 'fd_data_%s_%s.mat'
+                              % (sparam, cal_type)))
+        save_mat(fd_md, 'md_%s' % sparam,
+                 os.path.join(this_output_dir, 'md_list_%s_%s.mat'
+                              % (sparam, cal_type)))
+
+        if save_v73:  # If also saving the v7.3 .mat files
+            save_mat_v73(fd_data, 'fd_data_%s' % sparam,
+                         os.path.join(this_output_dir,
+                                      'fd_data_%s_%s_v73.mat'
+                                      % (sparam, cal_type)))
+            save_md_v73(fd_md, 'md_%s' % sparam,
+                        os.path.join(this_output_dir,
+                                     'md_list_%s_%s_v73.mat'
+                                     % (sparam, cal_type)))
+
+        if save_td:  # If also making the time-domain data
+
+            logger.info('\tConverting %s to the time-domain...' % sparam)
+
+            # The name of the time-domain clean files and .mat var, as
+            # in the parallel release (see umbmid.release)
+            td_name = '%s_%s_%s' % (domain_prefixes['iczt'], sparam,
+                                    cal_type)
+            td_var_name = '%s_%s' % (domain_prefixes['iczt'], sparam)
+
+            # Make the on-disk array for the time-domain data, and
+            # convert each chunk of expts directly into it
+            td_data = store.create_array(td_name,
+                                         shape=(np.size(fd_data, axis=0),
+                                                1024,
+                                                np.size(fd_data, axis=2)),
+                                         dtype=dtype)
+            convert_to_iczt_dataset(fd_data, num_time_pts=1024,
+                                    logger=logger, dtype=dtype,
+                                    chunk_size=chunk_size, out=td_data)
+            td_data.flush()
+
+            logger.info('\tConversion complete. Saving to .pickle and '
+                        '.mat files...')
+
+            # Export the time-domain data from the store
+            save_pickle(td_data,
+                        os.path.join(this_output_dir,
+                                     '%s.pickle' % td_name))
+            save_mat_chunked(td_data, td_var_name,
+                             os.path.join(this_output_dir,
+                                          '%s.mat' % td_name))
+
+            if save_v73:  # If also saving the v7.3 .mat file
+                save_mat_v73(td_data, td_var_name,
+                             os.path.join(this_output_dir,
+                                          '%s_v73.mat' % td_name))
 
     logger.info('\tComplete saving clean data files.')
 
@@ -85,24 +204,50 @@ if __name__ == '__main__':
 
     our_logger = get_script_logger(__file__)
 
-    for cal_type in ['emp', 'adi']:
-    # for cal_type in ['adi']:
+    if __PROFILE:  # If profiling, record the stages of the build
+        profiler = Profiler()
+        set_profiler(profiler)
+
+    if __PARALLEL:  # If building the release in parallel
+
+        make_clean_release(gens=['three'],
+                           cal_types=['emp', 'adi'],
+                           domains=(['fd', 'idft', 'iczt'] if __SAVE_TD
+                                    else ['fd']),
+                           output_dir=__OUTPUT_DIR,
+                           dtype=__DTYPE,
+                           chunk_size=__CHUNK_SIZE,
+                           save_v73=__SAVE_V73,
+                           n_workers=__N_WORKERS,
+                           logger=our_logger)
+
+    else:  # If making the clean files one combination at a time
 
-        for gen in ['three']:  # For each generation of dataset
+        for cal_type in ['emp', 'adi']:
+        # for cal_type in ['adi']:
 
-            if gen in ['two', 'three']:  # If the second generation
+            for gen in ['three']:  # For each generation of dataset
 
-                # S11 and S21 are possible sparams
-                possible_sparams = ['s11', 's21']
+                if gen in ['two', 'three']:  # If the second generation
 
-            else:  # If the first generation
+                    # S11 and S21 are possible sparams
+                    possible_sparams = ['s11', 's21']
 
-                # S11 is only possible sparams
-                possible_sparams = ['s11']
+                else:  # If the first generation
 
-            for sparams in possible_sparams:  # For each possible sparam
+                    # S11 is only possible sparams
+                    possible_sparams = ['s11']
 
+                # Make the clean files of all the possible sparams, which
+                # are imported together
                 make_clean_files(gen=gen,
-                                 sparams=sparams,
+                                 sparams=possible_sparams,
                                  cal_type=cal_type,
-                                 logger=our_logger)
+                                 logger=our_logger,
+                                 dtype=__DTYPE,
+                                 save_td=__SAVE_TD,
+                                 chunk_size=__CHUNK_SIZE,
+                                 save_v73=__SAVE_V73)
+
+    if __PROFILE:  # If profiling, save the report
+        profiler.save_report(get_script_report_path(__file__))
@@ -7,17 +7,22 @@ October 21st, 2019
 import os
 import numpy as np
 
-from umbmid import get_proj_path, verify_path, get_script_logger
-from umbmid.loadsave import save_pickle, save_mat
-from umbmid.build import (import_fd_dataset, import_metadata,
-                          import_metadata_df)
+from umbmid import get_data_dir, verify_path, get_script_logger
+from umbmid.loadsave import (save_pickle, save_mat, save_mat_v73, save_md_v73,
+                             check_h5py)
+from umbmid.build import (import_fd_multiport_dataset, get_sparam_views,
+                          import_metadata, import_metadata_df)
+from umbmid.catalog import load_catalog
 
 ###############################################################################
 
-__OUTPUT_DIR = os.path.join(get_proj_path(), 'datasets/')
+__OUTPUT_DIR = get_data_dir()
 verify_path(__OUTPUT_DIR)
 
-__DATA_DIR = os.path.join(get_proj_path(), 'datasets/')
+# If True, also saves v7.3 (HDF5) .mat files, chunked by expt and
+# compressed, with the metadata as a table (requires h5py, which is
+# not in requirements.txt: pip install h5py)
+__SAVE_V73 = False
 
 ###############################################################################
 
@@ -36,6 +41,9 @@ if __name__ == '__main__':
 
     logger.info('Beginning...Construction of All Data Clean Files...')
 
+    if __SAVE_V73:  # Check for h5py before the build, not at the export
+        check_h5py()
+
     for gen in ['three']:
 
         logger.info('\tWorking on gen-%s...' % gen)
@@ -48,20 +56,29 @@ if __name__ == '__main__':
         # Get the list of the possible sparams for this gen
         sparams_here = possible_sparams[gen]
 
+        # Load the raw dataset catalog once, for all the sparams
+        catalog = load_catalog(gen=gen, logger=logger)
+
+        # Import the frequency-domain data of all the sparams for every
+        # scan in the dataset, in a single pass
+        mp_data = import_fd_multiport_dataset(gen=gen,
+                                              sparams=sparams_here,
+                                              logger=logger,
+                                              catalog=catalog)
+
+        # Get the dataset of each sparam (views, no copies)
+        fd_views = get_sparam_views(mp_data, sparams_here)
+
         for sparam in sparams_here:  # For each sparam
 
             logger.info('\t\tWorking on sparam %s...' % sparam)
 
-            # Import the frequency-domain data for every scan in the
-            # dataset
-            fd_data = import_fd_dataset(gen=gen,
-                                        sparams=sparam,
-                                        logger=logger)
+            fd_data = fd_views[sparam]
 
             # Import the metadata as a list of dicts and as
             # pandas dataframe
-            metadata = import_metadata(gen=gen)
-            metadata_df = import_metadata_df(gen=gen)
+            metadata = import_metadata(gen=gen, catalog=catalog)
+            metadata_df = import_metadata_df(gen=gen, catalog=catalog)
 
             logger.info('\t\t\tFD data of num samples:\t%d'
                         % np.size(fd_data, axis=0))
@@ -89,3 +106,15 @@ if __name__ == '__main__':
             save_mat(metadata, 'metadata',
                      os.path.join(output_here, 'matlab-data/',
                                   'metadata_gen_%s.mat' % gen))
+
+            if __SAVE_V73:  # If also saving the v7.3 .mat files
+
+                verify_path(os.path.join(output_here, 'matlab-v73-data/'))
+
+                save_mat_v73(fd_data, 'fd_data',
+                             os.path.join(output_here, 'matlab-v73-data/',
+                                          'fd_data_gen_%s_%s.mat'
+                                          % (gen, sparam)))
+                save_md_v73(metadata, 'metadata',
+                            os.path.join(output_here, 'matlab-v73-data/',
+                                         'metadata_gen_%s.mat' % gen))
@@ -0,0 +1,51 @@
+"""
+Tyson Reimer
+University of Manitoba
+October 19th, 2026
+"""
+
+import os
+
+from umbmid import get_proj_path, verify_path, get_script_logger
+from umbmid.synth import make_synth_dataset
+
+###############################################################################
+
+# The dataset root in which the synthetic gen-<gen>/raw/ folders
+# will be made - kept separate from the real dataset
+__OUTPUT_DIR = os.path.join(get_proj_path(), 'output/synth-datasets/')
+verify_path(os.path.join(get_proj_path(), 'output/'))
+verify_path(__OUTPUT_DIR)
+
+###############################################################################
+
+# The number of sessions to make for each generation of dataset -
+# increase to load-test at scale
+n_sessions = {
+    'one': 10,
+    'two': 10,
+    'three': 10,
+}
+
+###############################################################################
+
+if __name__ == '__main__':
+
+    logger = get_script_logger(__file__)
+
+    logger.info('Beginning...Construction of Synthetic Datasets...')
+
+    for gen in ['one', 'two', 'three']:  # For each generation
+
+        logger.info('\tWorking on gen-%s...' % gen)
+
+        metadata = make_synth_dataset(__OUTPUT_DIR,
+                                      gen=gen,
+                                      n_sessions=n_sessions[gen],
+                                      n_adi=2,
+                                      n_expts_per_adi=6,
+                                      tum_frac=0.5,
+                                      overwrite=True,
+                                      logger=logger)
+
+        logger.info('\t\tMade %d synthetic expts.' % len(metadata))
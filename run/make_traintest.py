@@ -6,7 +6,7 @@ October 12th, 2019
 
 import os
 
-from umbmid import get_proj_path, verify_path, get_script_logger
+from umbmid import get_data_dir, verify_path, get_script_logger
 from umbmid.loadsave import save_pickle, save_mat, load_pickle
 from umbmid.content import get_class_labels
 from umbmid.ai.traintestsplit import split_to_train_test
@@ -14,13 +14,13 @@ from umbmid.ai.traintestsplit import split_to_train_test
 ###############################################################################
 
 # Define the directory where the clean dataset is located
-__DATA_DIR = os.path.join(get_proj_path(), 'datasets/gen-one/clean/')
+__DATA_DIR = os.path.join(get_data_dir(), 'gen-one/clean/')
 
 ###############################################################################
 
 # Define the output directory where the train/test set files will
 # be saved
-__OUTPUT_DIR = os.path.join(get_proj_path(), 'datasets/gen-one/clean/')
+__OUTPUT_DIR = os.path.join(get_data_dir(), 'gen-one/clean/')
 verify_path(__OUTPUT_DIR)
 
 ###############################################################################
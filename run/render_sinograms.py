@@ -0,0 +1,58 @@
+"""
+Tyson Reimer
+University of Manitoba
+October 19th, 2026
+"""
+
+import os
+
+from umbmid import get_data_dir, get_script_logger
+from umbmid.loadsave import load_pickle
+from umbmid.build import convert_to_iczt_dataset
+from umbmid.render import render_dataset
+
+###############################################################################
+
+__GEN = 'three'  # The generation of dataset
+__SPARAM = 's11'  # The sparam of the data
+__CAL_TYPE = 'emp'  # The type of calibration of the data
+
+# If True, writes only the sinogram through the colormap (no axes,
+# labels or colorbar), which is much faster than rendering figures
+__FAST = False
+
+# The num of worker processes, if None, uses one per CPU
+__N_WORKERS = None
+
+# Function of the metadata dict of each expt, returning True if its
+# sinogram is rendered, if None, renders every expt
+__MD_FILTER = None  # ex: lambda md: md['n_session'] == 1
+
+__CLEAN_DIR = os.path.join(get_data_dir(), 'gen-%s/clean/' % __GEN)
+
+__OUTPUT_DIR = os.path.join(get_data_dir(), 'gen-%s/sinograms/' % __GEN)
+
+###############################################################################
+
+if __name__ == '__main__':
+
+    logger = get_script_logger(__file__)
+
+    logger.info('Beginning...Rendering Sinograms of gen-%s...', __GEN)
+
+    # Load the calibrated frequency-domain data and metadata
+    fd_data = load_pickle(os.path.join(__CLEAN_DIR, 'fd_data_%s_%s.pickle'
+                                       % (__SPARAM, __CAL_TYPE)))
+    metadata = load_pickle(os.path.join(__CLEAN_DIR, 'md_list_%s_%s.pickle'
+                                        % (__SPARAM, __CAL_TYPE)))
+
+    # Convert to the time-domain, for the sinograms
+    td_data = convert_to_iczt_dataset(fd_data, num_time_pts=1024,
+                                      logger=logger)
+
+    render_dataset(td_data, __OUTPUT_DIR, metadata=metadata,
+                   md_filter=__MD_FILTER, fast=__FAST,
+                   n_workers=__N_WORKERS, logger=logger,
+                   ini_t=0, fin_t=6e-9)
+
+    logger.info('Complete rendering sinograms.')
@@ -0,0 +1,61 @@
+"""
+Tyson Reimer
+University of Manitoba
+October 19th, 2026
+"""
+
+import os
+import numpy as np
+
+from umbmid import get_data_dir, get_proj_path, get_script_logger
+from umbmid.loadsave import load_pickle, save_pickle
+from umbmid.ai.logreg import LogisticRegression
+from umbmid.ai.stats import get_pred_labels
+
+###############################################################################
+
+__GEN = 'three'  # The generation of dataset
+__SPARAM = 's11'  # The sparam of the data
+__CAL_TYPE = 'emp'  # The type of calibration of the data
+
+__CLEAN_DIR = os.path.join(get_data_dir(), 'gen-%s/clean/' % __GEN)
+
+# The saved model (see logreg_analysis.py), used without retraining
+__MODEL_PATH = os.path.join(get_proj_path(), 'output/models/logreg.npz')
+
+__CHUNK_SIZE = 64  # The num of scans scored at once
+
+###############################################################################
+
+if __name__ == '__main__':
+
+    logger = get_script_logger(__file__)
+
+    logger.info('Beginning...Scoring gen-%s with saved model...', __GEN)
+
+    logreg = LogisticRegression.load(__MODEL_PATH)
+
+    logger.info('\tModel features: %s\tthreshold: %.3f',
+                logreg.feature_config, logreg.threshold)
+
+    # Load the calibrated frequency-domain data and metadata
+    fd_data = load_pickle(os.path.join(__CLEAN_DIR, 'fd_data_%s_%s.pickle'
+                                       % (__SPARAM, __CAL_TYPE)))
+    metadata = load_pickle(os.path.join(__CLEAN_DIR, 'md_list_%s_%s.pickle'
+                                        % (__SPARAM, __CAL_TYPE)))
+
+    # Score each scan, with the feature pipeline stored with the model
+    scores = logreg.predict_fd_proba(fd_data, chunk_size=__CHUNK_SIZE)
+    pred_labels = get_pred_labels(scores, logreg.threshold).astype(int)
+
+    for md, score, pred_label in zip(metadata, scores, pred_labels):
+        logger.info('\tid %4s\tscore: %.3f\tpred label: %d',
+                    md['id'], score, pred_label)
+
+    logger.info('\tNum predicted positive: %d / %d',
+                np.sum(pred_labels), np.size(pred_labels))
+
+    save_pickle(scores, os.path.join(__CLEAN_DIR, 'logreg_scores_%s_%s.pickle'
+                                     % (__SPARAM, __CAL_TYPE)))
+
+    logger.info('Complete scoring.')
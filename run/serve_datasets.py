@@ -0,0 +1,52 @@
+"""
+Tyson Reimer
+University of Manitoba
+October 19th, 2026
+"""
+
+import os
+
+from umbmid import get_data_dir, get_script_logger
+from umbmid.loadsave import load_pickle
+from umbmid.shared import DatasetServer
+
+###############################################################################
+
+__GEN = 'two'  # The generation of dataset
+
+__CLEAN_DIR = os.path.join(get_data_dir(), 'gen-%s/clean/' % __GEN)
+__SIMPLE_DIR = os.path.join(get_data_dir(),
+                            'gen-%s/simple-clean/python-data/' % __GEN)
+
+# The name, data .pickle and metadata .pickle of each shared dataset
+__DATASETS = [
+    ('gen-%s-fd-s11-emp' % __GEN,
+     os.path.join(__CLEAN_DIR, 'fd_data_s11_emp.pickle'),
+     os.path.join(__CLEAN_DIR, 'md_list_s11_emp.pickle')),
+    ('simple-gen-%s-s11' % __GEN,
+     os.path.join(__SIMPLE_DIR, 'fd_data_gen_%s_s11.pickle' % __GEN),
+     os.path.join(__SIMPLE_DIR, 'metadata_gen_%s.pickle' % __GEN)),
+]
+
+###############################################################################
+
+if __name__ == '__main__':
+
+    logger = get_script_logger(__file__)
+
+    logger.info('Beginning...Serving gen-%s datasets...', __GEN)
+
+    server = DatasetServer(logger=logger)
+
+    for name, data_path, md_path in __DATASETS:  # For each dataset
+
+        # Load the dataset once, and copy it into shared memory; the
+        # private copy is freed before loading the next dataset
+        data = load_pickle(data_path)
+        server.publish(name, data, metadata=load_pickle(md_path))
+        del data
+
+    logger.info('Serving %s, until interrupted (Ctrl+C)...'
+                % server.list_datasets())
+
+    server.serve_forever()
@@ -0,0 +1,55 @@
+"""
+Tyson Reimer
+University of Manitoba
+October 19th, 2026
+"""
+
+import os
+
+from umbmid import get_data_dir, get_proj_path, get_script_logger
+from umbmid.ai.scoring import make_scoring_server
+
+###############################################################################
+
+# The saved model (see logreg_analysis.py), loaded once at start-up
+__MODEL_PATH = os.path.join(get_proj_path(), 'output/models/logreg.npz')
+
+# The host and port of the server; the host only accepts local
+# connections
+__HOST = '127.0.0.1'
+__PORT = 8000
+
+# The dir in which the local .txt files sent by path must be; set to
+# None to only accept the contents of the files
+__DATA_ROOT = get_data_dir()
+
+# The max num of scans scored at once, and the max time (in seconds)
+# a request waits for others to be batched with it
+__MAX_BATCH_SIZE = 64
+__MAX_WAIT = 0.005
+
+###############################################################################
+
+if __name__ == '__main__':
+
+    logger = get_script_logger(__file__)
+
+    server = make_scoring_server(__MODEL_PATH, host=__HOST, port=__PORT,
+                                 max_batch_size=__MAX_BATCH_SIZE,
+                                 max_wait=__MAX_WAIT,
+                                 data_root=__DATA_ROOT, logger=logger)
+
+    logger.info('Serving model %s at http://%s:%d'
+                % (__MODEL_PATH, __HOST, server.server_address[1]))
+
+    try:
+        server.serve_forever()
+
+    except KeyboardInterrupt:
+        pass
+
+    finally:  # Stop the server, after scoring the queued requests
+        server.server_close()
+        server.scorer.close()
+
+        logger.info('Final metrics: %s' % server.scorer.metrics.report())
@@ -8,9 +8,11 @@ import os
 import numpy as np
 import matplotlib.pyplot as plt
 
-from umbmid import get_proj_path, verify_path, get_script_logger
+from umbmid import (get_proj_path, get_data_dir, verify_path,
+                    get_script_logger)
 from umbmid.sigproc import iczt
 from umbmid.loadsave import load_pickle
+from umbmid.shared import load_shared_dataset
 
 ###############################################################################
 
@@ -18,9 +20,13 @@ from umbmid.loadsave import load_pickle
 gen = 'two'
 
 # The path to the data directory on your local PC
-__DATA_DIR = os.path.join(get_proj_path(),
-                          'datasets/gen-%s/simple-clean/python-data/'
-                          % gen)
+__DATA_DIR = os.path.join(get_data_dir(),
+                          'gen-%s/simple-clean/python-data/' % gen)
+
+# If True, the data and metadata are read from the shared memory of a
+# running dataset server (see run/serve_datasets.py) instead of
+# loading a private copy
+__USE_SHARED = False
 
 __OUTPUT_DIR = os.path.join(get_proj_path(),
                             'output/simple-use-ex-output/')
@@ -139,16 +145,25 @@ if __name__ == '__main__':
 
     logger.info('\tLoading gen-%s data...' % gen)
 
-    # Load the S11 frequency-domain data
-    s11_fd_data = load_pickle(os.path.join(__DATA_DIR,
-                                           'fd_data_gen_%s_s11.pickle' % gen))
+    if __USE_SHARED:  # If using the data of the dataset server
+
+        # Get a read-only view of the S11 frequency-domain data, and
+        # the metadata of every scan
+        s11_fd_data, metadata = load_shared_dataset('simple-gen-%s-s11'
+                                                    % gen)
+
+    else:  # If loading a private copy of the data
+
+        # Load the S11 frequency-domain data
+        s11_fd_data = load_pickle(os.path.join(
+            __DATA_DIR, 'fd_data_gen_%s_s11.pickle' % gen))
 
-    logger.info('\t\tData loaded.')
-    logger.info('\tLoading gen-%s metadata...' % gen)
+        logger.info('\t\tData loaded.')
+        logger.info('\tLoading gen-%s metadata...' % gen)
 
-    # Load the metadata of every scan
-    metadata = load_pickle(os.path.join(__DATA_DIR,
-                                        'metadata_gen_%s.pickle' % gen))
+        # Load the metadata of every scan
+        metadata = load_pickle(os.path.join(__DATA_DIR,
+                                            'metadata_gen_%s.pickle' % gen))
 
     # Create list of the unique ID number of each scan
     unique_ids = [md['id'] for md in metadata]
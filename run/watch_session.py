@@ -0,0 +1,48 @@
+"""
+Tyson Reimer
+University of Manitoba
+October 19th, 2026
+"""
+
+import os
+
+from umbmid import get_data_dir, get_script_logger
+from umbmid.watch import SessionWatcher
+
+###############################################################################
+
+__GEN = 'three'  # The generation of dataset
+__SESSION = '2021-01-01'  # The session being measured
+__SPARAMS = ('s11', 's21')  # The sparams of each expt
+__CAL_TYPE = 'emp'  # The type of calibration of the data
+
+__SESSION_DIR = os.path.join(get_data_dir(), 'gen-%s/raw/%s/'
+                             % (__GEN, __SESSION))
+
+# The store to which the calibrated expts are appended
+__STORE_DIR = os.path.join(get_data_dir(), 'gen-%s/clean-store/' % __GEN)
+
+__POLL_INTERVAL = 1.0  # The time between polls, in seconds
+
+# The time a file must be unchanged before it is read, in seconds
+__SETTLE_TIME = 2.0
+
+###############################################################################
+
+if __name__ == '__main__':
+
+    logger = get_script_logger(__file__)
+
+    logger.info('Beginning...Watching session %s...', __SESSION_DIR)
+
+    watcher = SessionWatcher(__SESSION_DIR, __STORE_DIR, sparams=__SPARAMS,
+                             cal_type=__CAL_TYPE, settle_time=__SETTLE_TIME,
+                             logger=logger)
+
+    try:  # Watch until interrupted (ex: Ctrl+C, once the session ends)
+        watcher.run(poll_interval=__POLL_INTERVAL)
+
+    except KeyboardInterrupt:
+        pass
+
+    logger.info('Stopped watching session %s.', __SESSION_DIR)
@@ -6,11 +6,11 @@ October 15th, 2019
 
 import os
 
-from umbmid import get_proj_path, get_script_logger
+from umbmid import get_data_dir, get_script_logger
 
 ###############################################################################
 
-__DATA_DIR = os.path.join(get_proj_path(), 'datasets/')
+__DATA_DIR = get_data_dir()
 
 ###############################################################################
 
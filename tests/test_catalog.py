@@ -0,0 +1,107 @@
+"""
+Tyson Reimer
+University of Manitoba
+October 19th, 2026
+"""
+
+import os
+import time
+
+import numpy as np
+
+from umbmid.catalog import load_catalog, read_catalog_index
+from umbmid.synth import make_synth_dataset
+
+###############################################################################
+
+
+def _make_dataset(tmp_path):
+    """Makes a small synthetic dataset, returns its root dir"""
+
+    data_dir = str(tmp_path / 'synth')
+    make_synth_dataset(data_dir, gen='one', n_sessions=2, n_freqs=11,
+                       n_ant_pos=8)
+
+    return data_dir
+
+
+def _get_md_path(data_dir, catalog):
+    """Returns the path to the -metadata.csv file of the first session"""
+
+    session = catalog['expts'][0]['session']
+
+    return os.path.join(data_dir, 'gen-one', 'raw', session,
+                        '%s-metadata.csv' % session)
+
+
+def test_index_warm_start(tmp_path):
+    """The index written on a cold start is read on a warm start"""
+
+    data_dir = _make_dataset(tmp_path)
+
+    assert read_catalog_index('one', data_dir=data_dir) is None
+
+    catalog = load_catalog('one', data_dir=data_dir)
+    indexed = read_catalog_index('one', data_dir=data_dir)
+
+    assert indexed is not None
+    assert ([(expt['md']['id'], expt['md']['phant_id'])
+             for expt in indexed['expts']]
+            == [(expt['md']['id'], expt['md']['phant_id'])
+                for expt in catalog['expts']])
+    assert ([expt['paths'] for expt in indexed['expts']]
+            == [expt['paths'] for expt in catalog['expts']])
+
+
+def test_metadata_edit_invalidates_index(tmp_path):
+    """Editing a -metadata.csv file in place makes the index stale"""
+
+    data_dir = _make_dataset(tmp_path)
+    catalog = load_catalog('one', data_dir=data_dir)
+
+    md_path = _get_md_path(data_dir, catalog)
+
+    # Find the first expt with an adipose shell (the first expt of
+    # each session is an empty-chamber scan)
+    n_row = [np.isnan(expt['md']['adi_vol'])
+             for expt in catalog['expts']].index(False) + 1
+
+    # Change its adipose volume in place, which does not change the
+    # mtime of the session dir
+    with open(md_path, 'r') as handle:
+        md_rows = handle.read().split('\n')
+
+    md_vals = md_rows[n_row].split(',')
+    md_vals[md_rows[0].split(',').index('adi_vol')] = '123.00'
+    md_rows[n_row] = ','.join(md_vals)
+
+    time.sleep(0.01)  # So that the mtime changes
+    with open(md_path, 'w') as handle:
+        handle.write('\n'.join(md_rows))
+
+    assert read_catalog_index('one', data_dir=data_dir) is None
+
+    # The edited metadata is used, and the index is rewritten
+    catalog = load_catalog('one', data_dir=data_dir)
+
+    assert catalog['expts'][n_row - 1]['md']['adi_vol'] == 123.0
+    assert read_catalog_index('one', data_dir=data_dir) is not None
+
+
+def test_data_file_edit_invalidates_index(tmp_path):
+    """Modifying a Mono file in place makes the index stale"""
+
+    data_dir = _make_dataset(tmp_path)
+    catalog = load_catalog('one', data_dir=data_dir)
+
+    data_path = os.path.join(data_dir,
+                             catalog['expts'][0]['paths']['s11'])
+
+    with open(data_path, 'a') as handle:
+        handle.write('\n')
+
+    assert read_catalog_index('one', data_dir=data_dir) is None
+
+    # Unless the data files are not checked
+    assert read_catalog_index('one', data_dir=data_dir,
+                              check_files=False) is not None
@@ -0,0 +1,75 @@
+"""
+Tyson Reimer
+University of Manitoba
+October 19th, 2026
+"""
+
+import numpy as np
+
+from umbmid.datasource import CleanStore, get_data_source, clear_source_cache
+
+###############################################################################
+
+
+def _make_mds(ini_id, n_expts):
+    """Returns the metadata dicts of n_expts expts"""
+    return [{'id': ini_id + ii, 'phant_id': 'A2F1', 'tum_rad': np.nan}
+            for ii in range(n_expts)]
+
+
+def test_append_part_load_parts(tmp_path):
+    """Appended parts are loaded in order, with their metadata"""
+
+    store = CleanStore(str(tmp_path / 'store'))
+
+    assert store.list_parts('fd_data') == []
+    assert store.load_parts('fd_data') == (None, [])
+
+    rng = np.random.default_rng(0)
+    arrs = [rng.standard_normal([n_expts, 3, 4]) + 0j
+            for n_expts in [2, 1, 3]]
+
+    ini_id = 1
+    for arr in arrs:
+        store.append_part(arr, _make_mds(ini_id, len(arr)), 'fd_data')
+        ini_id += len(arr)
+
+    assert store.list_parts('fd_data') == ['fd_data.parts/000000',
+                                           'fd_data.parts/000001',
+                                           'fd_data.parts/000002']
+
+    # Parts are read back the same from a new instance of the store
+    loaded, metadata = CleanStore(str(tmp_path / 'store')).load_parts(
+        'fd_data')
+
+    np.testing.assert_array_equal(loaded, np.concatenate(arrs, axis=0))
+    assert [md['id'] for md in metadata] == list(range(1, 7))
+    assert all(md['phant_id'] == 'A2F1' for md in metadata)
+    assert all(np.isnan(md['tum_rad']) for md in metadata)
+
+
+def test_incomplete_part_not_listed(tmp_path):
+    """A part whose array has not been saved yet is not listed"""
+
+    store = CleanStore(str(tmp_path / 'store'))
+    store.append_part(np.zeros([1, 2]), _make_mds(1, 1), 'fd_data')
+
+    # A part allocated (ex: by another writer) but still being written
+    parts_dir = tmp_path / 'store' / 'fd_data.parts'
+    (parts_dir / '000001.alloc').touch()
+    (parts_dir / '000001.tmp.npy').touch()
+
+    assert store.list_parts('fd_data') == ['fd_data.parts/000000']
+
+    # The next part skips the allocated part number
+    assert (store.append_part(np.ones([1, 2]), _make_mds(2, 1), 'fd_data')
+            == 'fd_data.parts/000002')
+
+
+def test_store_is_detected(tmp_path):
+    """get_data_source() returns a CleanStore for a store dir"""
+
+    CleanStore(str(tmp_path / 'store'))
+
+    clear_source_cache()
+    assert isinstance(get_data_source(str(tmp_path / 'store')), CleanStore)
@@ -0,0 +1,84 @@
+"""
+Tyson Reimer
+University of Manitoba
+October 19th, 2026
+"""
+
+import io
+
+import numpy as np
+import pytest
+import scipy.io
+
+from umbmid.loadsave import load_fd_data, parse_fd_data, save_mat_chunked
+from umbmid.synth import save_synth_txt
+
+###############################################################################
+
+
+@pytest.mark.parametrize('dtype', [np.complex64, np.complex128])
+def test_save_mat_chunked_round_trip(tmp_path, dtype):
+    """save_mat_chunked() over several blocks matches scipy.io.loadmat"""
+
+    rng = np.random.default_rng(0)
+
+    # Odd dims, so that the data of each part needs padding
+    shape = (5, 7, 9)
+    arr = (rng.standard_normal(shape)
+           + 1j * rng.standard_normal(shape)).astype(dtype)
+
+    # Hold two entries of the last axis at once, so that the 9 entries
+    # are written in 5 blocks, the last of which has a single entry
+    slice_bytes = 5 * 7 * np.finfo(dtype).dtype.itemsize
+    mat_path = str(tmp_path / 'arr.mat')
+    save_mat_chunked(arr, 'fd_data', mat_path, buf_bytes=2 * slice_bytes)
+
+    loaded = scipy.io.loadmat(mat_path)['fd_data']
+
+    assert loaded.dtype == np.dtype(dtype)
+    assert loaded.shape == shape
+    np.testing.assert_array_equal(loaded, arr)
+
+
+def test_save_mat_chunked_real(tmp_path):
+    """save_mat_chunked() saves real arrays in a single block"""
+
+    arr = np.arange(3 * 5, dtype=np.float64).reshape(3, 5)
+
+    mat_path = str(tmp_path / 'arr.mat')
+    save_mat_chunked(arr, 'td_data', mat_path)
+
+    np.testing.assert_array_equal(scipy.io.loadmat(mat_path)['td_data'], arr)
+
+
+@pytest.mark.parametrize('dtype', [np.complex64, np.complex128])
+def test_parse_fd_data_matches_load_fd_data(tmp_path, dtype):
+    """parse_fd_data() of the file contents matches load_fd_data()"""
+
+    rng = np.random.default_rng(1)
+    fd_data = (rng.standard_normal([11, 8])
+               + 1j * rng.standard_normal([11, 8]))
+
+    txt_path = str(tmp_path / 'scan.txt')
+    save_synth_txt(fd_data, txt_path)
+
+    with open(txt_path, 'rb') as handle:
+        raw_data = handle.read()
+
+    parsed = parse_fd_data(raw_data, dtype=dtype)
+    loaded = load_fd_data(txt_path, dtype=dtype)
+    loaded_obj = load_fd_data(io.BytesIO(raw_data), dtype=dtype)
+
+    assert parsed.dtype == np.dtype(dtype)
+    np.testing.assert_array_equal(parsed, loaded)
+    np.testing.assert_array_equal(parsed, loaded_obj)
+
+    # Also matches the reference parse of the same file
+    ref_data = np.genfromtxt(txt_path)
+    np.testing.assert_array_equal(
+        parsed, (ref_data[:, 0::2] + 1j * ref_data[:, 1::2]).astype(dtype))
+
+    # The str contents and comma delimiters are also accepted
+    np.testing.assert_array_equal(
+        parse_fd_data(raw_data.decode('utf-8').replace('\t', ','),
+                      dtype=dtype), parsed)
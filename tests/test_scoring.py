@@ -0,0 +1,58 @@
+"""
+Tyson Reimer
+University of Manitoba
+October 19th, 2026
+"""
+
+import os
+import json
+
+import numpy as np
+import pytest
+
+from umbmid.ai.scoring import _parse_request
+from umbmid.synth import save_synth_txt
+
+###############################################################################
+
+
+def _json_body(path, ref_path=None):
+    """Returns the body of an 'application/json' request"""
+    return json.dumps({'path': path, 'ref_path': ref_path}).encode()
+
+
+def test_paths_restricted_to_data_root(tmp_path):
+    """Only files within the data root are read by path"""
+
+    data_root = tmp_path / 'data'
+    os.makedirs(data_root)
+
+    fd_data = np.ones([11, 8]) + 1j * np.ones([11, 8])
+    save_synth_txt(fd_data, str(data_root / 'scan.txt'))
+    save_synth_txt(fd_data, str(tmp_path / 'outside.txt'))
+
+    root = os.path.realpath(data_root)
+
+    parsed = _parse_request(_json_body(str(data_root / 'scan.txt')),
+                            'application/json', data_root=root)
+    np.testing.assert_array_equal(parsed, fd_data)
+
+    # Paths outside of the root, directly, by '..', or by a symlink
+    os.symlink(tmp_path, data_root / 'link')
+    for path in [str(tmp_path / 'outside.txt'),
+                 str(data_root / '..' / 'outside.txt'),
+                 str(data_root / 'link' / 'outside.txt')]:
+
+        with pytest.raises(ValueError):
+            _parse_request(_json_body(path), 'application/json',
+                           data_root=root)
+
+        # Also for the path of the reference scan
+        with pytest.raises(ValueError):
+            _parse_request(_json_body(str(data_root / 'scan.txt'), path),
+                           'application/json', data_root=root)
+
+    # No paths are accepted without a data root
+    with pytest.raises(ValueError):
+        _parse_request(_json_body(str(data_root / 'scan.txt')),
+                       'application/json')
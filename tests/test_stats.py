@@ -0,0 +1,27 @@
+"""
+Tyson Reimer
+University of Manitoba
+October 19th, 2026
+"""
+
+import numpy as np
+
+from umbmid.ai.stats import get_metrics, get_pred_labels
+
+###############################################################################
+
+
+def test_score_at_threshold_is_positive():
+    """A score equal to the threshold is predicted positive"""
+
+    labels = np.array([1, 1, 0, 0, 1, 0])
+    scores = np.array([0.5, 0.9, 0.5, 0.1, 0.3, 0.7])
+
+    np.testing.assert_array_equal(get_pred_labels(scores, 0.5),
+                                  [True, True, True, False, False, True])
+
+    metrics = get_metrics(labels, scores, threshold=0.5)
+
+    assert np.isclose(metrics['acc'], 3 / 6)
+    assert np.isclose(metrics['sens'], 2 / 3)
+    assert np.isclose(metrics['spec'], 1 / 3)
@@ -0,0 +1,33 @@
+"""
+Tyson Reimer
+University of Manitoba
+October 19th, 2026
+"""
+
+import pytest
+
+from umbmid.catalog import scan_raw_dataset
+from umbmid.synth import make_synth_dataset
+
+###############################################################################
+
+
+def test_regenerate_with_new_seed(tmp_path):
+    """A dataset is only replaced with overwrite=True, and cleanly"""
+
+    data_dir = str(tmp_path / 'synth')
+    make_synth_dataset(data_dir, gen='one', n_sessions=2, n_freqs=11,
+                       n_ant_pos=8, rand_seed=0)
+
+    with pytest.raises(AssertionError):
+        make_synth_dataset(data_dir, gen='one', n_sessions=2, n_freqs=11,
+                           n_ant_pos=8, rand_seed=1)
+
+    metadata = make_synth_dataset(data_dir, gen='one', n_sessions=2,
+                                  n_freqs=11, n_ant_pos=8, rand_seed=1,
+                                  overwrite=True)
+
+    # No files of the first dataset are left (ex: both a faW and a foC
+    # file for the same expt)
+    catalog = scan_raw_dataset(gen='one', data_dir=data_dir)
+    assert len(catalog['expts']) == len(metadata)
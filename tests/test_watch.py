@@ -0,0 +1,65 @@
+"""
+Tyson Reimer
+University of Manitoba
+October 19th, 2026
+"""
+
+import os
+import shutil
+
+import numpy as np
+
+from umbmid.synth import make_synth_dataset
+from umbmid.watch import SessionWatcher
+
+###############################################################################
+
+
+def _poll_n(watcher, n_polls):
+    """Polls the watcher n_polls times, returns the num appended"""
+    return sum(watcher.poll() for _ in range(n_polls))
+
+
+def test_partial_metadata_csv(tmp_path):
+    """A partly written -metadata.csv is retried, not raised"""
+
+    metadata = make_synth_dataset(str(tmp_path / 'synth'), gen='one',
+                                  n_sessions=1, n_freqs=11, n_ant_pos=8)
+
+    session = metadata[0]['date']
+    src_dir = tmp_path / 'synth' / 'gen-one' / 'raw' / session
+    session_dir = tmp_path / 'watched' / session
+    os.makedirs(session_dir)
+
+    # Land every .txt file, but only part of the -metadata.csv file,
+    # ending partway through a row
+    for fname in os.listdir(src_dir):
+        if fname.endswith('.txt'):
+            shutil.copy(src_dir / fname, session_dir / fname)
+
+    md_fname = '%s-metadata.csv' % session
+    with open(src_dir / md_fname, 'r') as handle:
+        full_md = handle.read()
+    with open(session_dir / md_fname, 'w') as handle:
+        handle.write(full_md[:full_md.index('\n', 200) - 10])
+
+    watcher = SessionWatcher(str(session_dir), str(tmp_path / 'store'),
+                             settle_time=0.0)
+
+    assert _poll_n(watcher, 3) == 0
+
+    # Finish writing the -metadata.csv file
+    with open(session_dir / md_fname, 'w') as handle:
+        handle.write(full_md)
+
+    n_appended = _poll_n(watcher, 3)
+
+    # The expts kept by umbmid.build.calibrate_fd_dataset(prune=True)
+    kept_ids = [md['id'] for md in metadata
+                if 'F' in md['phant_id'] and not np.isnan(md['emp_ref_id'])]
+
+    assert n_appended == len(kept_ids)
+
+    cal_data, cal_mds = watcher.store.load_parts(watcher.name)
+    assert [md['id'] for md in cal_mds] == kept_ids
+    assert np.shape(cal_data) == (len(kept_ids), 1, 11, 8)
@@ -6,6 +6,9 @@ July 26th, 2019
 
 import os
 import sys
+import time
+import queue
+import atexit
 import logging
 import logging.handlers
 from socket import gethostname
@@ -36,6 +39,14 @@ null_logger = NullLogger()
 
 ###############################################################################
 
+# The dataset root directory, if set explicitly via set_data_dir()
+__data_dir = None
+
+# The queue listener of each script logger, by logger name
+__log_listeners = dict()
+
+###############################################################################
+
 
 def get_proj_path():
     """Returns the path to the project-level directory.
@@ -50,6 +61,46 @@ def get_proj_path():
     return proj_path
 
 
+def get_data_dir():
+    """Returns the path to the dataset root directory.
+
+    The dataset root is, in order of priority: the path set via
+    set_data_dir(), the path in the UMBMID_DATA_DIR environment
+    variable, or the datasets/ folder in the project directory.
+
+    Returns
+    -------
+    data_dir : str
+        The str for the dataset root directory
+    """
+
+    if __data_dir is not None:  # If the root was set explicitly
+        data_dir = __data_dir
+
+    elif os.environ.get('UMBMID_DATA_DIR', ''):  # If set in the env
+        data_dir = os.environ['UMBMID_DATA_DIR']
+
+    else:  # If not configured, use the project datasets/ folder
+        data_dir = os.path.join(get_proj_path(), 'datasets')
+
+    return os.path.normpath(str(data_dir))
+
+
+def set_data_dir(data_dir):
+    """Sets the path to the dataset root directory.
+
+    Parameters
+    ----------
+    data_dir : str
+        The dataset root directory (or .zip/.tar.gz archive of it), if
+        None, the root is reset to the UMBMID_DATA_DIR environment
+        variable or the default location
+    """
+
+    global __data_dir
+    __data_dir = data_dir
+
+
 def verify_path(path):
     """If path exists, do nothing, else make it exist.
 
@@ -68,7 +119,29 @@ def verify_path(path):
         pass  # Do nothing
 
 
-def get_script_logger(script_path, level=logging.DEBUG):
+class _LocalQueueHandler(logging.handlers.QueueHandler):
+    """Queue handler that leaves the formatting to the listener thread
+
+    The base QueueHandler formats each record before putting it on the
+    queue, so that it can be sent to other processes; the script
+    loggers only use in-process queues, so the records are put on the
+    queue as-is, and formatted by the listener thread.
+    """
+
+    def prepare(self, record):
+        return record
+
+
+def _stop_log_listeners():
+    """Stops the queue listeners, writing any queued log records"""
+
+    for listener in __log_listeners.values():
+        listener.stop()
+
+    __log_listeners.clear()
+
+
+def get_script_logger(script_path, level=logging.DEBUG, use_queue=True):
     """
 
     Parameters
@@ -77,6 +150,11 @@ def get_script_logger(script_path, level=logging.DEBUG):
         Path to the script that will use the logger
     level :
         Logging level (DEBUG, INFO, WARNING, ERROR, CRITICAL)
+    use_queue : bool
+        If True, the logger only puts each record on a queue, and the
+        records are formatted and written to the .log file and stdout
+        by a background thread, so that logging does not block the
+        calling code on file/console writes
 
     Returns
     -------
@@ -122,11 +200,131 @@ def get_script_logger(script_path, level=logging.DEBUG):
 
     # required if you don't want to exit the shell between 2 executions
     del (logger.handlers[:])
+    if script_name in __log_listeners:
+        __log_listeners.pop(script_name).stop()
 
     logger.setLevel(level)
-    logger.addHandler(file_handler)
-    logger.addHandler(stdout_handler)
+
+    if use_queue:  # If writing the records in a background thread
+
+        log_queue = queue.SimpleQueue()
+
+        # The listener formats and writes each record on the queue
+        listener = logging.handlers.QueueListener(log_queue, file_handler,
+                                                  stdout_handler)
+        listener.start()
+        __log_listeners[script_name] = listener
+
+        logger.addHandler(_LocalQueueHandler(log_queue))
+
+    else:  # If writing each record in the calling thread
+        logger.addHandler(file_handler)
+        logger.addHandler(stdout_handler)
 
     logger.info("UM-BMID Logger initialized in host [%s]." % (gethostname()))
 
     return logger
+
+
+# Write any queued log records when the interpreter exits
+atexit.register(_stop_log_listeners)
+
+###############################################################################
+
+
+class ProgressReporter:
+    """Rate-limited progress reporting for loops over many items
+
+    Rather than logging a line for every item, a line with the num of
+    items done, the rate (items/s) and the estimated time remaining is
+    logged every every_n items or every every_s seconds, whichever
+    comes first. If the logger is null_logger, update() does nothing.
+    """
+
+    def __init__(self, logger, n_total=None, desc='Progress', every_n=None,
+                 every_s=10.0):
+        """Init class ProgressReporter
+
+        Parameters
+        ----------
+        logger :
+            Logger for logging the progress
+        n_total : int
+            The total num of items, if known, used for the ETA
+        desc : str
+            Description of the items, at the start of each line
+        every_n : int
+            Log a line at least every every_n items, if None, only
+            every every_s seconds
+        every_s : float
+            Log a line at least every every_s seconds
+        """
+
+        self._logger = logger
+        self._enabled = logger is not null_logger
+        self.n_total = n_total
+        self.desc = desc
+        self.every_n = every_n
+        self.every_s = every_s
+
+        self.n_done = 0
+        self._start_time = time.monotonic()
+        self._last_time = self._start_time
+        self._last_n = 0
+
+    def update(self, n_items=1):
+        """Marks n_items as done, logging a line if one is due
+
+        Parameters
+        ----------
+        n_items : int
+            The num of items done since the last update
+        """
+
+        self.n_done += n_items
+
+        if not self._enabled:  # If not logging, do nothing else
+            return
+
+        now = time.monotonic()
+
+        # If a line is due, by num of items or by time
+        if ((self.every_n is not None
+             and self.n_done - self._last_n >= self.every_n)
+                or now - self._last_time >= self.every_s):
+            self._log(now)
+
+    def _log(self, now):
+        """Logs the progress, rate, and ETA"""
+
+        elapsed = now - self._start_time
+        rate = self.n_done / elapsed if elapsed > 0 else float('inf')
+
+        if self.n_total:  # If the total is known, report the ETA
+
+            eta = (self.n_total - self.n_done) / rate if rate > 0 \
+                else float('inf')
+
+            self._logger.info('%s: [%d / %d] (%.1f%%), %.1f items/s, '
+                              'ETA %.1f s', self.desc, self.n_done,
+                              self.n_total, 100 * self.n_done / self.n_total,
+                              rate, eta)
+
+        else:  # If the total is unknown
+            self._logger.info('%s: [%d], %.1f items/s', self.desc,
+                              self.n_done, rate)
+
+        self._last_time = now
+        self._last_n = self.n_done
+
+    def close(self):
+        """Logs the final num of items done and the total time"""
+
+        if self._enabled:
+
+            elapsed = time.monotonic() - self._start_time
+
+            self._logger.info('%s: done [%d] in %.1f s (%.1f items/s)',
+                              self.desc, self.n_done, elapsed,
+                              self.n_done / elapsed if elapsed > 0 else 0.0)
+
@@ -0,0 +1,340 @@
+"""
+Tyson Reimer
+University of Manitoba
+October 19th, 2026
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import numpy as np
+
+from umbmid import null_logger, verify_path
+from umbmid.loadsave import load_pickle
+from umbmid.profiling import profile_stage
+from umbmid.ai.preprocessing import extract_td_features
+
+###############################################################################
+
+# The name of the index file of a feature store
+__INDEX_NAME = '_index.sqlite'
+
+###############################################################################
+
+
+def _get_index_path(root):
+    """Returns the path to the index file of a feature store"""
+    return os.path.join(root, __INDEX_NAME)
+
+
+def get_array_fingerprint(arr, chunk_size=64):
+    """Returns the hex digest of the shape, dtype and contents of arr
+
+    Parameters
+    ----------
+    arr : array_like
+        The array (ex: the frequency-domain data of a dataset)
+    chunk_size : int
+        The num of samples (along the 0th axis) hashed at once
+
+    Returns
+    -------
+    fingerprint : str
+        The hex digest of the array
+    """
+
+    arr_hash = hashlib.blake2b(digest_size=16)
+
+    arr_hash.update(('%s|%s' % (np.shape(arr), np.dtype(arr.dtype).str))
+                    .encode())
+
+    # Hash the contents in chunks, so that a memory-mapped array is
+    # not read into memory all at once
+    for start in range(0, max(np.size(arr, axis=0), 1), chunk_size):
+        arr_hash.update(np.ascontiguousarray(arr[start:start + chunk_size]))
+
+    return arr_hash.hexdigest()
+
+
+def get_file_fingerprint(path):
+    """Returns the hex digest of the path, size and mtime of a file
+
+    Much faster than hashing the contents of the file, and changes if
+    the file is modified or replaced.
+
+    Parameters
+    ----------
+    path : str
+        The path to the file (ex: a clean .pickle file)
+
+    Returns
+    -------
+    fingerprint : str
+        The hex digest of the file
+    """
+
+    stat = os.stat(path)
+
+    file_hash = hashlib.blake2b(digest_size=16)
+    file_hash.update(('%s|%d|%d' % (os.path.abspath(path), stat.st_size,
+                                    stat.st_mtime_ns)).encode())
+
+    return file_hash.hexdigest()
+
+
+def make_feature_key(fingerprint, **params):
+    """Returns the key of the features of a source with params
+
+    Parameters
+    ----------
+    fingerprint : str
+        The fingerprint of the source dataset (see
+        get_array_fingerprint() and get_file_fingerprint())
+    params :
+        The JSON-compatible params of the features (ex: transform,
+        window, normalize, dtype)
+
+    Returns
+    -------
+    key : str
+        The hex digest of the fingerprint and params
+    """
+
+    key_hash = hashlib.blake2b(digest_size=16)
+    key_hash.update(fingerprint.encode())
+    key_hash.update(json.dumps(params, sort_keys=True).encode())
+
+    return key_hash.hexdigest()
+
+
+###############################################################################
+
+
+class FeatureStore:
+    """Size-bounded on-disk cache of derived feature arrays
+
+    Each feature array is stored as its own .npy file, named by its key
+    (see make_feature_key()), so that it can be memory-mapped when
+    loaded. The size, params and time of last use of each array are
+    recorded in a SQLite index, and the least-recently used arrays are
+    deleted when the total size of the store exceeds max_bytes.
+    """
+
+    def __init__(self, root, max_bytes=2**33):
+        """Init class FeatureStore
+
+        Parameters
+        ----------
+        root : str
+            The path to the store directory
+        max_bytes : int
+            The max total size of the arrays in the store, in bytes
+        """
+
+        self.root = root
+        self.max_bytes = max_bytes
+        verify_path(root)
+
+        self._execute('CREATE TABLE IF NOT EXISTS features ('
+                      'key TEXT PRIMARY KEY, params TEXT, '
+                      'n_bytes INTEGER, last_used REAL)')
+
+    def _execute(self, sql, args=()):
+        """Executes the SQL on the index of the store
+
+        Returns the fetched rows and the num of rows changed.
+        """
+
+        conn = sqlite3.connect(_get_index_path(self.root), timeout=60)
+
+        try:
+            cursor = conn.execute(sql, args)
+            rows = cursor.fetchall()
+            conn.commit()
+
+        finally:
+            conn.close()
+
+        return rows, cursor.rowcount
+
+    def _array_path(self, key):
+        """Returns the path to the .npy file of the array key"""
+        return os.path.join(self.root, '%s.npy' % key)
+
+    def get(self, key, mmap=True):
+        """Returns the array key from the store, or None if not stored
+
+        Parameters
+        ----------
+        key : str
+            The key of the array
+        mmap : bool
+            If True, the array is memory-mapped (read-only) instead of
+            being read into memory
+
+        Returns
+        -------
+        arr : array_like
+            The stored array, or None if it is not in the store
+        """
+
+        # Record the use of the array, for the LRU eviction
+        _, n_updated = self._execute('UPDATE features SET last_used = ? '
+                                     'WHERE key = ?', (time.time(), key))
+
+        if n_updated == 0 or not os.path.isfile(self._array_path(key)):
+            return None
+
+        return np.load(self._array_path(key), mmap_mode='r' if mmap else None)
+
+    def put(self, key, arr, params=None):
+        """Saves the array key to the store, evicting old arrays
+
+        Parameters
+        ----------
+        key : str
+            The key of the array
+        arr : array_like
+            The array to be saved
+        params : dict
+            The JSON-compatible params of the array, recorded in the
+            index for reference
+        """
+
+        path = self._array_path(key)
+
+        # Write to a temporary file and then move it into place, so
+        # that a partially-written array is never loaded
+        tmp_path = '%s.%d.tmp' % (path, os.getpid())
+        with open(tmp_path, 'wb') as handle:
+            np.save(handle, arr)
+        os.replace(tmp_path, path)
+
+        self._execute('INSERT OR REPLACE INTO features VALUES (?, ?, ?, ?)',
+                      (key, json.dumps(params, sort_keys=True),
+                       os.path.getsize(path), time.time()))
+
+        self.evict(keep_key=key)
+
+    def evict(self, keep_key=None):
+        """Deletes the least-recently used arrays, until within size
+
+        Parameters
+        ----------
+        keep_key : str
+            The key of an array that is never deleted (ex: the array
+            that was just saved)
+        """
+
+        entries, _ = self._execute('SELECT key, n_bytes FROM features '
+                                   'ORDER BY last_used')
+
+        total_bytes = sum(n_bytes for _, n_bytes in entries)
+
+        for key, n_bytes in entries:  # From the least-recently used
+
+            if total_bytes <= self.max_bytes:
+                break
+
+            if key == keep_key:
+                continue
+
+            self._execute('DELETE FROM features WHERE key = ?', (key,))
+
+            if os.path.isfile(self._array_path(key)):
+                os.remove(self._array_path(key))
+
+            total_bytes -= n_bytes
+
+    def get_total_bytes(self):
+        """Returns the total size of the arrays in the store, in bytes"""
+
+        rows, _ = self._execute('SELECT COALESCE(SUM(n_bytes), 0) '
+                                'FROM features')
+
+        return rows[0][0]
+
+
+###############################################################################
+
+
+def get_td_features(source, store, transform='ifft', window=(5, 40),
+                    normalize='max', dtype=np.float64, n_harmonics=None,
+                    logger=null_logger):
+    """Returns the time-domain features of a dataset, from the store
+
+    The features (see umbmid.ai.preprocessing.extract_td_features())
+    are keyed by the fingerprint of the source and the params of the
+    features. If they are in the store, they are memory-mapped from it
+    (and, if the source is a file, the source is not loaded at all),
+    otherwise they are extracted and saved to the store.
+
+    Parameters
+    ----------
+    source : str or array_like
+        The path to the .pickle or .npy file of the frequency-domain
+        data, or the data itself
+    store : FeatureStore
+        The feature store
+    transform : str
+        The transform to the time-domain, must be in ['ifft', 'iczt']
+    window : tuple
+        The (start, stop) indices of the time-domain window
+    normalize : str
+        If 'max', each sample is normalized to have unity maximum, if
+        'l2', to have unity L2 norm
+    dtype :
+        The dtype of the features
+    n_harmonics : int
+        If not None, the number of rotation-invariant harmonics kept at
+        each time-point (see
+        umbmid.ai.preprocessing.get_harmonic_features())
+    logger :
+        Logger for logging progress
+
+    Returns
+    -------
+    features : array_like
+        2D array of the feature vector of each sample
+    """
+
+    params = {'transform': transform, 'window': list(window),
+              'normalize': normalize, 'dtype': np.dtype(dtype).str}
+
+    # Only add n_harmonics to the params if used, so that the keys of
+    # the features stored without harmonics are unchanged
+    if n_harmonics is not None:
+        params['n_harmonics'] = n_harmonics
+
+    if isinstance(source, str):  # If the source is a file
+        fingerprint = get_file_fingerprint(source)
+    else:
+        fingerprint = get_array_fingerprint(source)
+
+    key = make_feature_key(fingerprint, **params)
+
+    features = store.get(key)
+
+    if features is not None:  # If the features were in the store
+        logger.debug('\tLoaded features %s from the feature store', key)
+        return features
+
+    logger.info('\tExtracting features %s...', key)
+
+    if isinstance(source, str):  # If the source is a file, load it
+
+        if source.endswith('.npy'):
+            source = np.load(source, mmap_mode='r')
+        else:
+            source = load_pickle(source)
+
+    with profile_stage('features'):
+        features = extract_td_features(source, transform=transform,
+                                       window=window, normalize=normalize,
+                                       dtype=dtype, n_harmonics=n_harmonics)
+
+    store.put(key, features, params={'source': fingerprint, **params})
+
+    return features
@@ -0,0 +1,439 @@
+"""
+Tyson Reimer
+University of Manitoba
+October 19th, 2026
+"""
+
+import os
+import time
+import shutil
+import sqlite3
+import tempfile
+import itertools
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from umbmid import null_logger, ProgressReporter
+from umbmid.ai.logreg import LogisticRegression
+from umbmid.ai.stats import get_roc_auc
+
+###############################################################################
+
+# The params of each config of a grid search, and their SQLite types
+__CONFIG_COLS = [
+    ('win_start', 'INTEGER'),
+    ('win_stop', 'INTEGER'),
+    ('normalize', 'TEXT'),
+    ('learn_rate', 'REAL'),
+    ('reg_strength', 'REAL'),
+    ('max_iter', 'INTEGER'),
+    ('rand_seed', 'INTEGER'),
+]
+
+# The results of each config of a grid search, and their SQLite types
+__RESULT_COLS = [
+    ('fit_auc', 'REAL'),
+    ('fit_acc', 'REAL'),
+    ('val_auc', 'REAL'),
+    ('val_acc', 'REAL'),
+    ('fit_s', 'REAL'),
+]
+
+# The arrays loaded by each worker process, see _init_worker()
+__worker_data = dict()
+
+###############################################################################
+
+
+def make_param_grid(windows=((5, 40),), normalizations=('max',),
+                    learn_rates=(1.0,), reg_strengths=(0.0,),
+                    max_iters=(10000,), rand_seed=0):
+    """Makes the configs of every combination of the params
+
+    Parameters
+    ----------
+    windows : list
+        The (start, stop) indices of each time-domain window
+    normalizations : list
+        The normalization of the samples, each in ['max', 'l2', None]
+    learn_rates : list
+        The learning rates for gradient descent
+    reg_strengths : list
+        The strengths of the L2 regularization
+    max_iters : list
+        The numbers of iterations of gradient descent
+    rand_seed : int
+        The seed of the random init of the model params of each config
+
+    Returns
+    -------
+    param_grid : list
+        The dict of the params of each config
+    """
+
+    param_grid = []
+
+    for ((win_start, win_stop), normalize, learn_rate, reg_strength,
+         max_iter) in itertools.product(windows, normalizations, learn_rates,
+                                        reg_strengths, max_iters):
+
+        assert 0 <= win_start < win_stop, \
+            'Error: window (%d, %d) is invalid' % (win_start, win_stop)
+
+        param_grid.append({
+            'win_start': int(win_start),
+            'win_stop': int(win_stop),
+            'normalize': normalize,
+            'learn_rate': float(learn_rate),
+            'reg_strength': float(reg_strength),
+            'max_iter': int(max_iter),
+            'rand_seed': int(rand_seed),
+        })
+
+    return param_grid
+
+
+def sample_param_grid(param_grid, n_configs, rand_seed=0):
+    """Randomly samples configs from a grid, for a random search
+
+    Parameters
+    ----------
+    param_grid : list
+        The configs from make_param_grid()
+    n_configs : int
+        The number of configs to sample
+    rand_seed : int
+        The seed used for sampling
+
+    Returns
+    -------
+    sampled_grid : list
+        The sampled configs, in their order in param_grid
+    """
+
+    rng = np.random.default_rng(rand_seed)
+
+    config_idxs = rng.choice(len(param_grid),
+                             size=min(n_configs, len(param_grid)),
+                             replace=False)
+
+    return [param_grid[idx] for idx in np.sort(config_idxs)]
+
+
+###############################################################################
+
+
+def _prepare_td_data(fd_data, n_time_pts, chunk_size=64):
+    """Converts the data to the time-domain once, for all windows
+
+    Returns the magnitude of the IDFT of each sample in the first
+    n_time_pts time-points, the max over the antenna positions at each
+    time-point, and the cumulative sum over time of the sum of squares
+    at each time-point, so that the max and L2 norm of any window of
+    each sample are found by slicing.
+    """
+
+    n_samples, _, n_ant_pos = np.shape(fd_data)
+
+    td_mags = np.empty([n_samples, n_time_pts, n_ant_pos])
+
+    for start in range(0, n_samples, chunk_size):  # For each chunk
+        td_mags[start:start + chunk_size] = \
+            np.abs(np.fft.ifft(np.asarray(fd_data[start:start + chunk_size]),
+                               axis=1)[:, :n_time_pts, :])
+
+    # The max at each time-point, over the antenna positions
+    time_maxes = np.max(td_mags, axis=2)
+
+    # The cumulative sum of squares, with a leading zero so that the
+    # sum of squares of [start:stop] is cum_sq[stop] - cum_sq[start]
+    cum_sq = np.zeros([n_samples, n_time_pts + 1])
+    cum_sq[:, 1:] = np.cumsum(np.sum(td_mags ** 2, axis=2), axis=1)
+
+    return td_mags, time_maxes, cum_sq
+
+
+def _get_window_features(td_mags, time_maxes, cum_sq, config):
+    """Returns the features of the window and normalization of config"""
+
+    win_start, win_stop = config['win_start'], config['win_stop']
+
+    # Slice the window from the time-domain data
+    features = td_mags[:, win_start:win_stop, :]
+
+    if config['normalize'] == 'max':  # Normalize to unity max
+        norms = np.max(time_maxes[:, win_start:win_stop], axis=1)
+
+    elif config['normalize'] == 'l2':  # Normalize to unity L2 norm
+        norms = np.sqrt(cum_sq[:, win_stop] - cum_sq[:, win_start])
+
+    else:  # If not normalizing
+        norms = np.ones(np.size(features, axis=0))
+
+    # Normalize, and flatten each sample to a 1D feature vector
+    features = np.reshape(features / norms[:, None, None],
+                          [np.size(features, axis=0), -1])
+
+    return features
+
+
+def _init_worker(data_dir):
+    """Memory-maps the arrays of a grid search in a worker process"""
+
+    for fname in os.listdir(data_dir):
+        __worker_data[os.path.splitext(fname)[0]] = \
+            np.load(os.path.join(data_dir, fname), mmap_mode='r')
+
+
+def _fit_config(config):
+    """Fits and evaluates the model of one config, in a worker process
+
+    Returns the config with its results.
+    """
+
+    features = dict()
+
+    for split in ['fit', 'val']:  # Get the features of each split
+        features[split] = _get_window_features(
+            __worker_data['%s_td_mags' % split],
+            __worker_data['%s_time_maxes' % split],
+            __worker_data['%s_cum_sq' % split], config)
+
+    # Set the seed of the random init of the model params
+    np.random.seed(config['rand_seed'])
+    model = LogisticRegression(n_features=np.size(features['fit'], axis=1))
+
+    start_time = time.perf_counter()
+    model.fit(features['fit'], np.asarray(__worker_data['fit_labels']),
+              learn_rate=config['learn_rate'], max_iter=config['max_iter'],
+              reg_strength=config['reg_strength'])
+    fit_time = time.perf_counter() - start_time
+
+    result = dict(config)
+
+    for split in ['fit', 'val']:  # Evaluate on each split
+
+        labels = np.asarray(__worker_data['%s_labels' % split])
+        preds = model.predict_proba(features[split])
+
+        result['%s_auc' % split] = get_roc_auc(labels, preds)
+        result['%s_acc' % split] = float(np.mean((preds >= 0.5) == labels))
+
+    result['fit_s'] = fit_time
+
+    return result
+
+
+###############################################################################
+
+
+def _connect_results(results_path):
+    """Returns a connection to the results table, creating it"""
+
+    conn = sqlite3.connect(results_path, timeout=60)
+
+    conn.execute('CREATE TABLE IF NOT EXISTS results ('
+                 'search TEXT, %s, finished REAL)'
+                 % ', '.join('%s %s' % col
+                             for col in __CONFIG_COLS + __RESULT_COLS))
+
+    return conn
+
+
+def _get_done_configs(conn, search_name):
+    """Returns the param tuples of the configs done in a search"""
+
+    rows = conn.execute('SELECT %s FROM results WHERE search = ?'
+                        % ', '.join(col for col, _ in __CONFIG_COLS),
+                        (search_name,)).fetchall()
+
+    return set(rows)
+
+
+def _save_result(conn, search_name, result):
+    """Saves the result of one config to the results table"""
+
+    cols = [col for col, _ in __CONFIG_COLS + __RESULT_COLS]
+
+    conn.execute('INSERT INTO results VALUES (?, %s, ?)'
+                 % ', '.join('?' for _ in cols),
+                 [search_name] + [result[col] for col in cols]
+                 + [time.time()])
+    conn.commit()
+
+
+def run_grid_search(fit_data, fit_labels, val_data, val_labels, param_grid,
+                    results_path, search_name='grid', resume=True,
+                    n_workers=None, work_dir=None, logger=null_logger):
+    """Fits and evaluates a logistic regression model for each config
+
+    The frequency-domain data is converted to the time-domain once,
+    and the features of each window and normalization are sliced from
+    it (see _prepare_td_data()). The models are fit in a pool of worker
+    processes, which memory-map the time-domain data, and the result of
+    each config is saved to the results table as soon as it is done.
+
+    Parameters
+    ----------
+    fit_data : array_like
+        The frequency-domain data of the samples used to fit the models
+    fit_labels : array_like
+        The binary class labels of the fit samples
+    val_data : array_like
+        The frequency-domain data of the samples used to evaluate the
+        models
+    val_labels : array_like
+        The binary class labels of the validation samples
+    param_grid : list
+        The configs, from make_param_grid() or sample_param_grid()
+    results_path : str
+        The path to the SQLite file of the results table
+    search_name : str
+        The name of this search in the results table
+    resume : bool
+        If True, the configs that are already in the results table for
+        this search_name are skipped
+    n_workers : int
+        The number of worker processes, if None, uses the number of
+        CPUs, if 0, fits the models in this process
+    work_dir : str
+        The dir in which the time-domain data is saved for the workers,
+        if None, uses a temporary dir
+    logger :
+        Logger for logging progress
+
+    Returns
+    -------
+    results : list
+        The dict of the params and results of each config that was run
+    """
+
+    conn = _connect_results(results_path)
+
+    try:
+
+        if resume:  # Skip the configs that are done
+            done = _get_done_configs(conn, search_name)
+            param_grid = [config for config in param_grid
+                          if tuple(config[col] for col, _ in __CONFIG_COLS)
+                          not in done]
+
+        logger.info('\tRunning %d configs of search %s...',
+                    len(param_grid), search_name)
+
+        if len(param_grid) == 0:  # If no configs to run
+            return []
+
+        # Convert to the time-domain once, up to the last window stop
+        n_time_pts = max(config['win_stop'] for config in param_grid)
+
+        tmp_dir = tempfile.mkdtemp(prefix='umbmid-gridsearch-', dir=work_dir)
+
+        try:
+
+            for split, fd_data, labels in [('fit', fit_data, fit_labels),
+                                           ('val', val_data, val_labels)]:
+
+                td_mags, time_maxes, cum_sq = _prepare_td_data(fd_data,
+                                                               n_time_pts)
+
+                np.save(os.path.join(tmp_dir, '%s_td_mags.npy' % split),
+                        td_mags)
+                np.save(os.path.join(tmp_dir, '%s_time_maxes.npy' % split),
+                        time_maxes)
+                np.save(os.path.join(tmp_dir, '%s_cum_sq.npy' % split),
+                        cum_sq)
+                np.save(os.path.join(tmp_dir, '%s_labels.npy' % split),
+                        np.asarray(labels))
+
+            if n_workers is None:  # If no num of workers, use one per CPU
+                n_workers = os.cpu_count() or 1
+
+            progress = ProgressReporter(logger, n_total=len(param_grid),
+                                        desc='\tGrid search %s' % search_name)
+
+            results = []
+
+            if n_workers == 0:  # If fitting in this process
+
+                _init_worker(tmp_dir)
+
+                for config in param_grid:
+                    results.append(_fit_config(config))
+                    _save_result(conn, search_name, results[-1])
+                    progress.update()
+
+            else:  # If fitting in a pool of worker processes
+
+                with ProcessPoolExecutor(max_workers=n_workers,
+                                         initializer=_init_worker,
+                                         initargs=(tmp_dir,)) as pool:
+
+                    futures = [pool.submit(_fit_config, config)
+                               for config in param_grid]
+
+                    for future in as_completed(futures):
+                        results.append(future.result())
+                        _save_result(conn, search_name, results[-1])
+                        progress.update()
+
+            progress.close()
+
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    finally:
+        conn.close()
+
+    return results
+
+
+def load_grid_results(results_path, search_name=None, order_by='val_auc',
+                      limit=None):
+    """Loads the results of grid searches, best first
+
+    Parameters
+    ----------
+    results_path : str
+        The path to the SQLite file of the results table
+    search_name : str
+        The name of the search, if None, loads the results of all
+        searches
+    order_by : str
+        The result by which the configs are sorted, in descending order
+    limit : int
+        The max number of configs to load, if None, loads all
+
+    Returns
+    -------
+    results : list
+        The dict of the search, params and results of each config
+    """
+
+    assert order_by in [col for col, _ in __CONFIG_COLS + __RESULT_COLS], \
+        'Error: order_by was %s, invalid value' % order_by
+
+    conn = _connect_results(results_path)
+
+    try:
+
+        conn.row_factory = sqlite3.Row
+
+        query = 'SELECT * FROM results'
+        args = []
+
+        if search_name is not None:
+            query += ' WHERE search = ?'
+            args.append(search_name)
+
+        query += ' ORDER BY %s DESC' % order_by
+
+        if limit is not None:
+            query += ' LIMIT %d' % limit
+
+        results = [dict(row) for row in conn.execute(query, args)]
+
+    finally:
+        conn.close()
+
+    return results
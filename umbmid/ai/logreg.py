@@ -4,15 +4,31 @@ University of Manitoba
 September 4th, 2019
 """
 
+import os
+import json
 import numpy as np
 
+from umbmid.profiling import profiled
+from umbmid.ai.preprocessing import extract_td_features, RandomizedPCA
+
+###############################################################################
+
+# The version of the saved model files, incremented when their format
+# changes
+__MODEL_VERSION = 1
+
 ###############################################################################
 
 
+def _get_model_version():
+    """Returns the version of the saved model files"""
+    return __MODEL_VERSION
+
+
 class LogisticRegression:
     """Logistic regression model for binary classification"""
 
-    def __init__(self, n_features):
+    def __init__(self, n_features, dtype=np.float64):
         """Init class LogisticRegression
 
         Parameters
@@ -20,28 +36,49 @@ class LogisticRegression:
         n_features : int
             The number of features that will be used when fitting the
             model
+        dtype :
+            The float dtype of the model parameters and of the features
+            used in computation, np.float64 or np.float32
         """
 
         self.n_features = n_features   # Set the number of features
+        self.dtype = np.dtype(dtype)  # Set the working dtype
 
         # Init the model parameters to small, random values
         # self.params = np.random.random([n_features + 1, ]) * 0.1 - 0.05
 
-        self.params = np.random.random([n_features + 1, ]) - 0.5
+        self.params = (np.random.random([n_features + 1, ])
+                       - 0.5).astype(self.dtype)
 
-    def _param_grad(self, features, labels, preds, n_samples):
+        # The decision threshold of the predicted scores (ex: from
+        # the training set)
+        self.threshold = 0.5
+
+        # The keyword arguments of
+        # umbmid.ai.preprocessing.extract_td_features() used to get the
+        # features from the frequency-domain data, and the projection
+        # applied to them, if any, for predict_fd_proba()
+        self.feature_config = None
+        self.pca = None
+
+    def _param_grad(self, features, labels, preds, n_samples,
+                    reg_strength=0.0):
         """Get the gradient of the cost func with respect to each param
 
         Parameters
         ----------
         features : array_like
-            The features for each sample used during training
+            The features for each sample used during training, with the
+            unity feature (see _reshape_features())
         labels : array_like
             Binary class labels (0s and 1s) for each sample
         preds : array_like
             The predicted probabilities for each sample
         n_samples : int
             The number of samples used during training
+        reg_strength : float
+            The strength of the L2 regularization of the params (not
+            applied to the bias param)
 
         Returns
         -------
@@ -49,16 +86,15 @@ class LogisticRegression:
             The gradient of the cost function with respect to each param
         """
 
-        features = self._reshape_features(features)  # Reshape features
-
         # Find the gradient with respect to each parameter
-        param_grad = (1 / n_samples) * np.sum((preds - labels)[:, None] *
-                                              features, axis=0)
+        param_grad = (1 / n_samples) * ((preds - labels) @ features)
+
+        if reg_strength > 0:  # Add the gradient of the L2 penalty
+            param_grad[:-1] += (reg_strength / n_samples) * self.params[:-1]
 
         return param_grad
 
-    @staticmethod
-    def _reshape_features(features):
+    def _reshape_features(self, features):
         """Reshapes features by concatenating unity feature
 
         Parameters
@@ -70,24 +106,29 @@ class LogisticRegression:
         -------
         features : array_like
             The features, with a vector of unity feature concatenated
-            at the end
+            at the end, in the working dtype
         """
 
         # Find the number of samples
         n_samples = np.size(features, axis=0)
 
         # Concatenate the unity feature vector
-        features = np.append(features, np.ones([n_samples, ])[:, None], axis=1)
+        features = np.append(np.asarray(features, dtype=self.dtype),
+                             np.ones([n_samples, 1], dtype=self.dtype),
+                             axis=1)
 
         return features
 
-    def predict_proba(self, features):
+    def predict_proba(self, features, out=None):
         """Predict the scores for each sample in the features arr
 
         Parameters
         ----------
         features : array_like
             The features for each sample
+        out : array_like
+            If not None, the array into which the scores are written,
+            so that no new arrays are allocated
 
         Returns
         -------
@@ -96,14 +137,152 @@ class LogisticRegression:
             in the features array
         """
 
-        # Reshape the features to concatenate unity feature vector
-        features = self._reshape_features(features)
+        features = np.asarray(features, dtype=self.dtype)
 
-        # Use the sigmoid function
-        prob_preds = 1 / (1 + np.exp(-features @ self.params))
+        # Add the bias param to the weighted features, rather than
+        # concatenating a unity feature vector
+        prob_preds = np.matmul(features, self.params[:-1], out=out)
+        prob_preds += self.params[-1]
+
+        # Use the sigmoid function, in place
+        np.negative(prob_preds, out=prob_preds)
+        np.exp(prob_preds, out=prob_preds)
+        prob_preds += 1
+        np.reciprocal(prob_preds, out=prob_preds)
 
         return prob_preds
 
+    def predict_fd_proba(self, fd_data, chunk_size=64, out=None):
+        """Predict the scores for each frequency-domain scan
+
+        The features of each scan are found with the feature_config
+        (and pca, if any) of the model, in chunks of chunk_size scans,
+        so that new sessions can be scored with a saved model.
+
+        Parameters
+        ----------
+        fd_data : array_like
+            3D array of the frequency-domain data of each scan,
+            [n_scans, n_freqs, n_ant_pos]; may be memory-mapped
+        chunk_size : int
+            The number of scans scored at once
+        out : array_like
+            If not None, the array into which the scores are written
+
+        Returns
+        -------
+        prob_preds : array_like
+            The predicted score of each scan
+        """
+
+        assert self.feature_config is not None, \
+            'Error: the model has no feature_config'
+
+        n_scans = np.size(fd_data, axis=0)
+
+        if out is None:  # If no output array, make it
+            out = np.empty([n_scans, ], dtype=self.dtype)
+
+        for start in range(0, n_scans, chunk_size):  # For each chunk
+
+            features = extract_td_features(fd_data[start:start + chunk_size],
+                                           dtype=self.dtype,
+                                           chunk_size=chunk_size,
+                                           **self.feature_config)
+
+            if self.pca is not None:  # If projecting the features
+                features = self.pca.transform(features)
+
+            self.predict_proba(features, out=out[start:start + chunk_size])
+
+        return out
+
+    def save(self, path):
+        """Saves the model to a .npz file and a .json file
+
+        The params (and projection, if any) are saved to the .npz file,
+        and the version, dtype, threshold and feature_config to a .json
+        file with the same name.
+
+        Parameters
+        ----------
+        path : str
+            The full path to the saved .npz file
+        """
+
+        arrays = {'params': self.params}
+
+        info = {
+            'version': _get_model_version(),
+            'n_features': int(self.n_features),
+            'dtype': self.dtype.str,
+            'threshold': float(self.threshold),
+            'feature_config': self.feature_config,
+            'pca': None,
+        }
+
+        if self.pca is not None:  # If projecting the features
+
+            arrays['pca_mean'] = self.pca.mean
+            arrays['pca_components'] = self.pca.components
+            arrays['pca_explained_variance'] = self.pca.explained_variance
+            arrays['pca_explained_variance_ratio'] = \
+                self.pca.explained_variance_ratio
+
+            info['pca'] = {'n_components': self.pca.n_components,
+                           'n_oversamples': self.pca.n_oversamples,
+                           'n_power_iter': self.pca.n_power_iter,
+                           'rand_seed': self.pca.rand_seed}
+
+        np.savez(path, **arrays)
+
+        with open('%s.json' % os.path.splitext(path)[0], 'w') as handle:
+            json.dump(info, handle, indent=2)
+
+    @classmethod
+    def load(cls, path):
+        """Loads a model from the .npz and .json files of save()
+
+        Parameters
+        ----------
+        path : str
+            The full path to the .npz file
+
+        Returns
+        -------
+        model : LogisticRegression
+            The loaded model
+        """
+
+        with open('%s.json' % os.path.splitext(path)[0], 'r') as handle:
+            info = json.load(handle)
+
+        assert info['version'] <= _get_model_version(), \
+            'Error: model version %d is newer than this code (version %d)' \
+            % (info['version'], _get_model_version())
+
+        model = cls(info['n_features'], dtype=np.dtype(info['dtype']))
+
+        model.threshold = info['threshold']
+        model.feature_config = info['feature_config']
+
+        with np.load(path) as saved:
+
+            model.params = saved['params']
+
+            if info['pca'] is not None:  # If projecting the features
+
+                model.pca = RandomizedPCA(
+                    dtype=saved['pca_components'].dtype, **info['pca'])
+                model.pca.mean = saved['pca_mean']
+                model.pca.components = saved['pca_components']
+                model.pca.explained_variance = \
+                    saved['pca_explained_variance']
+                model.pca.explained_variance_ratio = \
+                    saved['pca_explained_variance_ratio']
+
+        return model
+
     def predict_labels(self, features):
         """Predict the class labels for each sample in the features arr
 
@@ -125,7 +304,58 @@ class LogisticRegression:
 
         return label_preds
 
-    def fit(self, features, labels, learn_rate=0.01, max_iter=10000):
+    @profiled('fit')
+    def fit_batches(self, batches, learn_rate=0.01, reg_strength=0.0):
+        """Train (mini-batch grad descent) the model for one epoch
+
+        One step of gradient descent is taken for each mini-batch (ex:
+        from umbmid.ai.preprocessing.augment_batches()), so that the
+        full training set is never held in memory at once.
+
+        Parameters
+        ----------
+        batches :
+            Iterable of the (features, labels) of each mini-batch
+        learn_rate : float
+            The learning rate used for gradient descent
+        reg_strength : float
+            The strength of the L2 regularization of the params (not
+            applied to the bias param), 0 for no regularization
+
+        Returns
+        -------
+        cost : float
+            The mean value of the cost func over the mini-batches
+        """
+
+        costs = []  # Init list for storing the cost of each mini-batch
+
+        for features, labels in batches:  # For each mini-batch
+
+            n_samples = np.size(features, axis=0)
+
+            features = self._reshape_features(features)
+
+            # Predict the scores for each sample in the mini-batch
+            preds = 1 / (1 + np.exp(-features @ self.params))
+
+            # Prevent crashes by removing not-acceptable values
+            preds = np.clip(preds, 1e-5, 1 - 1e-5)
+
+            # Update the parameters using gradient descent
+            param_grad = self._param_grad(features, labels, preds, n_samples,
+                                          reg_strength=reg_strength)
+            self.params -= (learn_rate * param_grad).astype(self.dtype)
+
+            costs.append((1 / n_samples)
+                         * np.sum(-labels * np.log(preds)
+                                  - (1 - labels) * np.log(1 - preds)))
+
+        return float(np.mean(costs))
+
+    @profiled('fit')
+    def fit(self, features, labels, learn_rate=0.01, max_iter=10000,
+            reg_strength=0.0):
         """Train (grad descent) the model to learn the model parameters
 
         Parameters
@@ -139,11 +369,18 @@ class LogisticRegression:
         max_iter : int
             The maximum number of iterations before termination of the
             optimization routine
+        reg_strength : float
+            The strength of the L2 regularization of the params (not
+            applied to the bias param), 0 for no regularization
         """
 
         # Find the number of samples used for training
         n_samples = np.size(features, axis=0)
 
+        # Concatenate the unity feature once, rather than at every
+        # iteration
+        features = self._reshape_features(features)
+
         # Init stopping-criteria parameters
         cost_change = 1e9
         threshold = 1e-5
@@ -158,7 +395,7 @@ class LogisticRegression:
             n_iter += 1  # Increment iteration number counter
 
             # Predict the scores for each sample
-            preds = self.predict_proba(features)
+            preds = 1 / (1 + np.exp(-features @ self.params))
 
             # Prevent crashes by removing not-acceptable values
             preds[preds == 0] = 1e-5
@@ -166,14 +403,19 @@ class LogisticRegression:
 
             # Get the gradient of the cost function with respect to
             # each parameter
-            param_grad = self._param_grad(features, labels, preds, n_samples)
+            param_grad = self._param_grad(features, labels, preds, n_samples,
+                                          reg_strength=reg_strength)
 
             # Update the parameters using gradient descent
-            self.params -= learn_rate * param_grad
+            self.params -= (learn_rate * param_grad).astype(self.dtype)
 
             # Find the value of the cost function at this iteration
             cost = (1 / n_samples) * np.sum(-labels * np.log(preds)
                                             - (1 - labels) * np.log(1 - preds))
 
+            if reg_strength > 0:  # Add the L2 penalty to the cost
+                cost += ((reg_strength / (2 * n_samples))
+                         * np.sum(self.params[:-1] ** 2))
+
             # Store the cost function from this iteration
             costs.append(cost)
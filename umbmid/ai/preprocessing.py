@@ -6,6 +6,9 @@ July 30th, 2019
 
 import numpy as np
 
+from umbmid.profiling import profiled
+from umbmid.sigproc import iczt
+
 ###############################################################################
 
 
@@ -89,3 +92,483 @@ def normalize_samples(data):
                                              np.max(data[sample_idx, :, :]))
 
     return normalized_data
+
+
+def get_harmonic_features(td_data, n_harmonics=8):
+    """Returns the rotation-invariant harmonics of each time-point
+
+    The FFT of each time-point of each sample is taken across the
+    circle of antenna positions, and the magnitudes of the lowest
+    harmonics are kept. A rotation of the scan (a circular shift of
+    the antenna positions) only changes the phase of each harmonic,
+    and a mirroring of a real-valued scan only conjugates it, so the
+    magnitudes do not depend on where a tumor is relative to the first
+    antenna position.
+
+    Parameters
+    ----------
+    td_data : array_like
+        3D array of the time-domain data (ex: magnitudes) of each
+        sample, [n_samples, n_time_pts, n_ant_pos]
+    n_harmonics : int
+        The number of harmonics kept, including the 0th (the mean over
+        the antenna positions)
+
+    Returns
+    -------
+    harmonics : array_like
+        The magnitude of each harmonic at each time-point of each
+        sample, [n_samples, n_time_pts, n_harmonics]
+    """
+
+    assert len(np.shape(td_data)) == 3, 'Error: td_data must have 3 dim'
+
+    # Use the real FFT for real data, as its harmonics are symmetric
+    if np.iscomplexobj(td_data):
+        harmonics = np.fft.fft(td_data, axis=2)[:, :, :n_harmonics]
+    else:
+        harmonics = np.fft.rfft(td_data, axis=2)[:, :, :n_harmonics]
+
+    harmonics = np.abs(harmonics)
+
+    return harmonics
+
+
+def extract_td_features(fd_data, transform='ifft', window=(5, 40),
+                        normalize='max', dtype=np.float64, chunk_size=64,
+                        iczt_params=None, n_harmonics=None):
+    """Extracts the time-domain feature vector of each sample
+
+    Each sample is converted to the time-domain, the magnitude of the
+    time-domain signal is windowed in time, normalized, and flattened
+    to a 1D feature vector. The samples are converted in chunks of
+    chunk_size, to bound the memory used by the complex intermediates.
+    If n_harmonics, the rotation-invariant harmonics across the antenna
+    positions (see get_harmonic_features()) are used instead of the
+    magnitude at each antenna position.
+
+    Parameters
+    ----------
+    fd_data : array_like
+        3D array of the frequency-domain data of each sample, [n_samples,
+        n_freqs, n_ant_pos]
+    transform : str
+        The transform to the time-domain, must be in ['ifft', 'iczt']
+    window : tuple
+        The (start, stop) indices of the time-domain window
+    normalize : str
+        If 'max', each sample is normalized to have unity maximum, if
+        'l2', to have unity L2 norm, if None, the samples are not
+        normalized
+    dtype :
+        The dtype of the returned features
+    chunk_size : int
+        The number of samples converted at once
+    iczt_params : dict
+        The keyword arguments of umbmid.sigproc.iczt(), if using the
+        ICZT; if None, uses the 0-6 ns window of the 1-8 GHz scans with
+        1024 time-points
+    n_harmonics : int
+        If not None, the number of rotation-invariant harmonics kept at
+        each time-point
+
+    Returns
+    -------
+    features : array_like
+        2D array of the feature vector of each sample, [n_samples,
+        n_window_pts * n_ant_pos], or [n_samples, n_window_pts *
+        n_harmonics] if n_harmonics
+    """
+
+    assert transform in ['ifft', 'iczt'], \
+        "Error: transform must be in ['ifft', 'iczt']"
+    assert normalize in ['max', 'l2', None], \
+        "Error: normalize must be in ['max', 'l2', None]"
+    assert len(np.shape(fd_data)) == 3, 'Error: fd_data must have 3 dim'
+
+    if iczt_params is None:  # If no ICZT params, use the defaults
+        iczt_params = {'ini_t': 0, 'fin_t': 6e-9, 'n_time_pts': 1024,
+                       'ini_f': 1e9, 'fin_f': 8e9}
+
+    n_samples, _, n_ant_pos = np.shape(fd_data)
+    n_window_pts = window[1] - window[0]
+
+    # The num of features at each time-point
+    n_pt_features = n_ant_pos if n_harmonics is None else n_harmonics
+
+    # Init array to return
+    features = np.empty([n_samples, n_window_pts * n_pt_features],
+                        dtype=dtype)
+
+    for start in range(0, n_samples, chunk_size):  # For each chunk
+
+        chunk = np.asarray(fd_data[start:start + chunk_size])
+
+        # Convert the chunk to the time-domain
+        if transform == 'ifft':
+            td_chunk = np.fft.ifft(chunk, axis=1)
+        else:
+            td_chunk = iczt(chunk, **iczt_params)
+
+        # Take the abs-value of the time-domain window
+        td_chunk = np.abs(td_chunk[:, window[0]:window[1], :])
+
+        if normalize == 'max':  # Normalize each sample to unity max
+            td_chunk /= np.max(td_chunk, axis=(1, 2), keepdims=True)
+
+        elif normalize == 'l2':  # Normalize each sample to unity norm
+            td_chunk /= np.sqrt(np.sum(td_chunk ** 2, axis=(1, 2),
+                                       keepdims=True))
+
+        if n_harmonics is not None:  # Use the rotation-invariant harmonics
+            td_chunk = get_harmonic_features(td_chunk, n_harmonics)
+
+        # Flatten each sample to a 1D feature vector
+        features[start:start + chunk_size] = \
+            np.reshape(td_chunk, [np.size(td_chunk, axis=0), -1])
+
+    return features
+
+
+def get_rotation_idxs(n_ant_pos, shifts=None, mirror=False):
+    """Returns the antenna position indices of rotated scans
+
+    The antenna positions form a circle, so a scan rotated by shift
+    positions has the data of position (pos - shift) % n_ant_pos at
+    each position pos (as in np.roll()), and a mirrored scan has the
+    data of position (shift - pos) % n_ant_pos.
+
+    Parameters
+    ----------
+    n_ant_pos : int
+        The number of antenna positions in each scan
+    shifts : array_like
+        The rotations, in num of antenna positions, if None, uses every
+        rotation
+    mirror : bool
+        If True, the mirrored variant of each rotation is also included
+
+    Returns
+    -------
+    pos_idxs : array_like
+        The antenna position indices of each variant, [n_variants,
+        n_ant_pos], with the mirrored variants after the rotations
+    """
+
+    if shifts is None:  # If no shifts specified, use every rotation
+        shifts = np.arange(n_ant_pos)
+
+    shifts = np.asarray(shifts)[:, None]
+    ant_pos = np.arange(n_ant_pos)[None, :]
+
+    pos_idxs = (ant_pos - shifts) % n_ant_pos
+
+    if mirror:  # Include the mirrored variant of each rotation
+        pos_idxs = np.concatenate([pos_idxs, (shifts - ant_pos) % n_ant_pos])
+
+    return pos_idxs
+
+
+def augment_batches(data, labels, batch_size=64, shifts=None, mirror=True,
+                    shuffle=True, rand_seed=0, flatten=True):
+    """Yields mini-batches of rotated and mirrored samples
+
+    Each sample is augmented with its rotations (and their mirrors)
+    about the circle of antenna positions. The augmented dataset is
+    never made: each mini-batch is gathered from the samples with the
+    antenna position indices of its variants (see get_rotation_idxs()),
+    so that only one mini-batch is held in memory at once.
+
+    Parameters
+    ----------
+    data : array_like
+        3D array of the (time-domain) features of each sample,
+        [n_samples, n_time_pts, n_ant_pos]; may be memory-mapped
+    labels : array_like
+        The class label of each sample
+    batch_size : int
+        The number of augmented samples in each mini-batch
+    shifts : array_like
+        The rotations, in num of antenna positions, if None, uses every
+        rotation
+    mirror : bool
+        If True, the mirrored variants are also used
+    shuffle : bool
+        If True, the augmented samples are yielded in random order
+    rand_seed : int
+        The seed used for shuffling (ex: the epoch number)
+    flatten : bool
+        If True, each augmented sample is flattened to a 1D feature
+        vector
+
+    Yields
+    ------
+    batch_data : array_like
+        The features of each augmented sample in the mini-batch
+    batch_labels : array_like
+        The class label of each augmented sample in the mini-batch
+    """
+
+    assert len(np.shape(data)) == 3, 'Error: data must have 3 dim'
+
+    n_samples, _, n_ant_pos = np.shape(data)
+    labels = np.asarray(labels)
+
+    pos_idxs = get_rotation_idxs(n_ant_pos, shifts=shifts, mirror=mirror)
+    n_variants = np.size(pos_idxs, axis=0)
+
+    # The index of each augmented sample, as sample_idx * n_variants +
+    # variant_idx
+    aug_idxs = np.arange(n_samples * n_variants)
+
+    if shuffle:  # If shuffling, permute the augmented samples
+        aug_idxs = np.random.default_rng(rand_seed).permutation(aug_idxs)
+
+    for start in range(0, np.size(aug_idxs), batch_size):
+
+        sample_idxs, variant_idxs = np.divmod(aug_idxs[start:start
+                                                       + batch_size],
+                                              n_variants)
+
+        # Read the samples in order (faster for memory-mapped data),
+        # then gather the antenna positions of each variant
+        read_order = np.argsort(sample_idxs, kind='stable')
+        sample_idxs = sample_idxs[read_order]
+        variant_idxs = variant_idxs[read_order]
+
+        batch_data = np.take_along_axis(
+            np.asarray(data[sample_idxs]),
+            pos_idxs[variant_idxs][:, None, :], axis=2)
+
+        if flatten:  # Flatten each sample to a 1D feature vector
+            batch_data = np.reshape(batch_data, [len(sample_idxs), -1])
+
+        yield batch_data, labels[sample_idxs]
+
+
+###############################################################################
+
+
+class RandomizedPCA:
+    """Principal component analysis via a randomized SVD
+
+    The principal components of the (centered) features are found with
+    the randomized range finder of Halko et al., which only needs a few
+    passes over the features, each in chunks of samples, so that the
+    features can be larger than memory (ex: memory-mapped). The
+    projection of features onto the components is also done in chunks.
+    """
+
+    def __init__(self, n_components, n_oversamples=10, n_power_iter=4,
+                 rand_seed=0, dtype=np.float64):
+        """Init class RandomizedPCA
+
+        Parameters
+        ----------
+        n_components : int
+            The number of principal components to keep
+        n_oversamples : int
+            The number of extra random vectors used to find the range
+            of the features, which improves the accuracy
+        n_power_iter : int
+            The number of power iterations, which improves the accuracy
+            when the singular values decay slowly
+        rand_seed : int
+            The seed of the random vectors
+        dtype :
+            The float dtype of the components and transformed features
+        """
+
+        self.n_components = n_components
+        self.n_oversamples = n_oversamples
+        self.n_power_iter = n_power_iter
+        self.rand_seed = rand_seed
+        self.dtype = np.dtype(dtype)
+
+        self.mean = None  # The mean of each feature
+        self.components = None  # The components, [n_components, n_feats]
+        self.explained_variance = None  # The variance of each component
+        self.explained_variance_ratio = None  # Portion of total variance
+
+    @staticmethod
+    def _matmul(features, mean, mat, chunk_size):
+        """Returns (features - mean) @ mat, in chunks of samples"""
+
+        out = np.empty([np.size(features, axis=0), np.size(mat, axis=1)])
+
+        for start in range(0, np.size(features, axis=0), chunk_size):
+            out[start:start + chunk_size] = \
+                (np.asarray(features[start:start + chunk_size],
+                            dtype=np.float64) - mean) @ mat
+
+        return out
+
+    @staticmethod
+    def _rmatmul(features, mean, mat, chunk_size):
+        """Returns (features - mean).T @ mat, in chunks of samples"""
+
+        out = np.zeros([np.size(features, axis=1), np.size(mat, axis=1)])
+
+        for start in range(0, np.size(features, axis=0), chunk_size):
+            out += ((np.asarray(features[start:start + chunk_size],
+                                dtype=np.float64) - mean).T
+                    @ mat[start:start + chunk_size])
+
+        return out
+
+    @profiled('pca')
+    def fit(self, features, chunk_size=4096):
+        """Finds the principal components of the features
+
+        Parameters
+        ----------
+        features : array_like
+            2D array of the feature vector of each sample
+        chunk_size : int
+            The number of samples used at once
+        """
+
+        n_samples, n_features = np.shape(features)
+
+        # The num of random vectors, at most the rank of the features
+        n_rand = min(self.n_components + self.n_oversamples, n_samples,
+                     n_features)
+
+        assert self.n_components <= n_rand, \
+            'Error: n_components must be <= min(n_samples, n_features)'
+
+        # Find the mean and total variance of each feature
+        self.mean = np.zeros([n_features, ])
+        for start in range(0, n_samples, chunk_size):
+            self.mean += np.sum(features[start:start + chunk_size], axis=0,
+                                dtype=np.float64)
+        self.mean /= n_samples
+
+        total_var = 0.0
+        for start in range(0, n_samples, chunk_size):
+            total_var += np.sum((np.asarray(features[start:start + chunk_size],
+                                            dtype=np.float64)
+                                 - self.mean) ** 2)
+        total_var /= max(n_samples - 1, 1)
+
+        rng = np.random.default_rng(self.rand_seed)
+
+        # Find an orthonormal basis of the range of the features, from
+        # the features times random vectors
+        basis, _ = np.linalg.qr(
+            self._matmul(features, self.mean,
+                         rng.standard_normal([n_features, n_rand]),
+                         chunk_size))
+
+        for _ in range(self.n_power_iter):  # For each power iteration
+
+            # Re-orthonormalize after each product, for stability
+            row_basis, _ = np.linalg.qr(
+                self._rmatmul(features, self.mean, basis, chunk_size))
+            basis, _ = np.linalg.qr(
+                self._matmul(features, self.mean, row_basis, chunk_size))
+
+        # Project the features onto the basis, and find the SVD of the
+        # (small) projected features
+        _, sing_vals, comps = np.linalg.svd(
+            self._rmatmul(features, self.mean, basis, chunk_size).T,
+            full_matrices=False)
+
+        self.components = comps[:self.n_components].astype(self.dtype)
+        self.explained_variance = (sing_vals[:self.n_components] ** 2
+                                   / max(n_samples - 1, 1))
+        self.explained_variance_ratio = self.explained_variance / total_var
+
+        return self
+
+    def transform(self, features, chunk_size=4096, out=None):
+        """Projects the features onto the principal components
+
+        Parameters
+        ----------
+        features : array_like
+            2D array of the feature vector of each sample
+        chunk_size : int
+            The number of samples projected at once
+        out : array_like
+            If not None, the array (ex: memory-mapped) into which the
+            projected features are written, [n_samples, n_components]
+
+        Returns
+        -------
+        reduced : array_like
+            The projected features, [n_samples, n_components]
+        """
+
+        assert self.components is not None, 'Error: PCA must be fit first'
+
+        n_samples = np.size(features, axis=0)
+
+        if out is None:  # If no output array, make it
+            out = np.empty([n_samples, self.n_components], dtype=self.dtype)
+
+        mean = self.mean.astype(self.dtype)
+
+        for start in range(0, n_samples, chunk_size):  # For each chunk
+            out[start:start + chunk_size] = \
+                ((np.asarray(features[start:start + chunk_size],
+                             dtype=self.dtype) - mean)
+                 @ self.components.T)
+
+        return out
+
+    def fit_transform(self, features, chunk_size=4096):
+        """Finds the principal components and projects the features
+
+        See fit() and transform().
+        """
+        return self.fit(features, chunk_size=chunk_size).transform(
+            features, chunk_size=chunk_size)
+
+    def save(self, path):
+        """Saves the fitted projection to a .npz file
+
+        Parameters
+        ----------
+        path : str
+            The full path to the saved .npz file
+        """
+
+        assert self.components is not None, 'Error: PCA must be fit first'
+
+        np.savez(path, mean=self.mean, components=self.components,
+                 explained_variance=self.explained_variance,
+                 explained_variance_ratio=self.explained_variance_ratio,
+                 params=np.array([self.n_components, self.n_oversamples,
+                                  self.n_power_iter, self.rand_seed]))
+
+    @classmethod
+    def load(cls, path):
+        """Loads a fitted projection from a .npz file
+
+        Parameters
+        ----------
+        path : str
+            The full path to the .npz file, from save()
+
+        Returns
+        -------
+        pca : RandomizedPCA
+            The loaded projection
+        """
+
+        with np.load(path) as saved:
+
+            n_components, n_oversamples, n_power_iter, rand_seed = \
+                saved['params'].tolist()
+
+            pca = cls(n_components, n_oversamples=n_oversamples,
+                      n_power_iter=n_power_iter, rand_seed=rand_seed,
+                      dtype=saved['components'].dtype)
+
+            pca.mean = saved['mean']
+            pca.components = saved['components']
+            pca.explained_variance = saved['explained_variance']
+            pca.explained_variance_ratio = saved['explained_variance_ratio']
+
+        return pca
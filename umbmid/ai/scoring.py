@@ -0,0 +1,592 @@
+"""
+Tyson Reimer
+University of Manitoba
+October 19th, 2026
+"""
+
+import os
+import io
+import json
+import time
+import queue
+import threading
+import collections
+import urllib.request
+from concurrent.futures import Future
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import numpy as np
+
+from umbmid import null_logger
+from umbmid.loadsave import load_fd_data
+from umbmid.ai.logreg import LogisticRegression
+from umbmid.ai.stats import get_pred_labels
+
+###############################################################################
+
+# The num of recent requests used to find the latency percentiles
+__N_LATENCIES = 10000
+
+###############################################################################
+
+
+def _get_n_latencies():
+    """Returns the num of recent requests used for the percentiles"""
+    return __N_LATENCIES
+
+
+class ScoringMetrics:
+    """Thread-safe latency and throughput metrics of a BatchScorer"""
+
+    def __init__(self):
+        """Init class ScoringMetrics"""
+
+        self._lock = threading.Lock()
+        self._start_time = time.perf_counter()
+
+        self.n_requests = 0  # The num of scored requests
+        self.n_scans = 0  # The num of scored scans
+        self.n_batches = 0  # The num of batches scored
+        self.n_errors = 0  # The num of failed requests
+
+        # The latency (submit to result) of the most recent requests,
+        # and the total time spent scoring batches, in seconds
+        self._latencies = collections.deque(maxlen=_get_n_latencies())
+        self._score_time = 0.0
+
+    def record_batch(self, latencies, n_scans, score_time, n_errors=0):
+        """Records one scored batch
+
+        Parameters
+        ----------
+        latencies : list
+            The latency of each request in the batch, in seconds
+        n_scans : int
+            The num of scans in the batch
+        score_time : float
+            The time spent scoring the batch, in seconds
+        n_errors : int
+            The num of requests in the batch that failed
+        """
+
+        with self._lock:
+            self.n_requests += len(latencies) - n_errors
+            self.n_scans += n_scans
+            self.n_batches += 1
+            self.n_errors += n_errors
+            self._latencies.extend(latencies)
+            self._score_time += score_time
+
+    def report(self):
+        """Returns the metrics as a dict
+
+        Returns
+        -------
+        report : dict
+            The counts, the mean batch size, the throughput (scans/s)
+            over the uptime, and the p50/p95/p99 latency of the recent
+            requests, in ms
+        """
+
+        with self._lock:
+
+            uptime = time.perf_counter() - self._start_time
+            latencies = np.array(self._latencies) * 1e3
+
+            report = {
+                'uptime_s': uptime,
+                'n_requests': self.n_requests,
+                'n_scans': self.n_scans,
+                'n_batches': self.n_batches,
+                'n_errors': self.n_errors,
+                'mean_batch_size': self.n_scans / max(self.n_batches, 1),
+                'throughput_scans_per_s': self.n_scans / max(uptime, 1e-9),
+                'score_time_s': self._score_time,
+            }
+
+        for pct in (50, 95, 99):  # Report the latency percentiles
+            report['latency_p%d_ms' % pct] = \
+                float(np.percentile(latencies, pct)) if latencies.size \
+                else None
+
+        return report
+
+
+###############################################################################
+
+
+class BatchScorer:
+    """Scores scans submitted from many threads in micro-batches
+
+    Each submitted request is queued, and a worker thread takes the
+    requests waiting in the queue (up to max_batch_size scans, waiting
+    at most max_wait for more to arrive) and scores them at once with
+    LogisticRegression.predict_fd_proba(), so that concurrent requests
+    share one feature extraction and one matrix multiply.
+    """
+
+    def __init__(self, model, max_batch_size=64, max_wait=0.005,
+                 logger=null_logger):
+        """Init class BatchScorer
+
+        Parameters
+        ----------
+        model : LogisticRegression
+            The frozen model, with its feature_config (ex: from
+            LogisticRegression.load())
+        max_batch_size : int
+            The max num of scans scored at once
+        max_wait : float
+            The max time, in seconds, that the first request of a batch
+            waits for more requests
+        logger :
+            The logger
+        """
+
+        assert model.feature_config is not None, \
+            'Error: the model has no feature_config'
+
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.logger = logger
+
+        self.metrics = ScoringMetrics()
+
+        self._queue = queue.Queue()
+
+        # The scores of each batch are written into this array, so that
+        # no new array is allocated for batches up to max_batch_size
+        self._out = np.empty([max_batch_size, ], dtype=model.dtype)
+
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, fd_data):
+        """Queues the scans of one request for scoring
+
+        Parameters
+        ----------
+        fd_data : array_like
+            The frequency-domain data of one scan, [n_freqs, n_ant_pos],
+            or of several scans, [n_scans, n_freqs, n_ant_pos]
+
+        Returns
+        -------
+        future : Future
+            The future of the array of the score of each scan
+        """
+
+        fd_data = np.asarray(fd_data)
+
+        if np.ndim(fd_data) == 2:  # If one scan, make it a batch of one
+            fd_data = fd_data[None, :, :]
+
+        assert np.ndim(fd_data) == 3, \
+            'Error: fd_data must have 2 or 3 dim'
+
+        future = Future()
+        self._queue.put((fd_data, future, time.perf_counter()))
+
+        return future
+
+    def score(self, fd_data, timeout=None):
+        """Scores the scans of one request, waiting for the result
+
+        Parameters
+        ----------
+        fd_data : array_like
+            The frequency-domain data of one or several scans (see
+            submit())
+        timeout : float
+            The max time to wait, in seconds, if None, waits forever
+
+        Returns
+        -------
+        scores : array_like
+            The predicted score of each scan
+        """
+        return self.submit(fd_data).result(timeout=timeout)
+
+    def close(self):
+        """Scores the queued requests, then stops the worker thread"""
+
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self):
+        """Takes the queued requests in batches and scores them"""
+
+        running = True
+
+        while running:
+
+            item = self._queue.get()
+
+            if item is None:  # If closed, stop
+                break
+
+            batch = [item]
+            n_scans = np.size(item[0], axis=0)
+            deadline = time.perf_counter() + self.max_wait
+
+            # Take more requests, until the batch is full or the first
+            # request has waited max_wait
+            while n_scans < self.max_batch_size:
+
+                try:
+                    item = self._queue.get(
+                        timeout=max(deadline - time.perf_counter(), 0))
+                except queue.Empty:
+                    break
+
+                if item is None:  # If closed, stop after this batch
+                    running = False
+                    break
+
+                batch.append(item)
+                n_scans += np.size(item[0], axis=0)
+
+            self._score_batch(batch, n_scans)
+
+    def _score_batch(self, batch, n_scans):
+        """Scores the scans of a batch of requests at once"""
+
+        start_time = time.perf_counter()
+        n_errors = 0
+
+        try:  # Score every scan of the batch at once
+
+            fd_batch = np.concatenate([fd_data for fd_data, _, _ in batch],
+                                      axis=0)
+
+            out = self._out[:n_scans] if n_scans <= self.max_batch_size \
+                else None
+
+            scores = self.model.predict_fd_proba(fd_batch,
+                                                 chunk_size=n_scans, out=out)
+
+            start = 0
+            for fd_data, future, _ in batch:  # Return each request's scores
+                stop = start + np.size(fd_data, axis=0)
+                future.set_result(scores[start:stop].copy())
+                start = stop
+
+        except Exception:  # If failed, score each request separately
+
+            for fd_data, future, _ in batch:
+
+                try:
+                    future.set_result(self.model.predict_fd_proba(fd_data))
+
+                except Exception as exc:  # If bad, return its error
+                    future.set_exception(exc)
+                    n_errors += 1
+
+                    self.logger.warning('Failed to score request: %s'
+                                        % exc)
+
+        end_time = time.perf_counter()
+
+        self.metrics.record_batch(
+            latencies=[end_time - submit_time for _, _, submit_time in batch],
+            n_scans=n_scans, score_time=end_time - start_time,
+            n_errors=n_errors)
+
+
+###############################################################################
+
+
+def _get_allowed_path(path, data_root):
+    """Returns the real path of a requested file, if in data_root
+
+    Parameters
+    ----------
+    path : str
+        The path of the file, as sent by the client
+    data_root : str
+        The real path of the dir whose files may be read, or None if
+        no paths are accepted
+
+    Returns
+    -------
+    real_path : str
+        The real path of the file, with any symlinks resolved
+    """
+
+    if data_root is None:  # If the server does not accept paths
+        raise ValueError('This server does not accept file paths, send '
+                         'the file contents instead')
+
+    real_path = os.path.realpath(path)
+
+    # Resolve the symlinks before the check, so that a path (or a link)
+    # cannot point outside of the data root
+    if os.path.commonpath([real_path, data_root]) != data_root:
+        raise ValueError('Path is outside the data root of the server: %s'
+                         % path)
+
+    return real_path
+
+
+def _parse_request(body, content_type, data_root=None):
+    """Returns the frequency-domain data of the body of a request
+
+    Parameters
+    ----------
+    body : bytes
+        The body of the request
+    content_type : str
+        The content type of the request: 'text/plain' for the contents
+        of a raw data .txt file, 'application/octet-stream' for a .npy
+        array, or 'application/json' for {'path': ..., 'ref_path': ...},
+        the paths of a local raw data .txt file and (optional) of the
+        .txt file of its reference scan, which is subtracted from it
+    data_root : str
+        The real path of the dir in which the files of an
+        'application/json' request must be, or None if paths are not
+        accepted
+
+    Returns
+    -------
+    fd_data : array_like
+        The frequency-domain data of the scan(s) of the request
+    """
+
+    content_type = content_type.split(';')[0].strip()
+
+    if content_type == 'text/plain':  # If the raw .txt contents
+        fd_data = load_fd_data(io.BytesIO(body))
+
+    elif content_type == 'application/octet-stream':  # If a .npy array
+        fd_data = np.load(io.BytesIO(body), allow_pickle=False)
+
+    elif content_type == 'application/json':  # If paths to local files
+
+        paths = json.loads(body)
+        fd_data = load_fd_data(_get_allowed_path(paths['path'], data_root))
+
+        if paths.get('ref_path') is not None:  # Subtract the reference
+            fd_data = fd_data - load_fd_data(
+                _get_allowed_path(paths['ref_path'], data_root))
+
+    else:
+        raise ValueError('Unsupported content type: %s' % content_type)
+
+    return fd_data
+
+
+class _ScoringHandler(BaseHTTPRequestHandler):
+    """Handles the requests to a scoring server
+
+    POST /score scores the scan(s) of the body (see _parse_request()),
+    GET /metrics returns the ScoringMetrics report, and GET /health
+    returns the model info.
+    """
+
+    def _send_json(self, status, content):
+        """Sends a JSON response"""
+
+        body = json.dumps(content).encode('utf-8')
+
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+
+        scorer = self.server.scorer
+
+        if self.path == '/metrics':
+            self._send_json(200, scorer.metrics.report())
+
+        elif self.path == '/health':
+            self._send_json(200, {
+                'n_features': int(scorer.model.n_features),
+                'threshold': float(scorer.model.threshold),
+                'feature_config': scorer.model.feature_config,
+            })
+
+        else:
+            self._send_json(404, {'error': 'Unknown path: %s' % self.path})
+
+    def do_POST(self):
+
+        if self.path != '/score':
+            self._send_json(404, {'error': 'Unknown path: %s' % self.path})
+            return
+
+        scorer = self.server.scorer
+
+        try:  # Parse the scan(s) of the request
+
+            body = self.rfile.read(int(self.headers.get('Content-Length',
+                                                        0)))
+            fd_data = _parse_request(body,
+                                     self.headers.get('Content-Type',
+                                                      'text/plain'),
+                                     data_root=self.server.data_root)
+            future = scorer.submit(fd_data)
+
+        except Exception as exc:
+            self._send_json(400, {'error': str(exc)})
+            return
+
+        try:
+            scores = future.result(timeout=self.server.timeout_s)
+
+        except (AssertionError, ValueError) as exc:  # If a bad scan
+            self._send_json(400, {'error': str(exc)})
+            return
+
+        except Exception as exc:
+            self._send_json(500, {'error': str(exc)})
+            return
+
+        self._send_json(200, {
+            'scores': [float(score) for score in scores],
+            'labels': get_pred_labels(
+                scores, scorer.model.threshold).astype(int).tolist(),
+        })
+
+    def log_message(self, format, *args):
+        self.server.logger.debug('%s - %s' % (self.address_string(),
+                                              format % args))
+
+
+def make_scoring_server(model, host='127.0.0.1', port=8000,
+                        max_batch_size=64, max_wait=0.005, timeout_s=60.0,
+                        data_root=None, logger=null_logger):
+    """Makes an HTTP server that scores scans with a frozen model
+
+    Each request is handled in its own thread, and the requests are
+    scored in micro-batches by a BatchScorer.
+
+    Parameters
+    ----------
+    model : LogisticRegression or str
+        The frozen model, or the path to its saved .npz file (see
+        LogisticRegression.save())
+    host : str
+        The host of the server, by default only reachable locally
+    port : int
+        The port of the server, if 0, uses a free port (see
+        server.server_address)
+    max_batch_size : int
+        The max num of scans scored at once
+    max_wait : float
+        The max time, in seconds, that a request waits for others to
+        be batched with it
+    timeout_s : float
+        The max time, in seconds, to wait for the scores of a request
+    data_root : str
+        The dir (ex: the dataset root) in which the local files sent by
+        path must be; if None, requests with paths are refused, and
+        only file contents and arrays are scored
+    logger :
+        The logger
+
+    Returns
+    -------
+    server : ThreadingHTTPServer
+        The server; run it with server.serve_forever(), and stop it with
+        server.shutdown() and server.scorer.close()
+    """
+
+    if isinstance(model, str):  # If a path, load the model
+        model = LogisticRegression.load(model)
+
+    server = ThreadingHTTPServer((host, port), _ScoringHandler)
+    server.daemon_threads = True
+
+    server.scorer = BatchScorer(model, max_batch_size=max_batch_size,
+                                max_wait=max_wait, logger=logger)
+    server.timeout_s = timeout_s
+    server.logger = logger
+
+    if data_root is not None:  # Resolve symlinks, as for the paths
+        data_root = os.path.realpath(data_root)
+    server.data_root = data_root
+
+    return server
+
+
+###############################################################################
+
+
+def request_scores(url, path=None, fd_data=None, ref_path=None,
+                   send_file=True, timeout=60.0):
+    """Requests the scores of scan(s) from a scoring server
+
+    Parameters
+    ----------
+    url : str
+        The URL of the server (ex: 'http://127.0.0.1:8000')
+    path : str
+        The path of a raw data .txt file to score
+    fd_data : array_like
+        The frequency-domain data of the scan(s) to score, if no path
+    ref_path : str
+        The path of the .txt file of the reference scan of path, if
+        any; if set, the paths are sent instead of the file contents
+    send_file : bool
+        If True, the contents of the file at path are sent, otherwise
+        only the path, for a server on the same machine. Paths are only
+        accepted by a server with a data_root that holds the files (see
+        make_scoring_server())
+    timeout : float
+        The max time, in seconds, to wait for the response
+
+    Returns
+    -------
+    response : dict
+        The 'scores' and predicted 'labels' of each scan
+    """
+
+    assert (path is None) != (fd_data is None), \
+        'Error: exactly one of path and fd_data must be set'
+
+    if fd_data is not None:  # Send the array as a .npy
+        buffer = io.BytesIO()
+        np.save(buffer, np.asarray(fd_data), allow_pickle=False)
+        body = buffer.getvalue()
+        content_type = 'application/octet-stream'
+
+    elif send_file and ref_path is None:  # Send the .txt contents
+        with open(path, 'rb') as handle:
+            body = handle.read()
+        content_type = 'text/plain'
+
+    else:  # Send the paths of the local files
+        body = json.dumps({'path': path, 'ref_path': ref_path}).encode()
+        content_type = 'application/json'
+
+    request = urllib.request.Request('%s/score' % url.rstrip('/'),
+                                     data=body, method='POST',
+                                     headers={'Content-Type': content_type})
+
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return json.loads(response.read())
+
+
+def request_metrics(url, timeout=10.0):
+    """Returns the metrics report of a scoring server
+
+    Parameters
+    ----------
+    url : str
+        The URL of the server (ex: 'http://127.0.0.1:8000')
+    timeout : float
+        The max time, in seconds, to wait for the response
+
+    Returns
+    -------
+    report : dict
+        The metrics report (see ScoringMetrics.report())
+    """
+
+    with urllib.request.urlopen('%s/metrics' % url.rstrip('/'),
+                                timeout=timeout) as response:
+        return json.loads(response.read())
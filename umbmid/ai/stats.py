@@ -0,0 +1,286 @@
+"""
+Tyson Reimer
+University of Manitoba
+October 19th, 2026
+"""
+
+import numpy as np
+
+###############################################################################
+
+# The names of the metrics found by get_metrics()
+metric_names = ('auc', 'acc', 'sens', 'spec')
+
+###############################################################################
+
+
+def _rank_rows(scores):
+    """Returns the rank of each score in each row, with tied scores
+    given their average rank"""
+
+    # Import scipy.stats here, as it is slow to import
+    from scipy.stats import rankdata
+
+    return rankdata(scores, axis=-1)
+
+
+def _get_aucs_from_ranks(labels, ranks):
+    """Returns the ROC AUC of each row, from the ranks of the scores
+
+    The AUC is the Mann-Whitney U statistic of the positive samples,
+    normalized by the number of positive-negative pairs; NaN for rows
+    with only one class.
+    """
+
+    n_pos = np.sum(labels == 1, axis=-1)
+    n_neg = np.shape(labels)[-1] - n_pos
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        aucs = ((np.sum(ranks * (labels == 1), axis=-1)
+                 - n_pos * (n_pos + 1) / 2) / (n_pos * n_neg))
+
+    return np.where((n_pos > 0) & (n_neg > 0), aucs, np.nan)
+
+
+def get_roc_auc(labels, scores):
+    """Returns the ROC AUC of scores, via the ranks of the scores
+
+    Parameters
+    ----------
+    labels : array_like
+        The binary class labels of each sample
+    scores : array_like
+        The predicted score of each sample
+
+    Returns
+    -------
+    roc_auc : float
+        The area under the ROC curve, NaN if only one class present
+    """
+
+    labels = np.asarray(labels)
+
+    return float(_get_aucs_from_ranks(labels, _rank_rows(scores)))
+
+
+def get_pred_labels(scores, threshold=0.5):
+    """Returns the binary predicted labels of scores at a threshold
+
+    A sample is predicted positive if its score is at or above the
+    threshold (score >= threshold), and negative otherwise. All the
+    threshold metrics of this module use this convention.
+
+    Parameters
+    ----------
+    scores : array_like
+        The predicted score of each sample
+    threshold : float
+        The threshold at or above which a sample is predicted positive
+
+    Returns
+    -------
+    preds : array_like
+        The bool predicted label of each sample, True if positive
+    """
+    return np.asarray(scores) >= threshold
+
+
+def _get_threshold_metrics(labels, preds):
+    """Returns the acc, sens and spec of each row of binary preds"""
+
+    tp = np.sum((labels == 1) & preds, axis=-1)
+    tn = np.sum((labels == 0) & ~preds, axis=-1)
+    n_pos = np.sum(labels == 1, axis=-1)
+    n_neg = np.shape(labels)[-1] - n_pos
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        acc = (tp + tn) / np.shape(labels)[-1]
+        sens = tp / n_pos
+        spec = tn / n_neg
+
+    return acc, sens, spec
+
+
+def get_metrics(labels, scores, threshold=0.5):
+    """Returns the ROC AUC, acc, sens and spec of each row of scores
+
+    Parameters
+    ----------
+    labels : array_like
+        The binary class labels of each sample, [n_samples] or [n_reps,
+        n_samples]
+    scores : array_like
+        The predicted score of each sample, same shape as labels
+    threshold : float
+        The threshold at or above which a sample is predicted positive
+
+    Returns
+    -------
+    metrics : dict
+        The value (or the array of the value of each row) of each
+        metric in metric_names
+    """
+
+    labels = np.asarray(labels)
+    scores = np.asarray(scores)
+
+    acc, sens, spec = _get_threshold_metrics(
+        labels, get_pred_labels(scores, threshold))
+
+    metrics = {
+        'auc': _get_aucs_from_ranks(labels, _rank_rows(scores)),
+        'acc': acc,
+        'sens': sens,
+        'spec': spec,
+    }
+
+    return metrics
+
+
+###############################################################################
+
+
+def bootstrap_metrics(labels, scores, threshold=0.5, n_boot=10000, ci=0.95,
+                      rand_seed=0, chunk_size=2000):
+    """Finds bootstrap confidence intervals of the metrics of scores
+
+    The samples are resampled (with replacement) n_boot times, as a
+    [n_boot, n_samples] matrix of sample indices, and the metrics of
+    all the replicates are found at once (see get_metrics()), in
+    chunks of chunk_size replicates to bound the memory used.
+
+    Parameters
+    ----------
+    labels : array_like
+        The binary class labels of each sample
+    scores : array_like
+        The predicted score of each sample
+    threshold : float
+        The threshold at or above which a sample is predicted positive
+    n_boot : int
+        The number of bootstrap replicates
+    ci : float
+        The confidence level of the intervals (ex: 0.95)
+    rand_seed : int
+        The seed used for resampling
+    chunk_size : int
+        The number of replicates computed at once
+
+    Returns
+    -------
+    results : dict
+        For each metric in metric_names, a dict of its 'value' on the
+        samples, and the 'std', 'ci_low' and 'ci_high' of its bootstrap
+        distribution (percentile interval, ignoring replicates in which
+        the metric is undefined)
+    """
+
+    labels = np.asarray(labels)
+    scores = np.asarray(scores)
+
+    assert np.shape(labels) == np.shape(scores), \
+        'Error: labels and scores must have the same shape'
+
+    rng = np.random.default_rng(rand_seed)
+
+    boot_metrics = {metric: np.empty(n_boot) for metric in metric_names}
+
+    for start in range(0, n_boot, chunk_size):  # For each chunk
+
+        n_reps = min(chunk_size, n_boot - start)
+
+        # Resample the samples of each replicate
+        boot_idxs = rng.integers(0, np.size(labels),
+                                 size=(n_reps, np.size(labels)))
+
+        chunk_metrics = get_metrics(labels[boot_idxs], scores[boot_idxs],
+                                    threshold=threshold)
+
+        for metric in metric_names:
+            boot_metrics[metric][start:start + n_reps] = chunk_metrics[metric]
+
+    sample_metrics = get_metrics(labels, scores, threshold=threshold)
+
+    results = dict()
+
+    for metric in metric_names:
+
+        results[metric] = {
+            'value': float(sample_metrics[metric]),
+            'std': float(np.nanstd(boot_metrics[metric])),
+            'ci_low': float(np.nanpercentile(boot_metrics[metric],
+                                             100 * (1 - ci) / 2)),
+            'ci_high': float(np.nanpercentile(boot_metrics[metric],
+                                              100 * (1 + ci) / 2)),
+        }
+
+    return results
+
+
+def permutation_test(labels, scores, threshold=0.5, n_perm=10000,
+                     rand_seed=0, chunk_size=2000):
+    """Finds the permutation-test p-value of each metric of scores
+
+    The null hypothesis is that the scores are independent of the
+    labels. The labels are permuted n_perm times, as a [n_perm,
+    n_samples] matrix, and the metrics of every permutation are found
+    at once; as the scores are not permuted, they are only ranked once.
+
+    Parameters
+    ----------
+    labels : array_like
+        The binary class labels of each sample
+    scores : array_like
+        The predicted score of each sample
+    threshold : float
+        The threshold at or above which a sample is predicted positive
+    n_perm : int
+        The number of permutations
+    rand_seed : int
+        The seed used for permuting
+    chunk_size : int
+        The number of permutations computed at once
+
+    Returns
+    -------
+    p_vals : dict
+        The one-sided p-value of each metric in metric_names: the
+        portion of permutations (including the observed labels) with
+        a metric at least as high as the observed metric
+    """
+
+    labels = np.asarray(labels)
+    scores = np.asarray(scores)
+
+    assert np.shape(labels) == np.shape(scores), \
+        'Error: labels and scores must have the same shape'
+
+    ranks = _rank_rows(scores)
+    preds = get_pred_labels(scores, threshold)
+
+    obs_metrics = get_metrics(labels, scores, threshold=threshold)
+
+    rng = np.random.default_rng(rand_seed)
+
+    # The num of permutations with a metric >= the observed metric
+    n_extreme = {metric: 0 for metric in metric_names}
+
+    for start in range(0, n_perm, chunk_size):  # For each chunk
+
+        n_reps = min(chunk_size, n_perm - start)
+
+        # Permute the labels of each replicate
+        perm_labels = rng.permuted(np.tile(labels, (n_reps, 1)), axis=1)
+
+        perm_metrics = dict(zip(('acc', 'sens', 'spec'),
+                                _get_threshold_metrics(perm_labels, preds)))
+        perm_metrics['auc'] = _get_aucs_from_ranks(perm_labels, ranks)
+
+        for metric in metric_names:
+            n_extreme[metric] += int(np.sum(perm_metrics[metric]
+                                            >= obs_metrics[metric]))
+
+    p_vals = {metric: (1 + n_extreme[metric]) / (1 + n_perm)
+              for metric in metric_names}
+
+    return p_vals
@@ -7,6 +7,7 @@ July 22nd, 2019
 import numpy as np
 
 from umbmid import null_logger
+from umbmid.profiling import profiled
 from umbmid.ai.preprocessing import shuffle_arrays
 
 ########################################################################
@@ -58,6 +59,7 @@ def verify_train_test_sets(train_metadata, test_metadata):
     return unique_test
 
 
+@profiled('split')
 def split_to_train_test(data, labels, metadata, test_portion=0.2, init_seed=-1,
                         return_rand_seed=False, logger=null_logger):
     """Split dataset into train/test portions
@@ -152,7 +154,7 @@ def split_to_train_test(data, labels, metadata, test_portion=0.2, init_seed=-1,
 
         else:  # Otherwise, shuffle with random seed
             rand_seed = np.random.randint(1000000000)
-            logger.debug('rand seed:\t%s' % rand_seed)
+            logger.debug('rand seed:\t%s', rand_seed)
 
             [shuffled_data, shuffled_labels, shuffled_metadata,
              shuffled_tum_sizes, shuffled_biards], rand_seed = \
@@ -196,8 +198,8 @@ def split_to_train_test(data, labels, metadata, test_portion=0.2, init_seed=-1,
         # conditions are satisfied
         if unique_test:
 
-            logger.info('\t\tSplit successful. Checking if split '
-                        'satisfies conditions...')
+            logger.debug('\t\tSplit successful. Checking if split '
+                         'satisfies conditions...')
 
             # Find the tumor sizes and BI-RADS classes of the test
             # samples
@@ -262,10 +264,10 @@ def split_to_train_test(data, labels, metadata, test_portion=0.2, init_seed=-1,
                               0.2 * num_test < num_c3 < 0.3 * num_test and
                               0.2 * num_test < num_c4 < 0.3 * num_test)
 
-            logger.info('\t\t\tClass balanced:\t\t%s' % class_balance)
-            logger.info('\t\t\tTum size balance:\t%s' % tum_size_balance)
-            logger.info('\t\t\tBI-RADS balance:\t%s' % birads_balance)
-            logger.info('\t\t\tAdipose balance:\t%s' % adi_balance)
+            logger.debug('\t\t\tClass balanced:\t\t%s', class_balance)
+            logger.debug('\t\t\tTum size balance:\t%s', tum_size_balance)
+            logger.debug('\t\t\tBI-RADS balance:\t%s', birads_balance)
+            logger.debug('\t\t\tAdipose balance:\t%s', adi_balance)
 
             # If the classes, tumor sizes, and BI-RADS classes are
             # balanced as expected, set flag to True
@@ -273,7 +275,7 @@ def split_to_train_test(data, labels, metadata, test_portion=0.2, init_seed=-1,
                                          and birads_balance and adi_balance)
 
     logger.info('\tTrain/test set split completed successfully with'
-                ' random seed: %d' % rand_seed)
+                ' random seed: %d', rand_seed)
 
     if return_rand_seed:  # If returning the rand seed, also return it
         return (train_data, test_data, train_labels, test_labels,
@@ -4,6 +4,22 @@ University of Manitoba
 October 19th, 2019
 """
 
+import numpy as np
+
+###############################################################################
+
+# The polar angle of the port A antenna at the first scan position,
+# for each generation of dataset, in degrees (see docs/scan_geometry.md)
+ini_ant_angs = {
+    'one': -102.5,
+    'two': -130.0,
+    'three': -130.0,
+}
+
+# The polar angle offset of the port B antenna with respect to the
+# port A antenna, in degrees
+multi_ant_offset = 60.0
+
 ###############################################################################
 
 
@@ -37,3 +53,39 @@ def get_phase_delay_rad(scan_rad):
     delayed_rad = 0.97 * (scan_rad - 0.106) + 0.148
 
     return delayed_rad
+
+
+def get_ant_xys(ini_ang, ant_rad, n_ant_pos=72):
+    """Returns the x/y-positions of an antenna at each scan position
+
+    The antennas rotate clockwise to n_ant_pos polar angles, evenly
+    spaced over 360 degrees, beginning at the polar angle ini_ang.
+
+    Parameters
+    ----------
+    ini_ang : float
+        The polar angle of the antenna at the first scan position, in
+        degrees
+    ant_rad : float
+        The radius of the antenna trajectory in the scan (typically
+        after accounting for the phase delay), in meters
+    n_ant_pos : int
+        The number of antenna positions used in the scan
+
+    Returns
+    -------
+    ant_xs : array_like
+        The x-positions of the antenna at each scan position, in meters
+    ant_ys : array_like
+        The y-positions of the antenna at each scan position, in meters
+    """
+
+    # Find the polar angle at each scan position, decreasing because
+    # the antennas rotate clockwise
+    ant_angs = np.deg2rad(ini_ang - np.arange(n_ant_pos) * 360 / n_ant_pos)
+
+    # Convert to cartesian coordinates
+    ant_xs = ant_rad * np.cos(ant_angs)
+    ant_ys = ant_rad * np.sin(ant_angs)
+
+    return ant_xs, ant_ys
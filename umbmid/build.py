@@ -4,54 +4,19 @@ University of Manitoba
 July 17th, 2019
 """
 
-import os
 import numpy as np
-import pandas as pd
 
-from umbmid import null_logger, get_proj_path
-from umbmid.loadsave import load_fd_data
+from umbmid import null_logger, ProgressReporter
+from umbmid.catalog import dtypes_dict, load_catalog
+from umbmid.datasource import get_data_source
+from umbmid.loadsave import parse_fd_data
+from umbmid.profiling import profile_stage, profiled
 from umbmid.sigproc import iczt
 
 ###############################################################################
 
-__DATA_DIR = os.path.join(get_proj_path(), 'datasets\\')
 
-###############################################################################
-
-# This dict maps the headers for each info-piece contained in the
-# metadata files to the corresponding Python datatype
-dtypes_dict = {
-                'n_expt': int,
-                'id': int,
-                'phant_id': str,
-                'tum_rad': float,
-                'tum_shape': str,
-                'tum_x': float,
-                'tum_y': float,
-                'tum_z': float,
-                'birads': int,
-                'adi_vol': float,
-                'fib_vol': float,
-                'adi_ref_id': int,
-                'emp_ref_id': int,
-                'date': str,
-                'n_session': int,
-                'ant_rad': float,
-                'ant_z': float,
-                'fib_ang': float,
-                'adi_x': float,
-                'adi_y': float,
-                'fib_ref_id': int,
-                'fib_x': float,
-                'fib_y': float,
-                'tum_in_fib': int,
-                'tum_diam': float,
-            }
-
-###############################################################################
-
-
-def import_metadata(gen='one'):
+def import_metadata(gen='one', data_dir=None, catalog=None):
     """Load the metadata of each expt as a dict, return as list of dicts
 
     Loads the -metadata.csv files for each experimental session and
@@ -61,6 +26,12 @@ def import_metadata(gen='one'):
     ----------
     gen : str
         The generation of data to import, must be in ['one', 'two']
+    data_dir : str
+        The dataset root directory (or archive of it), if None, uses
+        umbmid.get_data_dir()
+    catalog : dict
+        The catalog of the dataset from
+        umbmid.catalog.load_catalog(), if None, it is loaded
 
     Returns
     -------
@@ -71,86 +42,17 @@ def import_metadata(gen='one'):
     assert gen in ['one', 'two', 'three'], \
         "Error: gen must be in ['one', 'two', 'three']"
 
-    this_data_dir = os.path.join(__DATA_DIR, 'gen-%s/raw/' % gen)
-
-    metadata = []  # Init list to return
-
-    # For each experimental session in the dataset
-    for expt_session in os.listdir(this_data_dir):
-
-        # If the expt_session is a directory
-        if os.path.isdir(os.path.join(this_data_dir, expt_session)):
-
-            # Get the path to the -metadata.csv file for this
-            # expt_session
-            metadata_path = os.path.join(this_data_dir, expt_session,
-                                         expt_session + '-metadata.csv')
-
-            # Load the -metadata.csv file for this expt_session
-            session_metadata = np.genfromtxt(metadata_path, delimiter=',',
-                                             dtype=str)
-
-            # Get the keys for the metadata
-            metadata_keys = session_metadata[0, :]
-
-            for md_key in metadata_keys:
-
-                # Assert the metadata str is valid
-                assert md_key in dtypes_dict.keys(), \
-                    "Error: invalid metadata str %s in file %s" % (
-                        md_key, metadata_path
-                    )
-
-            # For each individual scan within this expt_session
-            for expt in range(1, np.size(session_metadata, axis=0)):
-
-                # Get the metadata values (as str's) for this expt
-                expt_metadata = session_metadata[expt, :]
-
-                expt_metadata_dict = dict()  # Init dict for this expt
-
-                # Create counter for the different pieces of metadata
-                # info
-                info_counter = 0
-
-                # For each info piece in the metadata
-                for info_piece in metadata_keys:
-
-                    # If the value for this info piece is NOT missing
-                    if not expt_metadata[info_counter] == '':
+    if catalog is None:  # If no catalog given, load it
+        catalog = load_catalog(gen=gen, data_dir=data_dir)
 
-                        # Store the value as its proper dtype
-                        expt_metadata_dict[info_piece] = \
-                            dtypes_dict[info_piece](
-                                expt_metadata[info_counter])
-
-                    else:  # If the value for this info piece IS missing
-
-                        assert info_piece in dtypes_dict.keys(), \
-                                '%s not valid info-piece, in file: %s' \
-                                % (info_piece, metadata_path)
-
-                        # If the dtype for this info piece is an int
-                        # or float, store as NaN
-                        if (dtypes_dict[info_piece] == int or
-                                dtypes_dict[info_piece] == float):
-
-                            expt_metadata_dict[info_piece] = np.NaN
-
-                        # If the dtype for this info piece is a str,
-                        # store as empty str
-                        else:
-                            expt_metadata_dict[info_piece] = ''
-
-                    info_counter += 1  # Increase the info counter
-
-                # Append the metadata dict for this expt to the list
-                metadata.append(expt_metadata_dict)
+    # Get the metadata dict of each expt, in catalog order
+    metadata = [expt['md'] for expt in catalog['expts']]
 
     return metadata
 
 
-def import_fd_dataset(gen='one', sparams='s11', logger=null_logger):
+def import_fd_dataset(gen='one', sparams='s11', logger=null_logger,
+                      data_dir=None, catalog=None, dtype=complex):
     """Load the freq-domain s-params of each sample in the dataset
 
     Loads the .txt raw data files of the measured S-parameters in the
@@ -165,6 +67,15 @@ def import_fd_dataset(gen='one', sparams='s11', logger=null_logger):
         import
     logger :
         Logging object for recording progress
+    data_dir : str
+        The dataset root directory (or archive of it), if None, uses
+        umbmid.get_data_dir()
+    catalog : dict
+        The catalog of the dataset from
+        umbmid.catalog.load_catalog(), if None, it is loaded
+    dtype :
+        The complex dtype of the returned array, complex (complex128)
+        or np.complex64 (halves the memory use)
 
     Returns
     -------
@@ -175,91 +86,160 @@ def import_fd_dataset(gen='one', sparams='s11', logger=null_logger):
     assert sparams in ['s11', 's21'], \
         "Error: sparams must be in ['s11', 's21']"
 
+    # Load the dataset of this single sparam
+    fd_dataset = import_fd_multiport_dataset(gen=gen,
+                                             sparams=[sparams],
+                                             logger=logger,
+                                             data_dir=data_dir,
+                                             catalog=catalog,
+                                             dtype=dtype)[:, 0, :, :]
+
+    return fd_dataset
+
+
+def import_fd_multiport_dataset(gen='two', sparams=('s11', 's21'),
+                                logger=null_logger, data_dir=None,
+                                catalog=None, dtype=complex):
+    """Load the freq-domain s-params of several sparams in one pass
+
+    Loads the .txt raw data files of each of the sparams (ex: the Mono
+    and Multi files) for each scan in a single pass over the dataset,
+    parsing each file directly into its place in one array.
+
+    Parameters
+    ----------
+    gen : str
+        The generation of dataset to use, must be in ['one', 'two',
+        'three']
+    sparams : list
+        The sparams to import, each must be in ['s11', 's21']
+    logger :
+        Logging object for recording progress
+    data_dir : str
+        The dataset root directory (or archive of it), if None, uses
+        umbmid.get_data_dir()
+    catalog : dict
+        The catalog of the dataset from
+        umbmid.catalog.load_catalog(), if None, it is loaded
+    dtype :
+        The complex dtype of the returned array, complex (complex128)
+        or np.complex64 (halves the memory use)
+
+    Returns
+    -------
+    fd_dataset : array_like
+        The S-parameters in the frequency-domain for each scan, of
+        shape [n_expts, n_sparams, n_freqs, n_ant_pos], with the
+        sparams in the order of sparams (see get_sparam_views())
+    """
+
+    sparams = list(sparams)
+
+    assert len(sparams) > 0 and all(sparam in ['s11', 's21']
+                                    for sparam in sparams), \
+        "Error: each of sparams must be in ['s11', 's21']"
+
+    assert len(set(sparams)) == len(sparams), \
+        'Error: sparams must be unique'
+
     assert gen in ['one', 'two', 'three'], \
         "Error: gen must be in ['one', 'two', 'three']"
 
-    this_data_dir = os.path.join(__DATA_DIR, 'gen-%s/raw/' % gen)
+    if catalog is None:  # If no catalog given, load it
+        catalog = load_catalog(gen=gen, data_dir=data_dir, logger=logger)
 
-    if sparams in ['s11']:
-        sparam_str = 'Mono'
-    else:
-        sparam_str = 'Multi'
+    # Get the data source the catalog was made from
+    data_src = get_data_source(catalog['data_dir'])
 
-    # Init list for storing the S-parameters for each scan
-    fd_dataset = []
+    # Init dict for storing the expt index, sparam index, and scan
+    # direction of the .txt file at each path
+    path_idxs = dict()
 
-    # For each experimental session in the dataset
-    for expt_session in os.listdir(this_data_dir):
+    # For each expt, in catalog order
+    for expt_idx, expt in enumerate(catalog['expts']):
 
-        # If the expt_session is a directory
-        if os.path.isdir(os.path.join(this_data_dir, expt_session)):
+        for sparam_idx, sparam in enumerate(sparams):  # For each sparam
 
-            logger.info('Working on:\t%s...' % expt_session)
+            assert sparam in expt['paths'], \
+                'Error: no %s file for expt %d in session %s' \
+                % (sparam, expt['n_expt'], expt['session'])
 
-            # Get the path to the -metadata.csv file for this
-            # expt_session
-            metadata_path = os.path.join(this_data_dir, expt_session,
-                                         expt_session + '-metadata.csv')
+            path_idxs[expt['paths'][sparam]] = (expt_idx, sparam_idx,
+                                                expt['ccw'][sparam])
 
-            # Load the -metadata.csv file for this expt_session
-            session_metadata = np.genfromtxt(metadata_path, delimiter=',',
-                                             dtype=str)
+    fd_dataset = None  # The array to return, made after the 1st file
 
-            # Get the identifying strings for each experiment in
-            # this session as described in the -metadata.csv file
-            expt_strs = ['expt%2d' % int(ii) for ii in session_metadata[1:, 0]]
+    # Report the progress every 10 s, rather than for every file
+    progress = ProgressReporter(logger, n_total=len(path_idxs),
+                                desc='\t\tLoading expt files')
 
-            # Use format 'expt01', 'expt02', etc.
-            expt_strs = [ii.replace(' ', '0') for ii in expt_strs]
+    # Read and parse each .txt file, in the order most efficient for
+    # the data source (ex: streaming through the members of a
+    # compressed archive, without extracting them to disk)
+    for expt_path, raw_data in data_src.read_many(list(path_idxs.keys())):
 
-            # Find the files that are possible experiments
-            potential_expts = os.listdir(os.path.join(this_data_dir,
-                                                      expt_session))
+        expt_idx, sparam_idx, is_ccw = path_idxs[expt_path]
 
-            # For each potential experiment (file in the session folder)
-            for expt in potential_expts:
+        with profile_stage('parse') as stage:
+            stage.add_bytes_read(len(raw_data))
+            expt_data = parse_fd_data(raw_data, dtype=dtype)
 
-                # If this is not the -metadata.csv file, and if
-                # the file is of the target sparam  ('s11' or 's21')
-                if '-metadata.csv' not in expt and sparam_str in expt:
+        if fd_dataset is None:  # If the first file, init the array
+            fd_dataset = np.empty([len(catalog['expts']), len(sparams)]
+                                  + list(expt_data.shape), dtype=dtype)
 
-                    logger.info('\t\tLoading expt:\t%s' % expt)
+        assert expt_data.shape == fd_dataset.shape[2:], \
+            'Error: %s has shape %s, expected %s' \
+            % (expt_path, expt_data.shape, fd_dataset.shape[2:])
 
-                    # Find the expt name from the .txt file name
-                    expt_name = expt.split('_')[1].lower()
+        if is_ccw:  # If the scan was performed counterclockwise
 
-                    # Assert that the expt_name matches one of the expts
-                    # described in the -metadata.csv file
-                    assert expt_name in expt_strs, \
-                        'Error: file %s not expected experiment for ' \
-                        'session %s' % (expt, expt_session)
+            # For any counterclockwise scans, convert them
+            # to being clockwise
+            fd_dataset[expt_idx, sparam_idx, :, :] = np.flip(expt_data,
+                                                             axis=1)
 
-                    # If the scan was performed counterclockwise, it
-                    # has the identifier string '(foC'
-                    if '(foC' in expt.split('_'):
+        else:  # If the scan was performed clockwise
+            fd_dataset[expt_idx, sparam_idx, :, :] = expt_data
 
-                        # For any counterclockwise scans, convert them
-                        # to being clockwise
-                        fd_dataset.append(
-                            np.flip(load_fd_data(
-                                os.path.join(this_data_dir, expt_session,
-                                             expt)), axis=1))
+        progress.update()
 
-                    else:  # If the scan was performed clockwise
-                        fd_dataset.append(
-                            load_fd_data(os.path.join(this_data_dir,
-                                                      expt_session, expt)))
-
-    # Convert the frequency-domain dataset to an np array
-    fd_dataset = np.reshape(fd_dataset,
-                            [len(fd_dataset), fd_dataset[0].shape[0],
-                             fd_dataset[0].shape[1]])
+    progress.close()
 
     return fd_dataset
 
 
+def get_sparam_views(fd_dataset, sparams=('s11', 's21')):
+    """Returns the dataset of each sparam in a multiport dataset
+
+    Parameters
+    ----------
+    fd_dataset : array_like
+        The multiport dataset, of shape [n_expts, n_sparams, ...], from
+        import_fd_multiport_dataset() or
+        import_fd_cal_multiport_dataset()
+    sparams : list
+        The sparams in the dataset, in the order they were imported
+
+    Returns
+    -------
+    sparam_views : dict
+        The dataset of each sparam, of shape [n_expts, ...]; each is a
+        view of fd_dataset (no data is copied)
+    """
+
+    assert np.shape(fd_dataset)[1] == len(sparams), \
+        'Error: fd_dataset has %d sparams, but %d were given' \
+        % (np.shape(fd_dataset)[1], len(sparams))
+
+    sparam_views = {sparam: fd_dataset[:, sparam_idx, ...]
+                    for sparam_idx, sparam in enumerate(sparams)}
+
+    return sparam_views
+
+
 def import_fd_cal_dataset(cal_type='emp', prune=True, gen='two', sparams='s11',
-                          logger=null_logger):
+                          logger=null_logger, data_dir=None, dtype=complex):
     """Load the calibrated freq-domain s-params of each expt in dataset
 
     Loads the .txt raw data files of the measured S-parameters in the
@@ -285,6 +265,12 @@ def import_fd_cal_dataset(cal_type='emp', prune=True, gen='two', sparams='s11',
         The sparams to import, must be in ['s11', 's21']
     logger :
         Logger for logging progress
+    data_dir : str
+        The dataset root directory (or archive of it), if None, uses
+        umbmid.get_data_dir()
+    dtype :
+        The complex dtype of the returned array, complex (complex128)
+        or np.complex64 (halves the memory use)
 
     Returns
     -------
@@ -294,14 +280,127 @@ def import_fd_cal_dataset(cal_type='emp', prune=True, gen='two', sparams='s11',
         List of calibrated metadata
     """
 
+    assert sparams in ['s11', 's21'], \
+        "Error: sparams must be in ['s11', 's21']"
+
+    # Load the calibrated dataset of this single sparam
+    cal_dataset, cal_metadata = \
+        import_fd_cal_multiport_dataset(cal_type=cal_type,
+                                        prune=prune,
+                                        gen=gen,
+                                        sparams=[sparams],
+                                        logger=logger,
+                                        data_dir=data_dir,
+                                        dtype=dtype)
+
+    return cal_dataset[:, 0, :, :], cal_metadata
+
+
+def import_fd_cal_multiport_dataset(cal_type='emp', prune=True, gen='two',
+                                    sparams=('s11', 's21'),
+                                    logger=null_logger, data_dir=None,
+                                    dtype=complex):
+    """Load the calibrated freq-domain data of several sparams at once
+
+    Loads the .txt raw data files of each of the sparams for each scan
+    in a single pass (see import_fd_multiport_dataset()), then
+    subtracts off the calibration scan of each sparam.
+
+    Parameters
+    ----------
+    cal_type : str
+        The type of calibration scan to subtract - expected to be in
+        ['emp', 'adi']. If 'emp', uses an empty-chamber
+        calibration scan, if 'adi' uses an adipose-only phantom
+        calibration scan.
+    prune : bool
+        If True, will return an array containing only the scans that
+        were of phantoms containing a fibroglandular component and that
+        had a valid reference scan.
+    gen : str
+        Must be in ['one', 'two', 'three'], specifies the generation of
+        data to import
+    sparams : list
+        The sparams to import, each must be in ['s11', 's21']
+    logger :
+        Logger for logging progress
+    data_dir : str
+        The dataset root directory (or archive of it), if None, uses
+        umbmid.get_data_dir()
+    dtype :
+        The complex dtype of the returned array, complex (complex128)
+        or np.complex64 (halves the memory use)
+
+    Returns
+    -------
+    cal_dataset : array_like
+        Array of calibrated data, of shape [n_expts, n_sparams,
+        n_freqs, n_ant_pos] (see get_sparam_views())
+    cal_metadata : list
+        List of calibrated metadata
+    """
+
     assert cal_type in ['emp', 'adi'], \
         "Error: cal_type must be in ['emp', 'adi']"
 
     assert gen in ['one', 'two', 'three'], \
         "Error: gen must be in ['one', 'two', 'three']"
 
-    assert sparams in ['s11', 's21'], \
-        "Error: sparams must be in ['s11', 's21']"
+    # Load the catalog once, for both the data and metadata
+    catalog = load_catalog(gen=gen, data_dir=data_dir, logger=logger)
+
+    # Load the freq-domain dataset of all the sparams
+    fd_dataset = import_fd_multiport_dataset(sparams=sparams,
+                                             gen=gen,
+                                             logger=logger,
+                                             catalog=catalog,
+                                             dtype=dtype)
+
+    # Import the metadata for the scans in the dataset
+    metadata = import_metadata(gen=gen, catalog=catalog)
+
+    # Subtract the calibration scans
+    cal_dataset, cal_metadata = calibrate_fd_dataset(fd_dataset, metadata,
+                                                     cal_type=cal_type,
+                                                     prune=prune)
+
+    return cal_dataset, cal_metadata
+
+
+@profiled('calibrate')
+def calibrate_fd_dataset(fd_dataset, metadata, cal_type='emp', prune=True):
+    """Subtract the calibration scan from each expt in the dataset
+
+    Parameters
+    ----------
+    fd_dataset : array_like
+        The freq-domain data of each expt, of shape [n_expts, ...] (ex:
+        from import_fd_dataset() or import_fd_multiport_dataset())
+    metadata : list
+        The metadata dict of each expt in the fd_dataset
+    cal_type : str
+        The type of calibration scan to subtract - expected to be in
+        ['emp', 'adi']. If 'emp', uses an empty-chamber
+        calibration scan, if 'adi' uses an adipose-only phantom
+        calibration scan.
+    prune : bool
+        If True, will return an array containing only the scans that
+        were of phantoms containing a fibroglandular component and that
+        had a valid reference scan.
+
+    Returns
+    -------
+    cal_dataset : array_like
+        Array of calibrated data
+    cal_metadata : list
+        List of calibrated metadata
+    """
+
+    assert cal_type in ['emp', 'adi'], \
+        "Error: cal_type must be in ['emp', 'adi']"
+
+    assert len(metadata) == np.shape(fd_dataset)[0], \
+        'Error: fd_dataset and metadata have different num of expts'
 
     # If using an adipose-only phantom calibration scan
     if cal_type in ['adi']:
@@ -310,14 +409,6 @@ def import_fd_cal_dataset(cal_type='emp', prune=True, gen='two', sparams='s11',
     else:  # If using an empty-chamber calibration scan
         cal_str = 'emp_ref_id'  # Set the cal_str to indicate this
 
-    # Load the freq-domain dataset
-    fd_dataset = import_fd_dataset(sparams=sparams,
-                                   gen=gen,
-                                   logger=logger)
-
-    # Import the metadata for the scans in the dataset
-    metadata = import_metadata(gen=gen)
-
     cal_dataset = np.zeros_like(fd_dataset)  # Init array to return
 
     for expt_idx in range(len(metadata)):  # For each experiment
@@ -347,41 +438,23 @@ def import_fd_cal_dataset(cal_type='emp', prune=True, gen='two', sparams='s11',
 
             assert ref_idx >= 0, ('Error: no ref found for unique ID %d' %
                                   this_expt_metadata['id'])
-            # Get the reference expt frequency-domain data for this
-            # expt_idx
-            ref_expt = fd_dataset[ref_idx, :, :]
 
-            # Get the frequency-domain data for this expt_idx
-            this_expt = fd_dataset[expt_idx, :, :]
-
-            # Subtract the reference
-            cal_dataset[expt_idx, :, :] = this_expt - ref_expt
+            # Subtract the reference from the data of every sparam
+            np.subtract(fd_dataset[expt_idx], fd_dataset[ref_idx],
+                        out=cal_dataset[expt_idx])
 
     # If pruning the dataset to include scans that had a fibroglandular
     # component and had a valid calibration scan
     if prune:
 
-        # Init lists for storing the samples in the pruned dataset and
-        # the metadata of these samples
-        pruned_dataset = []
-        cal_metadata = []
-
-        for expt_idx in range(len(metadata)):  # For each sample
-
-            # If the phantom contains fibroglandular tissue AND has a
-            # valid reference scan
-            if ('F' in metadata[expt_idx]['phant_id'] and
-                    not np.isnan(metadata[expt_idx][cal_str])):
-
-                # Append this sample to the list of samples
-                pruned_dataset.append(cal_dataset[expt_idx, :, :])
-                cal_metadata.append(metadata[expt_idx])
+        # Find the samples in the pruned dataset
+        keep_idxs = [expt_idx for expt_idx in range(len(metadata))
+                     if ('F' in metadata[expt_idx]['phant_id'] and
+                         not np.isnan(metadata[expt_idx][cal_str]))]
 
-        # Convert the dataset to an np array
-        cal_dataset = np.reshape(pruned_dataset,
-                                 [len(pruned_dataset),
-                                  pruned_dataset[0].shape[0],
-                                  pruned_dataset[0].shape[1]])
+        # Keep these samples and the metadata of these samples
+        cal_dataset = cal_dataset[keep_idxs]
+        cal_metadata = [metadata[expt_idx] for expt_idx in keep_idxs]
 
     else:  # If *NOT* pruning the dataset
 
@@ -392,47 +465,84 @@ def import_fd_cal_dataset(cal_type='emp', prune=True, gen='two', sparams='s11',
     return cal_dataset, cal_metadata
 
 
-def convert_to_idft_dataset(fd_dataset):
+@profiled('transform')
+def convert_to_idft_dataset(fd_dataset, logger=null_logger, chunk_size=16,
+                            out=None):
     """Convert the freq-domain data to the time-domain via the IDFT
 
     Converts each sample in the fd_dataset from the frequency-domain
-    to the time-domain via the IDFT.
+    to the time-domain via the IDFT. The returned array has the same
+    dtype as the fd_dataset. The samples are converted in chunks of
+    chunk_size, and each converted chunk is written into out (see
+    convert_to_iczt_dataset()).
 
     Parameters
     ----------
     fd_dataset : array_like
         The measured S-parameters in the frequency domain for each
         sample in the dataset
+    logger :
+        Logger for logging the progress
+    chunk_size : int
+        The number of samples converted at once
+    out : array_like
+        Array of the same shape as fd_dataset into which the converted
+        samples are written, if None, an array is made in memory
 
     Returns
     -------
     idft_dataset : array_like
         The time-domain representation of the data for each sample in
-        the dataset, obtained via the IDFT
+        the dataset, obtained via the IDFT (out, if out was not None)
     """
 
-    idft_dataset = np.zeros_like(fd_dataset)  # Init array to return
+    assert chunk_size >= 1, 'Error: chunk_size must be at least 1'
+
+    n_expts = fd_dataset.shape[0]
+
+    if out is None:  # If no output array, init array to return
+        idft_dataset = np.zeros(np.shape(fd_dataset), dtype=fd_dataset.dtype)
+
+    else:  # If writing into an output array
 
-    # For each sample in the dataset
-    for expt_idx in range(fd_dataset.shape[0]):
+        assert np.shape(out) == np.shape(fd_dataset), \
+            'Error: out has shape %s, must be %s' \
+            % (np.shape(out), np.shape(fd_dataset))
 
-        print('\t\tWorking on expt [%4d / %4d]' % (expt_idx + 1,
-                                                   fd_dataset.shape[0]))
+        idft_dataset = out
+
+    progress = ProgressReporter(logger, n_total=n_expts,
+                                desc='\t\tIDFT of expts')
+
+    # For each chunk of samples in the dataset
+    for start_idx in range(0, n_expts, chunk_size):
+
+        stop_idx = min(start_idx + chunk_size, n_expts)
 
         # Convert to the time-domain via the IDFT
-        idft_dataset[expt_idx, :, :] = np.fft.ifft(fd_dataset[expt_idx, :, :],
-                                                   axis=0)
+        idft_dataset[start_idx:stop_idx, :, :] = \
+            np.fft.ifft(fd_dataset[start_idx:stop_idx, :, :], axis=1)
+
+        progress.update(stop_idx - start_idx)
+
+    progress.close()
 
     return idft_dataset
 
 
+@profiled('transform')
 def convert_to_iczt_dataset(fd_dataset, num_time_pts=1024, start_time=0.0,
                             stop_time=6e-9, ini_freq=1e9, fin_freq=8e9,
-                            logger=null_logger):
+                            logger=null_logger, dtype=complex,
+                            chunk_size=16, out=None):
     """Convert the freq-domain data to the time-domain via the ICZT
 
     Converts each sample in the fd_dataset from the frequency-domain to
-    the time-domain via the ICZT
+    the time-domain via the ICZT. The samples are converted in chunks
+    of chunk_size, and each converted chunk is written into out, so
+    that if out is an on-disk array (ex: from CleanStore.create_array())
+    and fd_dataset is memory-mapped, the peak memory use is bounded by
+    the chunk_size rather than the size of the dataset.
 
     Parameters
     ----------
@@ -452,28 +562,57 @@ def convert_to_iczt_dataset(fd_dataset, num_time_pts=1024, start_time=0.0,
         The final frequency used in the scan, in Hz
     logger :
         Logger for logging the progress
+    dtype :
+        The complex dtype of the returned array, complex (complex128)
+        or np.complex64 (uses single-precision ICZT kernels)
+    chunk_size : int
+        The number of samples converted at once
+    out : array_like
+        Array of shape [n_samples, num_time_pts, n_ant_pos] into which
+        the converted samples are written, if None, an array is made
+        in memory
 
     Returns
     -------
     iczt_dataset : array_like
         The time-domain representation of the data for each sample in
-        the dataset, obtained via the ICZT
+        the dataset, obtained via the ICZT (out, if out was not None)
     """
 
-    # Init array to return
-    iczt_dataset = np.zeros([fd_dataset.shape[0], num_time_pts,
-                             fd_dataset.shape[2]], dtype=complex)
+    assert chunk_size >= 1, 'Error: chunk_size must be at least 1'
 
-    # For each sample in the datasets
-    for expt_idx in range(fd_dataset.shape[0]):
+    n_expts = fd_dataset.shape[0]
 
-        logger.info('\t\tWorking on expt [%4d / %4d]' %
-                    (expt_idx + 1, fd_dataset.shape[0]))
+    if out is None:  # If no output array, init array to return
+        iczt_dataset = np.zeros([n_expts, num_time_pts,
+                                 fd_dataset.shape[2]], dtype=dtype)
 
-        # Convert the sample to the time-domain via the ICZT
-        iczt_dataset[expt_idx, :, :] = iczt(fd_dataset[expt_idx, :, :],
-                                            start_time, stop_time,
-                                            num_time_pts, ini_freq, fin_freq)
+    else:  # If writing into an output array
+
+        assert np.shape(out) == (n_expts, num_time_pts,
+                                 fd_dataset.shape[2]), \
+            'Error: out has shape %s, must be %s' \
+            % (np.shape(out), (n_expts, num_time_pts, fd_dataset.shape[2]))
+
+        iczt_dataset = out
+
+    progress = ProgressReporter(logger, n_total=n_expts,
+                                desc='\t\tICZT of expts')
+
+    # For each chunk of samples in the dataset
+    for start_idx in range(0, n_expts, chunk_size):
+
+        stop_idx = min(start_idx + chunk_size, n_expts)
+
+        # Convert the chunk to the time-domain via the ICZT, and write
+        # it to the output array
+        iczt_dataset[start_idx:stop_idx, :, :] = \
+            iczt(fd_dataset[start_idx:stop_idx, :, :], start_time,
+                 stop_time, num_time_pts, ini_freq, fin_freq, dtype=dtype)
+
+        progress.update(stop_idx - start_idx)
+
+    progress.close()
 
     return iczt_dataset
 
@@ -508,13 +647,19 @@ def get_info_piece_list(metadata, info_str):
     return np.array(info_list)
 
 
-def import_metadata_df(gen='one'):
+def import_metadata_df(gen='one', data_dir=None, catalog=None):
     """Loads the metadata and returns as a pandas dataframe.
 
     Parameters
     ----------
     gen : str
         The generation of data, must be in ['one', 'two']
+    data_dir : str
+        The dataset root directory (or archive of it), if None, uses
+        umbmid.get_data_dir()
+    catalog : dict
+        The catalog of the dataset from
+        umbmid.catalog.load_catalog(), if None, it is loaded
 
     Returns
     -------
@@ -526,7 +671,11 @@ def import_metadata_df(gen='one'):
         "Error: gen must be in ['one', 'two']"
 
     # Load the metadata as a list of dicts
-    metadata = import_metadata(gen=gen)
+    metadata = import_metadata(gen=gen, data_dir=data_dir, catalog=catalog)
+
+    # Import pandas here, as it is slow to import and is only needed
+    # for the dataframe
+    import pandas as pd
 
     metadata_df = pd.DataFrame()  # Init dataframe to return
 
@@ -0,0 +1,724 @@
+"""
+Tyson Reimer
+University of Manitoba
+October 19th, 2026
+"""
+
+import os
+import io
+import json
+import shutil
+import sqlite3
+import hashlib
+import numpy as np
+
+from umbmid import null_logger, get_data_dir
+from umbmid.datasource import (get_data_source, DirSource, ArchiveSource,
+                               CleanStore)
+from umbmid.profiling import profile_stage
+
+###############################################################################
+
+# This dict maps the headers for each info-piece contained in the
+# metadata files to the corresponding Python datatype
+dtypes_dict = {
+                'n_expt': int,
+                'id': int,
+                'phant_id': str,
+                'tum_rad': float,
+                'tum_shape': str,
+                'tum_x': float,
+                'tum_y': float,
+                'tum_z': float,
+                'birads': int,
+                'adi_vol': float,
+                'fib_vol': float,
+                'adi_ref_id': int,
+                'emp_ref_id': int,
+                'date': str,
+                'n_session': int,
+                'ant_rad': float,
+                'ant_z': float,
+                'fib_ang': float,
+                'adi_x': float,
+                'adi_y': float,
+                'fib_ref_id': int,
+                'fib_x': float,
+                'fib_y': float,
+                'tum_in_fib': int,
+                'tum_diam': float,
+            }
+
+# The file-name string of each type of sparam
+sparam_strs = {
+    's11': 'Mono',
+    's21': 'Multi',
+}
+
+# The name of the catalog index file in the dataset root, and the
+# version of its format
+__INDEX_FNAME = 'umbmid-index.sqlite'
+__INDEX_VERSION = 2
+
+###############################################################################
+
+
+def _get_raw_dir(data_src, gen):
+    """Returns the path to the raw data dir within a data source
+
+    Parameters
+    ----------
+    data_src : DirSource or ArchiveSource
+        The data source of the dataset
+    gen : str
+        The generation of data
+
+    Returns
+    -------
+    raw_dir : str
+        The path to the raw data dir, relative to the root of the data
+        source, ending with '/' (or the empty str, if the root itself)
+    """
+
+    raw_dir = 'gen-%s/raw/' % gen
+
+    # If an archive of only the session folders was used, then the
+    # root of the archive is the raw data dir
+    if isinstance(data_src, ArchiveSource) and not data_src.isdir(raw_dir):
+        raw_dir = ''
+
+    return raw_dir
+
+
+def _import_session_mds(data_src, raw_dir):
+    """Load the -metadata.csv file of each session as an array of str's
+
+    Parameters
+    ----------
+    data_src : DirSource or ArchiveSource
+        The data source of the dataset
+    raw_dir : str
+        The path to the raw data dir, relative to the root of the data
+        source
+
+    Returns
+    -------
+    session_mds : dict
+        The array of str's from the -metadata.csv file of each
+        experimental session, in sorted session order
+    """
+
+    # Find the experimental sessions in the dataset
+    expt_sessions = [ss for ss in data_src.listdir(raw_dir)
+                     if data_src.isdir(raw_dir + ss)]
+
+    # Get the path to the -metadata.csv file for each expt_session
+    md_paths = ['%s%s/%s-metadata.csv' % (raw_dir, ss, ss)
+                for ss in expt_sessions]
+
+    # Read the -metadata.csv files in the order most efficient for
+    # the data source (ex: the order of the members of an archive)
+    with profile_stage('metadata') as stage:
+
+        raw_mds = dict(data_src.read_many(md_paths))
+
+        session_mds = dict()  # Init dict to return
+
+        for expt_session, md_path in zip(expt_sessions, md_paths):
+
+            stage.add_bytes_read(len(raw_mds[md_path]))
+
+            # Load the -metadata.csv file for this expt_session
+            session_mds[expt_session] = np.genfromtxt(
+                io.StringIO(raw_mds[md_path].decode('utf-8')),
+                delimiter=',', dtype=str)
+
+    return session_mds
+
+
+def parse_session_md(session_metadata, metadata_path=''):
+    """Convert the str's of a -metadata.csv file to metadata dicts
+
+    Parameters
+    ----------
+    session_metadata : array_like
+        The array of str's from the -metadata.csv file of an
+        experimental session, with the metadata keys in the first row
+    metadata_path : str
+        The path to the -metadata.csv file, used in error messages
+
+    Returns
+    -------
+    metadata : list
+        List of the metadata dict for each expt in the session
+    """
+
+    metadata = []  # Init list to return
+
+    # Get the keys for the metadata
+    metadata_keys = session_metadata[0, :]
+
+    for md_key in metadata_keys:
+
+        # Assert the metadata str is valid
+        assert md_key in dtypes_dict.keys(), \
+            "Error: invalid metadata str %s in file %s" % (
+                md_key, metadata_path
+            )
+
+    # For each individual scan within this expt_session
+    for expt in range(1, np.size(session_metadata, axis=0)):
+
+        # Get the metadata values (as str's) for this expt
+        expt_metadata = session_metadata[expt, :]
+
+        expt_metadata_dict = dict()  # Init dict for this expt
+
+        # Create counter for the different pieces of metadata
+        # info
+        info_counter = 0
+
+        # For each info piece in the metadata
+        for info_piece in metadata_keys:
+
+            # If the value for this info piece is NOT missing
+            if not expt_metadata[info_counter] == '':
+
+                # Store the value as its proper dtype
+                expt_metadata_dict[info_piece] = \
+                    dtypes_dict[info_piece](
+                        expt_metadata[info_counter])
+
+            else:  # If the value for this info piece IS missing
+
+                assert info_piece in dtypes_dict.keys(), \
+                        '%s not valid info-piece, in file: %s' \
+                        % (info_piece, metadata_path)
+
+                # If the dtype for this info piece is an int
+                # or float, store as NaN
+                if (dtypes_dict[info_piece] == int or
+                        dtypes_dict[info_piece] == float):
+
+                    expt_metadata_dict[info_piece] = np.NaN
+
+                # If the dtype for this info piece is a str,
+                # store as empty str
+                else:
+                    expt_metadata_dict[info_piece] = ''
+
+            info_counter += 1  # Increase the info counter
+
+        # Append the metadata dict for this expt to the list
+        metadata.append(expt_metadata_dict)
+
+    return metadata
+
+
+def scan_raw_dataset(gen='one', data_dir=None, logger=null_logger):
+    """Scan the raw dataset once, making a catalog of its experiments
+
+    Walks the raw data dir once, loading the -metadata.csv file of
+    each session and matching each Mono/Multi .txt file to the expt
+    it was measured in. The expts in the catalog are ordered by
+    session name, then by expt number, so that the order is the
+    same on every filesystem and for every data source.
+
+    Parameters
+    ----------
+    gen : str
+        The generation of data, must be in ['one', 'two', 'three']
+    data_dir : str
+        The dataset root directory (or archive of it), if None, uses
+        umbmid.get_data_dir()
+    logger :
+        Logger for logging progress
+
+    Returns
+    -------
+    catalog : dict
+        The catalog of the dataset, with the keys 'gen', 'data_dir',
+        and 'expts', the list of the record of each expt. Each record
+        is a dict with the keys 'session', 'n_expt', 'md' (the
+        metadata dict), 'paths' (the path of the .txt file of each
+        sparam, relative to the dataset root) and 'ccw' (True for each
+        sparam if the scan was performed counterclockwise)
+    """
+
+    assert gen in ['one', 'two', 'three'], \
+        "Error: gen must be in ['one', 'two', 'three']"
+
+    if data_dir is None:  # If no root specified, use the configured
+        data_dir = get_data_dir()
+
+    data_src = get_data_source(data_dir)  # Get the data source
+
+    assert not isinstance(data_src, CleanStore), \
+        'Error: %s is a clean store, not a raw dataset' % data_dir
+
+    raw_dir = _get_raw_dir(data_src, gen)
+
+    # Load the -metadata.csv file of each experimental session
+    session_mds = _import_session_mds(data_src, raw_dir)
+
+    expts = []  # Init list for the record of each expt
+
+    for expt_session in sorted(session_mds.keys()):  # For each session
+
+        logger.debug('Scanning:\t%s...', expt_session)
+
+        # Get the path to the -metadata.csv file for this expt_session
+        metadata_path = '%s%s/%s-metadata.csv' % (raw_dir, expt_session,
+                                                  expt_session)
+
+        # Make the record of each expt in the -metadata.csv file,
+        # with the expts identified by the str 'expt01', 'expt02', etc.
+        session_expts = dict()
+        for expt_md in parse_session_md(session_mds[expt_session],
+                                        metadata_path=metadata_path):
+            expt_str = ('expt%2d' % expt_md['n_expt']).replace(' ', '0')
+            session_expts[expt_str] = {
+                'session': expt_session,
+                'n_expt': expt_md['n_expt'],
+                'md': expt_md,
+                'paths': dict(),
+                'ccw': dict(),
+            }
+
+        # For each potential experiment (file in the session folder)
+        for expt in data_src.listdir(raw_dir + expt_session):
+
+            # Skip the -metadata.csv file
+            if '-metadata.csv' in expt:
+                continue
+
+            # Find the type of sparam in this file, if any
+            file_sparams = [sparams for sparams in sparam_strs.keys()
+                            if sparam_strs[sparams] in expt]
+
+            if len(file_sparams) != 1:  # If not a data file, skip it
+                continue
+
+            sparams = file_sparams[0]
+
+            # Find the expt name from the .txt file name
+            expt_name = expt.split('_')[1].lower()
+
+            # Assert that the expt_name matches one of the expts
+            # described in the -metadata.csv file
+            assert expt_name in session_expts, \
+                'Error: file %s not expected experiment for ' \
+                'session %s' % (expt, expt_session)
+
+            assert sparams not in session_expts[expt_name]['paths'], \
+                'Error: multiple %s files for %s in session %s' \
+                % (sparams, expt_name, expt_session)
+
+            session_expts[expt_name]['paths'][sparams] = \
+                '%s%s/%s' % (raw_dir, expt_session, expt)
+
+            # If the scan was performed counterclockwise, it
+            # has the identifier string '(foC'
+            session_expts[expt_name]['ccw'][sparams] = \
+                '(foC' in expt.split('_')
+
+        # Store the records of this session, ordered by expt number
+        expts += sorted(session_expts.values(),
+                        key=lambda rec: rec['n_expt'])
+
+    catalog = {
+        'gen': gen,
+        'data_dir': data_dir,
+        'expts': expts,
+    }
+
+    return catalog
+
+
+###############################################################################
+
+
+def _get_index_path(data_dir):
+    """Returns the path to the catalog index file of a dataset root"""
+    return os.path.join(data_dir, __INDEX_FNAME)
+
+
+def _get_dir_mtimes(data_src, gen, sessions):
+    """Returns the mtime of the raw data dir and of each session dir
+
+    Parameters
+    ----------
+    data_src : DirSource
+        The data source of the dataset
+    gen : str
+        The generation of data
+    sessions : list
+        The names of the session dirs
+
+    Returns
+    -------
+    dir_mtimes : dict
+        The mtime (in ns) of each dir, with the paths relative to the
+        dataset root as keys, or None if the raw data dir is missing
+    """
+
+    raw_dir = _get_raw_dir(data_src, gen)
+
+    dir_mtimes = dict()  # Init dict to return
+
+    try:
+        for rel_path in [raw_dir] + [raw_dir + ss for ss in sessions]:
+            dir_mtimes[rel_path.strip('/')] = \
+                os.stat(os.path.join(data_src.root, rel_path)).st_mtime_ns
+
+    except OSError:  # If any dir was removed, the index is stale
+        dir_mtimes = None
+
+    return dir_mtimes
+
+
+def _get_md_paths(data_src, gen, sessions):
+    """Returns the path to the -metadata.csv file of each session"""
+
+    raw_dir = _get_raw_dir(data_src, gen)
+
+    return ['%s%s/%s-metadata.csv' % (raw_dir, ss, ss) for ss in sessions]
+
+
+def _get_file_stats(data_dir, rel_paths):
+    """Returns the (size, mtime_ns) of each file, or None if missing
+
+    Parameters
+    ----------
+    data_dir : str
+        The dataset root directory
+    rel_paths : list
+        The paths of the files, relative to the dataset root
+
+    Returns
+    -------
+    file_stats : dict
+        The (size, mtime_ns) of each file, with the relative paths as
+        keys, or None if any file is missing
+    """
+
+    file_stats = dict()  # Init dict to return
+
+    try:
+        for rel_path in rel_paths:
+            file_stat = os.stat(os.path.join(data_dir, rel_path))
+            file_stats[rel_path] = (file_stat.st_size, file_stat.st_mtime_ns)
+
+    except OSError:  # If any file was removed, the index is stale
+        file_stats = None
+
+    return file_stats
+
+
+def _hash_file(path):
+    """Returns the hex digest of the contents of the file at path"""
+
+    file_hash = hashlib.blake2b(digest_size=16)
+
+    with open(path, 'rb') as handle:
+        for chunk in iter(lambda: handle.read(1024 * 1024), b''):
+            file_hash.update(chunk)
+
+    return file_hash.hexdigest()
+
+
+def save_catalog_index(catalog, index_path=None, hash_files=False):
+    """Save a catalog to the persistent index file of its dataset root
+
+    The index is a SQLite file that records, for each expt: the
+    session, expt number, the path/rotation direction/size/mtime
+    (and optionally the content hash) of each Mono/Multi file, and the
+    metadata. The mtime of the raw data dir and each session dir, and
+    the size/mtime of each -metadata.csv file, are also recorded, so
+    that a stale index can be detected without walking the dataset or
+    parsing the metadata. The index is written to a temporary file and
+    then moved into place, so that concurrent readers never see a
+    partial index.
+
+    Parameters
+    ----------
+    catalog : dict
+        The catalog from scan_raw_dataset(), of a dataset stored in a
+        directory
+    index_path : str
+        The path to the index file, if None, uses the index file in
+        the dataset root
+    hash_files : bool
+        If True, the content hash of each file is also computed and
+        stored (reads every file once more); otherwise, the files are
+        fingerprinted by their size and mtime only
+    """
+
+    data_src = get_data_source(catalog['data_dir'])
+
+    assert isinstance(data_src, DirSource), \
+        'Error: catalog indexes are only supported for dataset dirs'
+
+    if index_path is None:
+        index_path = _get_index_path(catalog['data_dir'])
+
+    gen = catalog['gen']
+
+    # Write to a temporary file, starting from the existing index so
+    # that the other generations of data are kept
+    tmp_path = '%s.%d.tmp' % (index_path, os.getpid())
+    if os.path.isfile(index_path):
+        shutil.copyfile(index_path, tmp_path)
+
+    conn = sqlite3.connect(tmp_path)
+
+    try:
+
+        # If the existing index is of a different version, restart it
+        version = conn.execute('PRAGMA user_version').fetchone()[0]
+        if version != __INDEX_VERSION:
+            for table in ['dirs', 'md_files', 'expts', 'files']:
+                conn.execute('DROP TABLE IF EXISTS %s' % table)
+            conn.execute('PRAGMA user_version = %d' % __INDEX_VERSION)
+
+        conn.execute('CREATE TABLE IF NOT EXISTS dirs '
+                     '(gen TEXT, path TEXT, mtime_ns INTEGER)')
+        conn.execute('CREATE TABLE IF NOT EXISTS md_files '
+                     '(gen TEXT, path TEXT, size INTEGER, mtime_ns INTEGER)')
+        conn.execute('CREATE TABLE IF NOT EXISTS expts '
+                     '(gen TEXT, idx INTEGER, session TEXT, n_expt INTEGER, '
+                     'md TEXT)')
+        conn.execute('CREATE TABLE IF NOT EXISTS files '
+                     '(gen TEXT, idx INTEGER, sparams TEXT, path TEXT, '
+                     'ccw INTEGER, size INTEGER, mtime_ns INTEGER, '
+                     'hash TEXT)')
+
+        # Remove the previous records of this generation of data
+        for table in ['dirs', 'md_files', 'expts', 'files']:
+            conn.execute('DELETE FROM %s WHERE gen = ?' % table, (gen,))
+
+        # Record the mtime of the raw data dir and each session dir
+        sessions = sorted(set(expt['session'] for expt in catalog['expts']))
+        dir_mtimes = _get_dir_mtimes(data_src, gen, sessions)
+        conn.executemany('INSERT INTO dirs VALUES (?, ?, ?)',
+                         [(gen, kk, vv) for kk, vv in dir_mtimes.items()])
+
+        # Record the size and mtime of each -metadata.csv file, as the
+        # metadata is read from the index instead of from these files
+        md_stats = _get_file_stats(data_src.root,
+                                   _get_md_paths(data_src, gen, sessions))
+        conn.executemany('INSERT INTO md_files VALUES (?, ?, ?, ?)',
+                         [(gen, kk, vv[0], vv[1])
+                          for kk, vv in md_stats.items()])
+
+        for idx, expt in enumerate(catalog['expts']):  # For each expt
+
+            # Store the metadata as JSON, which keeps ints/floats/NaNs
+            conn.execute('INSERT INTO expts VALUES (?, ?, ?, ?, ?)',
+                         (gen, idx, expt['session'], expt['n_expt'],
+                          json.dumps(expt['md'])))
+
+            for sparams, rel_path in expt['paths'].items():
+
+                full_path = os.path.join(data_src.root, rel_path)
+                file_stat = os.stat(full_path)
+
+                conn.execute('INSERT INTO files VALUES '
+                             '(?, ?, ?, ?, ?, ?, ?, ?)',
+                             (gen, idx, sparams, rel_path,
+                              int(expt['ccw'][sparams]), file_stat.st_size,
+                              file_stat.st_mtime_ns,
+                              _hash_file(full_path) if hash_files else ''))
+
+        conn.commit()
+
+    finally:
+        conn.close()
+
+    os.replace(tmp_path, index_path)  # Move the index into place
+
+
+def read_catalog_index(gen='one', data_dir=None, index_path=None,
+                       check_files=True):
+    """Read a catalog from the persistent index file of a dataset root
+
+    Parameters
+    ----------
+    gen : str
+        The generation of data, must be in ['one', 'two', 'three']
+    data_dir : str
+        The dataset root directory, if None, uses
+        umbmid.get_data_dir()
+    index_path : str
+        The path to the index file, if None, uses the index file in
+        the dataset root
+    check_files : bool
+        If True, the size and mtime of every Mono/Multi file are also
+        checked against the index, which detects files modified in
+        place. The -metadata.csv files are always checked
+
+    Returns
+    -------
+    catalog : dict
+        The catalog of the dataset (see scan_raw_dataset()), with the
+        additional 'sizes', 'mtimes' and 'hashes' of each file in each
+        record, or None if there is no up-to-date index
+    """
+
+    if data_dir is None:  # If no root specified, use the configured
+        data_dir = get_data_dir()
+
+    if index_path is None:
+        index_path = _get_index_path(data_dir)
+
+    if not os.path.isfile(index_path):  # If there is no index
+        return None
+
+    data_src = get_data_source(data_dir)
+
+    conn = sqlite3.connect('file:%s?mode=ro' % index_path, uri=True)
+
+    try:
+
+        if (conn.execute('PRAGMA user_version').fetchone()[0]
+                != __INDEX_VERSION):
+            return None
+
+        index_mtimes = dict(conn.execute('SELECT path, mtime_ns FROM dirs '
+                                         'WHERE gen = ?', (gen,)))
+        md_stats = {path: (size, mtime_ns) for path, size, mtime_ns
+                    in conn.execute('SELECT path, size, mtime_ns FROM '
+                                    'md_files WHERE gen = ?', (gen,))}
+        expt_rows = conn.execute('SELECT idx, session, n_expt, md '
+                                 'FROM expts WHERE gen = ? ORDER BY idx',
+                                 (gen,)).fetchall()
+        file_rows = conn.execute('SELECT idx, sparams, path, ccw, size, '
+                                 'mtime_ns, hash FROM files WHERE gen = ?',
+                                 (gen,)).fetchall()
+
+    except sqlite3.Error:  # If the index is unreadable, treat as stale
+        return None
+
+    finally:
+        conn.close()
+
+    if len(index_mtimes) == 0:  # If this gen is not in the index
+        return None
+
+    # Check that no session was added/removed/changed, by comparing the
+    # mtimes of the dirs, rather than walking the dataset
+    sessions = sorted(set(row[1] for row in expt_rows))
+    if _get_dir_mtimes(data_src, gen, sessions) != index_mtimes:
+        return None
+
+    # Check that no -metadata.csv file was modified in place, as the
+    # metadata of the index would then be stale
+    if _get_file_stats(data_dir, md_stats.keys()) != md_stats:
+        return None
+
+    expts = []  # Init list for the record of each expt
+
+    for _, session, n_expt, md in expt_rows:
+        expts.append({
+            'session': session,
+            'n_expt': n_expt,
+            'md': json.loads(md),
+            'paths': dict(),
+            'ccw': dict(),
+            'sizes': dict(),
+            'mtimes': dict(),
+            'hashes': dict(),
+        })
+
+    for idx, sparams, path, ccw, size, mtime_ns, file_hash in file_rows:
+
+        if check_files:  # If checking each file against the index
+
+            try:
+                file_stat = os.stat(os.path.join(data_dir, path))
+            except OSError:
+                return None
+
+            if (file_stat.st_size, file_stat.st_mtime_ns) != (size,
+                                                               mtime_ns):
+                return None
+
+        expts[idx]['paths'][sparams] = path
+        expts[idx]['ccw'][sparams] = bool(ccw)
+        expts[idx]['sizes'][sparams] = size
+        expts[idx]['mtimes'][sparams] = mtime_ns
+        expts[idx]['hashes'][sparams] = file_hash
+
+    catalog = {
+        'gen': gen,
+        'data_dir': data_dir,
+        'expts': expts,
+    }
+
+    return catalog
+
+
+def load_catalog(gen='one', data_dir=None, use_index=True, hash_files=False,
+                 check_files=True, logger=null_logger):
+    """Load the catalog of a raw dataset, using its index if up-to-date
+
+    On a warm start, the catalog is read from the persistent index
+    file in the dataset root, skipping the walk of the dataset and the
+    parsing of the -metadata.csv files. If the index is missing or
+    stale, the dataset is scanned and the index is (re)written. Only
+    datasets stored in a directory are indexed; archives are always
+    scanned.
+
+    Parameters
+    ----------
+    gen : str
+        The generation of data, must be in ['one', 'two', 'three']
+    data_dir : str
+        The dataset root directory (or archive of it), if None, uses
+        umbmid.get_data_dir()
+    use_index : bool
+        If False, the dataset is always scanned and the index is not
+        used
+    hash_files : bool
+        If True, the content hash of each file is also stored when the
+        index is (re)written (reads every file an extra time)
+    check_files : bool
+        If True, the size and mtime of every Mono/Multi file are
+        checked against the index on a warm start (see
+        read_catalog_index())
+    logger :
+        Logger for logging progress
+
+    Returns
+    -------
+    catalog : dict
+        The catalog of the dataset (see scan_raw_dataset())
+    """
+
+    if data_dir is None:  # If no root specified, use the configured
+        data_dir = get_data_dir()
+
+    # If not indexing, or if the dataset is not in a directory
+    if not use_index or not isinstance(get_data_source(data_dir),
+                                       DirSource):
+        return scan_raw_dataset(gen=gen, data_dir=data_dir, logger=logger)
+
+    catalog = read_catalog_index(gen=gen, data_dir=data_dir,
+                                 check_files=check_files)
+
+    if catalog is None:  # If the index is missing or stale
+
+        logger.info('No up-to-date catalog index, scanning gen-%s...', gen)
+
+        catalog = scan_raw_dataset(gen=gen, data_dir=data_dir, logger=logger)
+
+        try:  # Try to write the index, the root may be read-only
+            save_catalog_index(catalog, hash_files=hash_files)
+
+        except (OSError, sqlite3.Error) as err:
+            logger.warning('Could not write catalog index: %s', err)
+
+    else:
+        logger.info('Loaded gen-%s catalog from index.', gen)
+
+    return catalog
@@ -11,6 +11,14 @@ from umbmid.build import get_info_piece_list
 
 ###############################################################################
 
+# The factors of the cohort summaries, by default
+cohort_factors = ('label', 'birads', 'tum_rad', 'adi_id', 'n_session')
+
+# The name of each BI-RADS class, for reporting
+__BIRADS_NAMES = {1: 'I', 2: 'II', 3: 'III', 4: 'IV'}
+
+###############################################################################
+
 
 def get_class_labels(metadata):
     """Get binary (tumor vs no-tumor) class labels for each sample
@@ -31,25 +39,15 @@ def get_class_labels(metadata):
         The binary labels (0 or 1) of the classes for each sample
     """
 
-    labels = []  # Init array to return
-
-    for sample_idx in range(len(metadata)):  # For each sample
-
-        # If the tumor size was a number (indicating a tumor was
-        # contained in the scan)
-        if not np.isnan(metadata[sample_idx]['tum_rad']):
-
-            # Assign a label of one to indicate the positive class
-            labels.append(1)
+    # Get the tumor size of each sample, np.NaN if no tumor
+    tum_sizes = get_info_piece_list(metadata, 'tum_rad').astype(float)
 
-        # If the tumor size was np.NaN (indicating that no tumor was
-        # contained in the scan)
-        else:
+    # The label is one (positive class) if the tumor size was a number
+    # (indicating a tumor was contained in the scan), and zero
+    # (negative class) if the tumor size was np.NaN
+    labels = np.logical_not(np.isnan(tum_sizes)).astype(int)
 
-            # Assign a label of zero to indicate the negative class
-            labels.append(0)
-
-    return np.array(labels)
+    return labels
 
 
 def get_adipose_shell_ids(metadata):
@@ -78,150 +76,312 @@ def get_adipose_shell_ids(metadata):
     return np.array(adipose_ids)
 
 
-def report_metadata_content(metadata, logger=null_logger):
-    """Report major metadata info to a logger
+def get_cohort_columns(metadata, factors=cohort_factors):
+    """Return the value of each factor for each sample, as columns
 
-    Reports the BI-RADS class, tumor size, and adipose-id
-    distributions for all samples whose metadata is in the metadata
-    list, and for only positive samples, and only negative samples.
+    The factors are the info pieces of the metadata (ex: 'birads',
+    'tum_rad', 'n_session'), the class 'label' (see get_class_labels())
+    and the adipose shell ID 'adi_id' (see get_adipose_shell_ids()).
 
     Parameters
     ----------
     metadata : list
         List containing the metadata dict for each sample
-    logger : logging_object
-        A logging object
+    factors : list
+        The factors of interest
+
+    Returns
+    -------
+    columns : dict
+        The array of the values of each factor for each sample
     """
 
-    num_samples = len(metadata)  # Find the total number of samples
+    columns = dict()
 
-    # Get the BIRADS classes, tumor sizes, adipose shell IDs, and class
-    # labels
-    birads = get_info_piece_list(metadata, 'birads')
-    tum_sizes = get_info_piece_list(metadata, 'tum_rad')
-    adipose_ids = get_adipose_shell_ids(metadata)
-    labels = get_class_labels(metadata)
+    for factor in factors:  # For each factor
 
-    # Get the number of positive and negative samples
-    num_pos, num_neg = int(np.sum(labels)), int(np.sum(1 - labels))
+        if factor == 'label':
+            columns[factor] = get_class_labels(metadata)
 
-    num_c1, num_c2, num_c3, num_c4 = (int(np.sum(birads == 1)),
-                                      int(np.sum(birads == 2)),
-                                      int(np.sum(birads == 3)),
-                                      int(np.sum(birads == 4)))
+        elif factor == 'adi_id':
+            columns[factor] = get_adipose_shell_ids(metadata)
 
-    # Init dict for storing the adipose shell IDs
-    adi_shell_nums = dict()
+        else:  # If an info piece of the metadata
+            columns[factor] = get_info_piece_list(metadata, factor)
 
-    # For each unique adi shell ID
-    for adi_shell in np.unique(adipose_ids):
+    return columns
 
-        # Find how many samples had this adi_shell ID
-        adi_shell_nums[adi_shell] = int(np.sum(adipose_ids == adi_shell))
 
-    tum_size_nums = dict()  # Init dict for storing the tumor sizes
+def _count_groups(columns, weights=None):
+    """Count the samples with each unique combination of column values
 
-    for tum_size in np.unique(tum_sizes):  # For each unique tumor size
+    All the columns are grouped in a single pass: the values of each
+    column are coded by their index in the unique values of the column
+    (with all NaNs as one value), the codes of each sample are combined
+    into a single index, and the samples with each unique index are
+    counted.
 
-        # If this unique 'tumor size' is a num
-        if not np.isnan(tum_size):
+    Parameters
+    ----------
+    columns : list
+        The arrays of the values of each sample, of equal length
+    weights : array_like
+        The weight of each sample in the counts, if None, uses 1
 
-            # Find how many samples had this tumor size
-            tum_size_nums['%d cm' % tum_size] = int(np.sum(tum_sizes ==
-                                                           tum_size))
+    Returns
+    -------
+    group_vals : list
+        The arrays of the values of each column for each group
+    counts : array_like
+        The number of samples (or sum of weights) of each group
+    """
 
-    # Print the overall metadata of interest to the console
-    logger.info('')
-    logger.info('\tOverall positive samples:\t%d\t|\t%.2f%%' %
-                (num_pos, 100 * num_pos / num_samples))
-    logger.info('\tOverall negative samples:\t%d\t|\t%.2f%%' %
-                (num_neg, 100 * num_neg / num_samples))
-    logger.info('')
+    # Find the unique values of each column, and the index of the
+    # value of each sample in them
+    uniques, codes = zip(*[np.unique(column, return_inverse=True)
+                           for column in columns])
+    num_uniques = [len(unique_vals) for unique_vals in uniques]
 
-    logger.info('\tOverall Class I samples:\t%d\t|\t%.2f%%' %
-                (num_c1, 100 * num_c1 / num_samples))
-    logger.info('\tOverall Class II samples:\t%d\t|\t%.2f%%' %
-                (num_c2, 100 * num_c2 / num_samples))
-    logger.info('\tOverall Class III samples:\t%d\t|\t%.2f%%' %
-                (num_c3, 100 * num_c3 / num_samples))
-    logger.info('\tOverall Class IV samples:\t%d\t|\t%.2f%%' %
-                (num_c4, 100 * num_c4 / num_samples))
+    # Combine the codes of each sample into the index of its group in
+    # the full contingency table of all the columns
+    cell_idxs = np.ravel_multi_index([np.ravel(code) for code in codes],
+                                     num_uniques)
 
-    logger.info('')
+    # Count the samples in each (non-empty) group
+    cells, cell_codes = np.unique(cell_idxs, return_inverse=True)
+    counts = np.bincount(np.ravel(cell_codes), weights=weights,
+                         minlength=len(cells))
 
-    for tum_size in tum_size_nums.keys():
-        logger.info('\tOverall %s tumors:\t%d\t|\t%.2f%%' %
-                    (tum_size, tum_size_nums[tum_size],
-                     100 * tum_size_nums[tum_size] / num_pos))
+    # Find the value of each column for each group
+    group_codes = np.unravel_index(cells, num_uniques)
+    group_vals = [unique_vals[code]
+                  for unique_vals, code in zip(uniques, group_codes)]
 
-    logger.info('')
-    for adi_shell in adi_shell_nums.keys():
-        logger.info('\tOverall %s samples:\t%d\t|\t%.2f%%' %
-                    (adi_shell, adi_shell_nums[adi_shell],
-                     100 * adi_shell_nums[adi_shell] / num_samples))
+    return group_vals, counts
 
-    # Find the BI-RADS classes for the positive samples
-    pos_c1s = int(np.sum(np.logical_and(birads == 1, labels == 1)))
-    pos_c2s = int(np.sum(np.logical_and(birads == 2, labels == 1)))
-    pos_c3s = int(np.sum(np.logical_and(birads == 3, labels == 1)))
-    pos_c4s = int(np.sum(np.logical_and(birads == 4, labels == 1)))
 
-    # Init dict for the positive adi_shell IDs
-    pos_adi_shell_nums = dict()
-    for adi_shell in np.unique(adipose_ids):
+def _make_table(factors, columns, counts):
+    """Make the structured array of the counts of each group"""
 
-        # Find the number of positive samples with this adi_shell ID
-        pos_adi_shell_nums[adi_shell] = \
-            int(np.sum(np.logical_and(adipose_ids == adi_shell, labels == 1)))
+    table = np.zeros(len(counts),
+                     dtype=[(factor, column.dtype)
+                            for factor, column in zip(factors, columns)]
+                     + [('count', int)])
 
-    logger.info('')
-    logger.info('\tFor positive samples...')
+    for factor, column in zip(factors, columns):
+        table[factor] = column
 
-    logger.info('')
-    logger.info('\t\tClass I samples:\t%d\t|\t%.2f%%' %
-                (pos_c1s, 100 * pos_c1s / num_pos))
-    logger.info('\t\tClass II samples:\t%d\t|\t%.2f%%' %
-                (pos_c2s, 100 * pos_c2s / num_pos))
-    logger.info('\t\tClass III samples:\t%d\t|\t%.2f%%' %
-                (pos_c3s, 100 * pos_c3s / num_pos))
-    logger.info('\t\tClass IV samples:\t%d\t|\t%.2f%%' %
-                (pos_c4s, 100 * pos_c4s / num_pos))
+    table['count'] = counts
 
-    logger.info('')
-    for adi_shell in pos_adi_shell_nums.keys():
-        logger.info('\t\tOverall %s samples:\t%d\t|\t%.2f%%' %
-                    (adi_shell, pos_adi_shell_nums[adi_shell],
-                     100 * pos_adi_shell_nums[adi_shell] / num_pos))
+    return table
+
+
+def summarize_cohort(metadata, factors=cohort_factors, expt_idxs=None):
+    """Count the samples in every group of the cohort factors
+
+    Cross-tabulates all of the factors (ex: class label x BI-RADS
+    class x tumor size x adipose shell x session) in a single grouped
+    pass, returning one row for each combination of factor values that
+    is present in the cohort. Any other cross-tabulation of the factors
+    can be found from this table with collapse_table().
+
+    Parameters
+    ----------
+    metadata : list or dict
+        List containing the metadata dict for each sample, or the
+        columns of the factors from get_cohort_columns()
+    factors : list
+        The factors of interest, see get_cohort_columns()
+    expt_idxs : array_like
+        The indices of the samples in the cohort (ex: the samples of
+        one fold), if None, uses all the samples
+
+    Returns
+    -------
+    table : array_like
+        Structured array with a field for each factor and a 'count'
+        field, the number of samples with those factor values
+    """
 
-    # Find the BI-RADS classes for the negative samples
-    neg_c2s = int(np.sum(np.logical_and(birads == 2, labels == 0)))
-    neg_c3s = int(np.sum(np.logical_and(birads == 3, labels == 0)))
-    neg_c1s = int(np.sum(np.logical_and(birads == 1, labels == 0)))
-    neg_c4s = int(np.sum(np.logical_and(birads == 4, labels == 0)))
+    if isinstance(metadata, dict):  # If the columns were given
+        columns = [np.asarray(metadata[factor]) for factor in factors]
+    else:
+        columns = list(get_cohort_columns(metadata, factors).values())
 
-    # Init dict for the negative adi_shell IDs
-    neg_adi_shell_nums = dict()
-    for adi_shell in np.unique(adipose_ids):
+    if expt_idxs is not None:  # Keep only the samples in the cohort
+        columns = [column[expt_idxs] for column in columns]
 
-        # Find the number of negative samples with this adi_shell ID
-        neg_adi_shell_nums[adi_shell] = \
-            int(np.sum(np.logical_and(adipose_ids == adi_shell, labels == 0)))
+    if len(columns[0]) == 0:  # If the cohort has no samples
+        return _make_table(factors, columns, np.zeros(0, dtype=int))
 
+    group_vals, counts = _count_groups(columns)
+
+    return _make_table(factors, group_vals, counts)
+
+
+def summarize_folds(metadata, fold_idxs, factors=cohort_factors):
+    """Summarize the cohort of each split or fold of a dataset
+
+    The factors of each sample are found once, and each fold is then
+    summarized with summarize_cohort().
+
+    Parameters
+    ----------
+    metadata : list
+        List containing the metadata dict for each sample
+    fold_idxs : list
+        The indices of the samples in each fold (ex: the train and test
+        indices of a split)
+    factors : list
+        The factors of interest, see get_cohort_columns()
+
+    Returns
+    -------
+    tables : list
+        The summarize_cohort() table of each fold
+    """
+
+    columns = get_cohort_columns(metadata, factors)
+
+    tables = [summarize_cohort(columns, factors=factors, expt_idxs=idxs)
+              for idxs in fold_idxs]
+
+    return tables
+
+
+def collapse_table(table, factors, **conditions):
+    """Sum the counts of a cohort table over all other factors
+
+    Parameters
+    ----------
+    table : array_like
+        The table from summarize_cohort()
+    factors : list or str
+        The factors to keep (ex: ['label', 'birads'])
+    conditions :
+        The value of factors the samples must have to be counted (ex:
+        label=1, to count only the positive samples)
+
+    Returns
+    -------
+    collapsed : array_like
+        Structured array with a field for each of the factors and a
+        'count' field, the number of samples with those factor values
+    """
+
+    if isinstance(factors, str):  # If only one factor
+        factors = [factors]
+
+    # Keep only the groups that satisfy the conditions
+    keep = np.ones(len(table), dtype=bool)
+    for factor, val in conditions.items():
+        keep &= table[factor] == val
+
+    table = table[keep]
+
+    columns = [table[factor] for factor in factors]
+
+    if len(table) == 0:  # If no groups satisfy the conditions
+        return _make_table(factors, columns, np.zeros(0, dtype=int))
+
+    group_vals, counts = _count_groups(columns, weights=table['count'])
+
+    return _make_table(factors, group_vals, counts.astype(int))
+
+
+def _get_count_dict(table, factor, **conditions):
+    """Return dict of the num of samples with each value of factor"""
+
+    collapsed = collapse_table(table, factor, **conditions)
+
+    return dict(zip(collapsed[factor].tolist(), collapsed['count'].tolist()))
+
+
+def _get_pct(num, num_total):
+    """Return num as a percentage of num_total, NaN if no total"""
+    return 100 * num / num_total if num_total > 0 else np.nan
+
+
+def report_metadata_content(metadata, logger=null_logger):
+    """Report major metadata info to a logger
+
+    Reports the BI-RADS class, tumor size, and adipose-id
+    distributions for all samples whose metadata is in the metadata
+    list, and for only positive samples, and only negative samples.
+
+    Parameters
+    ----------
+    metadata : list
+        List containing the metadata dict for each sample
+    logger : logging_object
+        A logging object
+
+    Returns
+    -------
+    table : array_like
+        The summarize_cohort() table of the samples
+    """
+
+    table = summarize_cohort(metadata)
+
+    num_samples = int(np.sum(table['count']))  # The total num of samples
+
+    # Get the number of positive and negative samples
+    label_nums = _get_count_dict(table, 'label')
+    num_pos, num_neg = label_nums.get(1, 0), label_nums.get(0, 0)
+
+    birads_nums = _get_count_dict(table, 'birads')
+    adi_shell_nums = _get_count_dict(table, 'adi_id')
+
+    # Find the num of samples with each tumor size, for tumors
+    tum_size_nums = _get_count_dict(table, 'tum_rad', label=1)
+
+    # Report the overall metadata of interest
+    logger.info('')
+    logger.info('\tOverall positive samples:\t%d\t|\t%.2f%%',
+                num_pos, _get_pct(num_pos, num_samples))
+    logger.info('\tOverall negative samples:\t%d\t|\t%.2f%%',
+                num_neg, _get_pct(num_neg, num_samples))
     logger.info('')
-    logger.info('\tFor negative samples...')
+
+    for birads, birads_name in __BIRADS_NAMES.items():
+        logger.info('\tOverall Class %s samples:\t%d\t|\t%.2f%%',
+                    birads_name, birads_nums.get(birads, 0),
+                    _get_pct(birads_nums.get(birads, 0), num_samples))
 
     logger.info('')
-    logger.info('\t\tClass I samples:\t%d\t|\t%.2f%%' %
-                (neg_c1s, 100 * neg_c1s / num_neg))
-    logger.info('\t\tClass II samples:\t%d\t|\t%.2f%%' %
-                (neg_c2s, 100 * neg_c2s / num_neg))
-    logger.info('\t\tClass III samples:\t%d\t|\t%.2f%%' %
-                (neg_c3s, 100 * neg_c3s / num_neg))
-    logger.info('\t\tClass IV samples:\t%d\t|\t%.2f%%' %
-                (neg_c4s, 100 * neg_c4s / num_neg))
+    for tum_size, num_tums in tum_size_nums.items():
+        logger.info('\tOverall %d cm tumors:\t%d\t|\t%.2f%%',
+                    tum_size, num_tums, _get_pct(num_tums, num_pos))
 
     logger.info('')
-    for adi_shell in neg_adi_shell_nums.keys():
-        logger.info('\t\tOverall %s samples:\t%d\t|\t%.2f%%' %
-                    (adi_shell, neg_adi_shell_nums[adi_shell],
-                     100 * neg_adi_shell_nums[adi_shell] / num_neg))
+    for adi_shell, num_adi in adi_shell_nums.items():
+        logger.info('\tOverall %s samples:\t%d\t|\t%.2f%%',
+                    adi_shell, num_adi, _get_pct(num_adi, num_samples))
+
+    # Report the BI-RADS classes and adipose shells of the positive,
+    # then the negative, samples
+    for label, label_str, num_label in [(1, 'positive', num_pos),
+                                        (0, 'negative', num_neg)]:
+
+        label_birads_nums = _get_count_dict(table, 'birads', label=label)
+        label_adi_nums = _get_count_dict(table, 'adi_id', label=label)
+
+        logger.info('')
+        logger.info('\tFor %s samples...', label_str)
+
+        logger.info('')
+        for birads, birads_name in __BIRADS_NAMES.items():
+            logger.info('\t\tClass %s samples:\t%d\t|\t%.2f%%',
+                        birads_name, label_birads_nums.get(birads, 0),
+                        _get_pct(label_birads_nums.get(birads, 0),
+                                 num_label))
+
+        logger.info('')
+        for adi_shell in adi_shell_nums.keys():
+            logger.info('\t\tOverall %s samples:\t%d\t|\t%.2f%%',
+                        adi_shell, label_adi_nums.get(adi_shell, 0),
+                        _get_pct(label_adi_nums.get(adi_shell, 0),
+                                 num_label))
+
+    return table
@@ -0,0 +1,692 @@
+"""
+Tyson Reimer
+University of Manitoba
+October 19th, 2026
+"""
+
+import os
+import zipfile
+import tarfile
+import posixpath
+import numpy as np
+
+from umbmid import get_data_dir, verify_path
+
+###############################################################################
+
+# The file extensions of the supported archive formats
+archive_exts = ('.zip', '.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tar.xz')
+
+# The data sources that have been made, so that their cached listings
+# are shared between calls
+__sources = dict()
+
+# The name of the marker file that identifies a CleanStore dir
+__STORE_MARKER = 'umbmid-clean-store'
+
+###############################################################################
+
+
+def is_archive(path):
+    """Returns True if the path is a supported archive file
+
+    Parameters
+    ----------
+    path : str
+        The path to investigate
+
+    Returns
+    -------
+    is_arch : bool
+        True if the path has one of the supported archive extensions
+    """
+
+    is_arch = str(path).lower().endswith(archive_exts)
+
+    return is_arch
+
+
+def _get_store_marker_path(root):
+    """Returns the path to the marker file of a CleanStore dir"""
+    return os.path.join(root, __STORE_MARKER)
+
+
+def is_clean_store(path):
+    """Returns True if the path is a CleanStore dir
+
+    A dir is a CleanStore if it has the marker file written by
+    CleanStore, or (for stores made before the marker) if it holds the
+    metadata columns or the appended parts of a CleanStore.
+
+    Parameters
+    ----------
+    path : str
+        The path to investigate
+
+    Returns
+    -------
+    is_store : bool
+        True if the path is a CleanStore dir
+    """
+
+    if not os.path.isdir(path):
+        return False
+
+    if os.path.isfile(_get_store_marker_path(path)):
+        return True
+
+    for ff in os.listdir(path):  # Look for metadata columns or parts
+
+        if ff.endswith('.md') and os.path.isfile(
+                os.path.join(path, ff, '_info_pieces.npy')):
+            return True
+
+        if ff.endswith('.parts') and os.path.isdir(os.path.join(path, ff)):
+            return True
+
+    return False
+
+
+def get_data_source(data_dir=None):
+    """Returns the data source for a dataset root
+
+    Data sources are cached, so that the directory listings resolved
+    by each source are reused between calls. A CleanStore dir (see
+    is_clean_store()) is returned as a CleanStore, which serves the
+    clean arrays and metadata rather than the raw files.
+
+    Parameters
+    ----------
+    data_dir : str
+        The dataset root directory, a .zip/.tar.gz archive of it, or a
+        CleanStore dir. If None, uses umbmid.get_data_dir()
+
+    Returns
+    -------
+    data_src : DirSource, ArchiveSource or CleanStore
+        The data source for the dataset root
+    """
+
+    if data_dir is None:  # If no root specified, use the configured
+        data_dir = get_data_dir()
+
+    data_dir = os.path.normpath(str(data_dir))
+
+    if data_dir not in __sources:  # If not yet made, make the source
+
+        if is_archive(data_dir):
+            __sources[data_dir] = ArchiveSource(data_dir)
+        elif is_clean_store(data_dir):
+            __sources[data_dir] = CleanStore(data_dir)
+        else:
+            __sources[data_dir] = DirSource(data_dir)
+
+    return __sources[data_dir]
+
+
+def clear_source_cache():
+    """Clears the cached data sources and their listings"""
+
+    __sources.clear()
+
+
+###############################################################################
+
+
+class DirSource:
+    """Data source for a dataset stored in a local/shared directory
+
+    All paths are relative to the root, use '/' as the separator, and
+    directory listings are cached after they are first resolved.
+    """
+
+    def __init__(self, root):
+        """Init class DirSource
+
+        Parameters
+        ----------
+        root : str
+            The path to the dataset root directory
+        """
+
+        self.root = root
+        self._listings = dict()  # Init dict for the cached listings
+
+    def _full_path(self, rel_path):
+        """Returns the full path of a path relative to the root"""
+        return os.path.join(self.root, *rel_path.strip('/').split('/'))
+
+    def listdir(self, rel_path=''):
+        """Returns the sorted names of the entries in a directory
+
+        Parameters
+        ----------
+        rel_path : str
+            The path of the directory, relative to the root
+
+        Returns
+        -------
+        names : list
+            The sorted names of the entries in the directory
+        """
+
+        rel_path = rel_path.strip('/')
+
+        if rel_path not in self._listings:  # If not yet cached
+            self._listings[rel_path] = \
+                sorted(os.listdir(self._full_path(rel_path)))
+
+        return self._listings[rel_path]
+
+    def isdir(self, rel_path):
+        """Returns True if the path is a directory"""
+        return os.path.isdir(self._full_path(rel_path))
+
+    def isfile(self, rel_path):
+        """Returns True if the path is a file"""
+        return os.path.isfile(self._full_path(rel_path))
+
+    def open(self, rel_path):
+        """Opens the file at the path for reading, in binary mode"""
+        return open(self._full_path(rel_path), 'rb')
+
+    def read(self, rel_path):
+        """Returns the bytes of the file at the path"""
+
+        with self.open(rel_path) as handle:
+            data = handle.read()
+
+        return data
+
+    def read_many(self, rel_paths):
+        """Yields the path and bytes of each file in rel_paths
+
+        Parameters
+        ----------
+        rel_paths : list
+            The paths of the files to read, relative to the root
+
+        Yields
+        ------
+        rel_path : str
+            The path of the file, relative to the root
+        data : bytes
+            The bytes of the file
+        """
+
+        for rel_path in rel_paths:
+            yield rel_path.strip('/'), self.read(rel_path)
+
+    def clear_cache(self):
+        """Clears the cached directory listings"""
+        self._listings.clear()
+
+
+class ArchiveSource:
+    """Data source for a dataset stored in a .zip or .tar(.gz) archive
+
+    Members are read directly from the archive without extracting to
+    disk. All paths are relative to the dataset root within the
+    archive, which is found automatically if the archive contains a
+    single top-level folder (ex: 'datasets/gen-one/raw/...').
+    """
+
+    def __init__(self, path):
+        """Init class ArchiveSource
+
+        Parameters
+        ----------
+        path : str
+            The path to the .zip or .tar(.gz) archive
+        """
+
+        assert is_archive(path), \
+            'Error: %s is not a supported archive %s' % (path, archive_exts)
+
+        self.path = path
+        self._archive = None  # The open archive, opened when needed
+        self._members = None  # Dict of the member of each file path
+        self._listings = None  # Dict of the entries in each dir
+
+    def _open_archive(self):
+        """Opens the archive and resolves the listings of its members"""
+
+        if self._archive is not None:  # If already open, do nothing
+            return
+
+        if self.path.lower().endswith('.zip'):
+            self._archive = zipfile.ZipFile(self.path, 'r')
+            members = [(info.filename, info, info.is_dir())
+                       for info in self._archive.infolist()]
+        else:
+            self._archive = tarfile.open(self.path, 'r:*')
+            members = [(info.name, info, info.isdir())
+                       for info in self._archive.getmembers()]
+
+        # Find the dataset root within the archive
+        paths = [posixpath.normpath(name.strip('/')).split('/')
+                 for name, _, _ in members]
+        # Find the depth of the gen-<gen>/ dirs in the archive, which
+        # are at the dataset root
+        gen_depths = [[ii for ii, part in enumerate(pp)
+                       if part.startswith('gen-')] for pp in paths]
+        gen_depths = [min(dd) for dd in gen_depths if len(dd) > 0]
+        n_strip = min(gen_depths) if len(gen_depths) > 0 else 0
+
+        # Only strip the leading dirs if all members share them
+        if len(set(tuple(pp[:n_strip]) for pp in paths)) > 1:
+            n_strip = 0
+
+        self._members = dict()
+        self._listings = {'': set()}
+
+        for path_parts, (_, info, is_dir) in zip(paths, members):
+
+            path_parts = path_parts[n_strip:]
+
+            # If the root itself, skip
+            if len(path_parts) == 0 or path_parts == ['.']:
+                continue
+
+            # Add each parent directory to the listings
+            for ii in range(len(path_parts)):
+                parent = '/'.join(path_parts[:ii])
+                self._listings.setdefault(parent, set()).add(path_parts[ii])
+
+            if is_dir:  # If a dir, make sure it has a listing
+                self._listings.setdefault('/'.join(path_parts), set())
+            else:  # If a file, store its member
+                self._members['/'.join(path_parts)] = info
+
+        # Store the listings as sorted lists
+        self._listings = {kk: sorted(vv) for kk, vv in self._listings.items()}
+
+    def listdir(self, rel_path=''):
+        """Returns the sorted names of the entries in a directory
+
+        Parameters
+        ----------
+        rel_path : str
+            The path of the directory, relative to the root
+
+        Returns
+        -------
+        names : list
+            The sorted names of the entries in the directory
+        """
+
+        self._open_archive()
+
+        rel_path = rel_path.strip('/')
+
+        assert rel_path in self._listings, \
+            'Error: no dir %s in archive %s' % (rel_path, self.path)
+
+        return self._listings[rel_path]
+
+    def isdir(self, rel_path):
+        """Returns True if the path is a directory"""
+        self._open_archive()
+        return rel_path.strip('/') in self._listings
+
+    def isfile(self, rel_path):
+        """Returns True if the path is a file"""
+        self._open_archive()
+        return rel_path.strip('/') in self._members
+
+    def open(self, rel_path):
+        """Opens the member at the path for reading, in binary mode"""
+
+        self._open_archive()
+
+        info = self._members[rel_path.strip('/')]
+
+        if isinstance(self._archive, zipfile.ZipFile):
+            handle = self._archive.open(info, 'r')
+        else:
+            handle = self._archive.extractfile(info)
+
+        return handle
+
+    def read(self, rel_path):
+        """Returns the bytes of the member at the path"""
+
+        with self.open(rel_path) as handle:
+            data = handle.read()
+
+        return data
+
+    def read_many(self, rel_paths):
+        """Yields the path and bytes of each member in rel_paths
+
+        The members are read in the order in which they are stored in
+        the archive, so that a compressed archive is streamed through
+        once, rather than being decompressed up to each member in turn.
+
+        Parameters
+        ----------
+        rel_paths : list
+            The paths of the members to read, relative to the root
+
+        Yields
+        ------
+        rel_path : str
+            The path of the member, relative to the root
+        data : bytes
+            The bytes of the member
+        """
+
+        self._open_archive()
+
+        rel_paths = set(rel_path.strip('/') for rel_path in rel_paths)
+
+        for rel_path in self._members.keys():  # In archive order
+            if rel_path in rel_paths:
+                yield rel_path, self.read(rel_path)
+
+    def clear_cache(self):
+        """Closes the archive and clears the cached listings"""
+
+        if self._archive is not None:
+            self._archive.close()
+
+        self._archive, self._members, self._listings = None, None, None
+
+
+class CleanStore:
+    """Columnar store for clean (processed) data and metadata
+
+    Each array is stored as its own .npy file, so that it can be
+    memory-mapped when loaded, and the metadata is stored with one
+    .npy file per info piece (column), so that individual info pieces
+    can be loaded without loading the full metadata. Expts can also be
+    appended to a name as parts (see append_part()), without rewriting
+    the expts already in the store.
+    """
+
+    def __init__(self, root):
+        """Init class CleanStore
+
+        Parameters
+        ----------
+        root : str
+            The path to the store directory (ex:
+            datasets/gen-one/clean-store/)
+        """
+
+        self.root = root
+        verify_path(root)
+
+        # Mark the dir as a store, so get_data_source() can detect it
+        if not os.path.isfile(_get_store_marker_path(root)):
+            try:
+                open(_get_store_marker_path(root), 'a').close()
+            except OSError:  # If the store is read-only
+                pass
+
+    def _array_path(self, name):
+        """Returns the path to the .npy file of the array name"""
+        return os.path.join(self.root, '%s.npy' % name)
+
+    def _md_dir(self, name):
+        """Returns the path to the dir of the metadata columns name"""
+        return os.path.join(self.root, '%s.md' % name)
+
+    def _parts_dir(self, name):
+        """Returns the path to the dir of the appended parts of name"""
+        return os.path.join(self.root, '%s.parts' % name)
+
+    def has(self, name):
+        """Returns True if an array or metadata name is in the store"""
+        return (os.path.isfile(self._array_path(name))
+                or os.path.isdir(self._md_dir(name)))
+
+    def list_arrays(self):
+        """Returns the sorted names of the arrays in the store"""
+        return sorted(os.path.splitext(ff)[0] for ff in os.listdir(self.root)
+                      if ff.endswith('.npy'))
+
+    def save_array(self, arr, name):
+        """Saves the array to the store
+
+        Parameters
+        ----------
+        arr : array_like
+            The array to be saved
+        name : str
+            The name of the array in the store
+        """
+
+        np.save(self._array_path(name), arr)
+
+    def create_array(self, name, shape, dtype=complex):
+        """Creates an array in the store, to be written in pieces
+
+        Parameters
+        ----------
+        name : str
+            The name of the array in the store
+        shape : tuple
+            The shape of the array
+        dtype :
+            The dtype of the array
+
+        Returns
+        -------
+        arr : np.memmap
+            The new (zero-filled) array, memory-mapped for writing; the
+            writes are saved to the store as the pages are flushed
+        """
+
+        arr = np.lib.format.open_memmap(self._array_path(name), mode='w+',
+                                        dtype=dtype, shape=tuple(shape))
+
+        return arr
+
+    def load_array(self, name, mmap=True):
+        """Loads an array from the store
+
+        Parameters
+        ----------
+        name : str
+            The name of the array in the store
+        mmap : bool
+            If True, the array is memory-mapped (read-only) instead of
+            being read into memory
+
+        Returns
+        -------
+        arr : array_like
+            The loaded array
+        """
+
+        arr = np.load(self._array_path(name),
+                      mmap_mode='r' if mmap else None)
+
+        return arr
+
+    def save_metadata(self, metadata, name):
+        """Saves the list of metadata dicts to the store, by column
+
+        Parameters
+        ----------
+        metadata : list
+            List of the metadata dict for each expt
+        name : str
+            The name of the metadata in the store
+        """
+
+        md_dir = self._md_dir(name)
+        verify_path(md_dir)
+
+        info_pieces = list(metadata[0].keys())
+
+        # Save the order of the info pieces
+        np.save(os.path.join(md_dir, '_info_pieces.npy'),
+                np.array(info_pieces))
+
+        # Save each info piece as its own column
+        for info_piece in info_pieces:
+            np.save(os.path.join(md_dir, '%s.npy' % info_piece),
+                    np.array([md[info_piece] for md in metadata]))
+
+    def load_metadata_cols(self, name, info_pieces=None):
+        """Loads metadata columns from the store
+
+        Parameters
+        ----------
+        name : str
+            The name of the metadata in the store
+        info_pieces : list
+            The info pieces to load, if None, loads all info pieces
+
+        Returns
+        -------
+        md_cols : dict
+            The array of values of each info piece
+        """
+
+        md_dir = self._md_dir(name)
+
+        if info_pieces is None:  # If loading all info pieces
+            info_pieces = list(np.load(os.path.join(md_dir,
+                                                    '_info_pieces.npy')))
+
+        md_cols = dict()
+        for info_piece in info_pieces:
+            md_cols[info_piece] = np.load(os.path.join(md_dir, '%s.npy'
+                                                       % info_piece))
+
+        return md_cols
+
+    def load_metadata(self, name):
+        """Loads the metadata from the store, as a list of dicts
+
+        Parameters
+        ----------
+        name : str
+            The name of the metadata in the store
+
+        Returns
+        -------
+        metadata : list
+            List of the metadata dict for each expt
+        """
+
+        from umbmid.catalog import dtypes_dict
+
+        md_cols = self.load_metadata_cols(name)
+
+        n_expts = len(next(iter(md_cols.values())))
+
+        metadata = [{kk: vv[ii].item() for kk, vv in md_cols.items()}
+                    for ii in range(n_expts)]
+
+        # Restore the int info pieces, which were stored as floats if
+        # any values were missing (NaN)
+        for md in metadata:
+            for info_piece in md.keys():
+                if (dtypes_dict.get(info_piece, None) == int
+                        and not np.isnan(md[info_piece])):
+                    md[info_piece] = int(md[info_piece])
+
+        return metadata
+
+    def list_parts(self, name):
+        """Returns the sorted names of the appended parts of name
+
+        Only complete parts are listed; the array of a part is saved
+        last (see append_part()), so a part being written is not listed.
+        """
+
+        parts_dir = self._parts_dir(name)
+
+        if not os.path.isdir(parts_dir):  # If no parts yet
+            return []
+
+        return sorted('%s.parts/%s' % (name, os.path.splitext(ff)[0])
+                      for ff in os.listdir(parts_dir)
+                      if ff.endswith('.npy') and not ff.endswith('.tmp.npy'))
+
+    def append_part(self, arr, metadata, name):
+        """Appends expts to name as a new part, with their metadata
+
+        Parameters
+        ----------
+        arr : array_like
+            The data of the appended expts, of shape [n_expts, ...]
+        metadata : list
+            The metadata dict of each appended expt
+        name : str
+            The name of the parts in the store
+
+        Returns
+        -------
+        part_name : str
+            The name of the new part in the store
+        """
+
+        assert len(metadata) == np.shape(arr)[0], \
+            'Error: arr and metadata have different num of expts'
+
+        parts_dir = self._parts_dir(name)
+        verify_path(parts_dir)
+
+        # Claim the next free part number by creating its .alloc file,
+        # which fails if it exists, so that concurrent writers (ex: two
+        # watchers) never get the same part
+        n_part = len(self.list_parts(name))
+        while True:
+            try:
+                os.close(os.open(os.path.join(parts_dir, '%06d.alloc'
+                                              % n_part),
+                                 os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                break
+            except FileExistsError:
+                n_part += 1
+
+        part_name = '%s.parts/%06d' % (name, n_part)
+
+        self.save_metadata(metadata, part_name)
+
+        # Save the array last, through a temp file, so that the part is
+        # only listed once it is complete
+        tmp_path = '%s.tmp.npy' % os.path.splitext(
+            self._array_path(part_name))[0]
+        np.save(tmp_path, arr)
+        os.replace(tmp_path, self._array_path(part_name))
+
+        return part_name
+
+    def load_parts(self, name, mmap=False):
+        """Loads all the appended parts of name, in the order appended
+
+        Parameters
+        ----------
+        name : str
+            The name of the parts in the store
+        mmap : bool
+            If True, the array of each part is memory-mapped while
+            they are concatenated
+
+        Returns
+        -------
+        arr : array_like
+            The data of the expts of every part, or None if no parts
+        metadata : list
+            The metadata dict of each expt of every part
+        """
+
+        part_names = self.list_parts(name)
+
+        if len(part_names) == 0:  # If no parts yet
+            return None, []
+
+        arr = np.concatenate([self.load_array(part_name, mmap=mmap)
+                              for part_name in part_names], axis=0)
+
+        metadata = []
+        for part_name in part_names:
+            metadata += self.load_metadata(part_name)
+
+        return arr, metadata
@@ -4,23 +4,67 @@ University of Manitoba
 July 26th, 2019
 """
 
+import os
+import time
 import pickle
-import scipy.io as scio
+import inspect
+import functools
 import numpy as np
 
+from umbmid.profiling import get_profiler, profile_stage
+
 ###############################################################################
 
+# The names of the fields of complex values in MATLAB v7.3 .mat files
+__V73_COMPLEX_FIELDS = ('real', 'imag')
 
-def load_fd_data(data_path):
-    """Load raw .txt file into array of complex freq-domain s-params
+###############################################################################
 
-    Loads a raw data .txt file and returns the measured complex
-    S-parameters in the frequency domain.
+
+def _profiled_save(func):
+    """Decorator that records each call of a save func as a stage
+
+    The calls are recorded as the 'save' stage of the profiler (see
+    umbmid.profiling), with the size of the saved file (the path arg
+    of func) as the bytes written.
+    """
+
+    func_sig = inspect.signature(func)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+
+        if not get_profiler().enabled:  # If disabled, just call func
+            return func(*args, **kwargs)
+
+        with profile_stage('save') as stage:
+
+            result = func(*args, **kwargs)
+
+            # Find the path the file was saved to
+            path = func_sig.bind(*args, **kwargs).arguments['path']
+            stage.add_bytes_written(os.path.getsize(path))
+
+        return result
+
+    return wrapper
+
+
+def parse_fd_data(raw_data, dtype=complex):
+    """Parse the contents of a raw .txt file into complex s-params
+
+    Parses the text of a raw data .txt file, in which each row contains
+    the real and imag parts of the S-parameters at one frequency in
+    alternating columns, into the complex S-parameters in the
+    frequency domain.
 
     Parameters
     ----------
-    data_path : str
-        Path to the data file to load
+    raw_data : bytes or str
+        The contents of the raw data .txt file
+    dtype :
+        The complex dtype of the returned array, complex (complex128)
+        or np.complex64
 
     Returns
     -------
@@ -28,28 +72,64 @@ def load_fd_data(data_path):
         The measured complex S-parameters in the frequency domain
     """
 
-    # Load the .txt file into an array
-    raw_data = np.genfromtxt(data_path, dtype=float, delimiter='')
+    if isinstance(raw_data, bytes):  # Convert to str if bytes
+        raw_data = raw_data.decode('utf-8')
+
+    # Find the number of columns from the first row
+    first_row = raw_data.lstrip().split('\n', 1)[0]
+    num_cols = len(first_row.replace(',', ' ').split())
+
+    # Parse all values at once, directly into the real dtype that
+    # corresponds to the complex dtype
+    raw_data = np.fromstring(raw_data.replace(',', ' '),
+                             dtype=np.finfo(dtype).dtype, sep=' ')
+
+    assert num_cols % 2 == 0 and np.size(raw_data) % num_cols == 0, \
+        'Error: raw data is not arranged in real/imag column pairs'
+
+    # Reshape so that each row is one frequency; the real and imag
+    # parts alternate in each row, which is the memory layout of a
+    # complex array, so the complex s-params are a view of this array
+    fd_data = np.reshape(raw_data, [-1, num_cols]).view(np.dtype(dtype))
+
+    return fd_data
 
-    # Find the number of freqs and twice the number of scan positions
-    num_freqs, num_scan_positions = raw_data.shape
 
-    # Find the number of scan positions (typically 72)
-    num_scan_positions //= 2
+def load_fd_data(data_path, dtype=complex):
+    """Load raw .txt file into array of complex freq-domain s-params
 
-    # Init array to return
-    fd_data = np.zeros([num_freqs, num_scan_positions], dtype=complex)
+    Loads a raw data .txt file and returns the measured complex
+    S-parameters in the frequency domain.
 
-    # For each scan position
-    for scan_position in range(num_scan_positions):
+    Parameters
+    ----------
+    data_path : str or file-like
+        Path to the data file to load, or the file object of the open
+        data file
+    dtype :
+        The complex dtype of the returned array, complex (complex128)
+        or np.complex64
 
-        # Combine the real and imag parts from the .txt file
-        fd_data[:, scan_position] = (raw_data[:, 2 * scan_position]
-                                     + 1j * raw_data[:, 2 * scan_position + 1])
+    Returns
+    -------
+    fd_data : array_like
+        The measured complex S-parameters in the frequency domain
+    """
+
+    if hasattr(data_path, 'read'):  # If a file object, read it
+        raw_data = data_path.read()
+
+    else:  # If a path, open the file and read it
+        with open(data_path, 'rb') as handle:
+            raw_data = handle.read()
+
+    # Parse the contents of the .txt file
+    fd_data = parse_fd_data(raw_data, dtype=dtype)
 
     return fd_data
 
 
+@_profiled_save
 def save_pickle(var, path):
     """Saves the var to the path as a .pickle file
 
@@ -61,10 +141,17 @@ def save_pickle(var, path):
         The full path to the saved .pickle file
     """
 
+    # Memory-mapped arrays are pickled as plain arrays, which (with
+    # protocol 5) are written directly from their buffer, so that the
+    # array is streamed to the .pickle file without being copied
+    if isinstance(var, np.memmap):
+        var = np.asarray(var)
+
     with open(path, 'wb') as handle:
         pickle.dump(var, handle, protocol=pickle.HIGHEST_PROTOCOL)
 
 
+@_profiled_save
 def save_mat(var, var_name, path):
     """Saves the var to the path as a .mat file
 
@@ -78,9 +165,309 @@ def save_mat(var, var_name, path):
         The full path to the saved .mat file
     """
 
+    # Import scipy.io here, as it is slow to import and is not needed
+    # by the scripts that only load the data
+    import scipy.io as scio
+
     scio.savemat(path, {var_name: var})
 
 
+def _mat_tag(data_type, n_bytes):
+    """Returns the bytes of the tag of a MAT v5 data element"""
+    return np.array([data_type, n_bytes], dtype='<u4').tobytes()
+
+
+def _mat_pad(n_bytes):
+    """Returns the padding bytes to align n_bytes to 8 bytes"""
+    return b'\x00' * (-n_bytes % 8)
+
+
+@_profiled_save
+def save_mat_chunked(arr, var_name, path, buf_bytes=2**28):
+    """Saves the numeric array to the path as a .mat (v5) file, by chunk
+
+    Unlike save_mat(), the array is never copied in full: it is written
+    to the file in column-major order one block of the last axis at a
+    time, so that an array that is memory-mapped from disk (ex: from
+    CleanStore.load_array()) is saved using at most ~buf_bytes of
+    memory.
+
+    Parameters
+    ----------
+    arr : array_like
+        The float or complex array to be saved, of 2 or more dims
+    var_name : str
+        Str used as the name for the var in the .mat file
+    path : str
+        The full path to the saved .mat file
+    buf_bytes : int
+        The approximate max number of bytes of the array to hold in
+        memory at once
+    """
+
+    assert np.ndim(arr) >= 2, 'Error: arr must have at least 2 dims'
+
+    is_complex = np.iscomplexobj(arr)
+
+    # Find the real dtype of the array, and the MAT data type and
+    # array class of this dtype
+    real_dtype = np.dtype(arr.real.dtype if is_complex else arr.dtype)
+    assert real_dtype in [np.float64, np.float32], \
+        'Error: arr must be a float64/32 or complex128/64 array'
+    if real_dtype == np.float64:
+        mi_type, mx_class = 9, 6  # miDOUBLE, mxDOUBLE_CLASS
+    else:
+        mi_type, mx_class = 7, 7  # miSINGLE, mxSINGLE_CLASS
+
+    shape = np.shape(arr)
+    part_bytes = int(np.prod(shape)) * real_dtype.itemsize
+    name = var_name.encode('ascii')
+
+    # Make the sub-elements that precede the data: the array flags,
+    # the dims, and the name of the var
+    flags = mx_class | (0x0800 if is_complex else 0)
+    md_bytes = (_mat_tag(6, 8) + np.array([flags, 0], dtype='<u4').tobytes()
+                + _mat_tag(5, 4 * len(shape))
+                + np.array(shape, dtype='<i4').tobytes()
+                + _mat_pad(4 * len(shape))
+                + _mat_tag(1, len(name)) + name + _mat_pad(len(name)))
+
+    # Find the size of the full matrix element (the data of each part
+    # is padded to 8 bytes)
+    n_parts = 2 if is_complex else 1
+    n_bytes = (len(md_bytes)
+               + n_parts * (8 + part_bytes + len(_mat_pad(part_bytes))))
+
+    assert n_bytes < 2**32, \
+        'Error: arr is too large for a v5 .mat file (over 4 GB)'
+
+    # The number of entries of the last axis in each block
+    n_last = shape[-1]
+    block_size = max(1, buf_bytes // max(1, part_bytes // n_last))
+
+    with open(path, 'wb') as handle:
+
+        # Write the 128-byte file header
+        header = ('MATLAB 5.0 MAT-file, Platform: posix, Created by: umbmid'
+                  ).encode('ascii').ljust(116, b' ')
+        handle.write(header + b'\x00' * 8
+                     + np.array([0x0100], dtype='<u2').tobytes() + b'IM')
+
+        # Write the tag of the matrix element and its metadata
+        handle.write(_mat_tag(14, n_bytes) + md_bytes)
+
+        data_start = handle.tell()  # The start of the real part
+
+        for part_idx in range(n_parts):  # Write the tag of each part
+            handle.seek(data_start + part_idx
+                        * (8 + part_bytes + len(_mat_pad(part_bytes))))
+            handle.write(_mat_tag(mi_type, part_bytes))
+
+        # For each block of the last axis
+        for start_idx in range(0, n_last, block_size):
+
+            stop_idx = min(start_idx + block_size, n_last)
+
+            # Load the block of the array
+            block = np.asarray(arr[..., start_idx:stop_idx])
+            block_parts = [block.real, block.imag] if is_complex else [block]
+
+            # Column-major order means the last axis is the slowest,
+            # so each block is contiguous within each part
+            for part_idx, part in enumerate(block_parts):
+                handle.seek(data_start + 8 + part_idx
+                            * (8 + part_bytes + len(_mat_pad(part_bytes)))
+                            + start_idx * (part_bytes // n_last))
+                handle.write(part.astype(real_dtype, copy=False)
+                             .tobytes(order='F'))
+
+        # Write the padding after the final part
+        handle.seek(data_start + n_parts
+                    * (8 + part_bytes + len(_mat_pad(part_bytes)))
+                    - len(_mat_pad(part_bytes)))
+        handle.write(_mat_pad(part_bytes))
+
+
+def _import_h5py():
+    """Imports h5py, which is only needed for v7.3 .mat files"""
+
+    try:
+        import h5py
+    except ImportError:
+        raise ImportError('h5py is required to read/write v7.3 .mat files, '
+                          'install it with: pip install h5py')
+
+    return h5py
+
+
+def check_h5py():
+    """Raises an ImportError if h5py is not installed
+
+    Used to fail before a long build, rather than at its v7.3 export.
+    """
+    _import_h5py()
+
+
+def _open_mat_v73(path):
+    """Opens a new v7.3 .mat file (HDF5 file with a MATLAB header)"""
+
+    h5py = _import_h5py()
+
+    # MATLAB v7.3 files are HDF5 files with a 512-byte userblock, which
+    # holds the MAT-file header
+    h5_file = h5py.File(path, 'w', userblock_size=512)
+
+    return h5_file
+
+
+def _write_mat_v73_header(path):
+    """Writes the MAT-file header to the userblock of a v7.3 file"""
+
+    header = ('MATLAB 7.3 MAT-file, Platform: posix, Created on: %s '
+              'HDF5 schema 1.00 .'
+              % time.strftime('%a %b %d %H:%M:%S %Y')).encode('ascii')
+
+    with open(path, 'r+b') as handle:
+        handle.write(header.ljust(116, b' ') + b' ' * 8
+                     + np.array([0x0200], dtype='<u2').tobytes() + b'IM')
+
+
+@_profiled_save
+def save_mat_v73(arr, var_name, path, compression='gzip',
+                 compression_level=4, buf_bytes=2**28):
+    """Saves the numeric array to the path as a v7.3 (HDF5) .mat file
+
+    The array is stored chunked by experiment (the 0th axis), so that
+    individual expts can be read without reading the full array (see
+    load_mat_v73()), and is optionally compressed. Unlike v5 .mat
+    files, there is no limit on the size of the array. The array is
+    written one block of expts at a time, so that an array that is
+    memory-mapped from disk is saved using at most ~buf_bytes of
+    memory. Requires h5py.
+
+    Parameters
+    ----------
+    arr : array_like
+        The float or complex array to be saved, of shape [n_expts, ...]
+    var_name : str
+        Str used as the name for the var in the .mat file
+    path : str
+        The full path to the saved .mat file
+    compression : str
+        The HDF5 compression filter, 'gzip', 'lzf' (not readable in
+        MATLAB), or None for no compression
+    compression_level : int
+        The gzip compression level, in [0, 9]
+    buf_bytes : int
+        The approximate max number of bytes of the array to hold in
+        memory at once
+    """
+
+    is_complex = np.iscomplexobj(arr)
+
+    # Find the real dtype of the array, and its MATLAB class
+    real_dtype = np.dtype(arr.real.dtype if is_complex else arr.dtype)
+    assert real_dtype in [np.float64, np.float32], \
+        'Error: arr must be a float64/32 or complex128/64 array'
+    matlab_class = 'double' if real_dtype == np.float64 else 'single'
+
+    # Complex values are stored as a compound of their real and imag
+    # parts, which is the memory layout of a complex array
+    if is_complex:
+        h5_dtype = np.dtype([(field, real_dtype)
+                             for field in __V73_COMPLEX_FIELDS])
+    else:
+        h5_dtype = real_dtype
+
+    # MATLAB arrays are column-major, so the dims are stored in reverse
+    # order, with the expts along the last (slowest in MATLAB) axis
+    shape = np.shape(arr)
+    h5_shape = shape[::-1]
+
+    # The number of expts written at once
+    expt_bytes = max(1, int(np.prod(shape[1:])) * h5_dtype.itemsize)
+    block_size = max(1, buf_bytes // expt_bytes)
+
+    with _open_mat_v73(path) as h5_file:
+
+        dset = h5_file.create_dataset(
+            var_name, shape=h5_shape, dtype=h5_dtype,
+            chunks=h5_shape[:-1] + (1,),  # One chunk per expt
+            compression=compression,
+            compression_opts=(compression_level if compression == 'gzip'
+                              else None))
+        dset.attrs['MATLAB_class'] = np.bytes_(matlab_class)
+
+        # For each block of expts
+        for start_idx in range(0, shape[0], block_size):
+
+            stop_idx = min(start_idx + block_size, shape[0])
+
+            # Load the block, in the stored dtype and dim order
+            block = np.ascontiguousarray(
+                np.asarray(arr[start_idx:stop_idx]).T, dtype=arr.dtype)
+
+            dset[..., start_idx:stop_idx] = block.view(h5_dtype)
+
+    _write_mat_v73_header(path)
+
+
+@_profiled_save
+def save_md_v73(metadata, var_name, path):
+    """Saves the list of metadata dicts to a v7.3 .mat file as a table
+
+    The metadata is stored as an HDF5 compound table, with one field
+    per info piece and one row per expt, rather than as a cell array of
+    structs. Missing numeric values are stored as NaN and the str info
+    pieces as fixed-length byte str's. In MATLAB, the table is read
+    with h5read(path, '/<var_name>'), which returns a struct of column
+    arrays. Requires h5py.
+
+    Parameters
+    ----------
+    metadata : list
+        List of the metadata dict for each expt
+    var_name : str
+        Str used as the name for the table in the .mat file
+    path : str
+        The full path to the saved .mat file
+    """
+
+    info_pieces = list(metadata[0].keys())
+
+    md_cols = []  # Init list for the column array of each info piece
+
+    for info_piece in info_pieces:
+
+        col = [md[info_piece] for md in metadata]
+
+        # If a str info piece, store as utf-8 bytes
+        if any(isinstance(val, str) for val in col):
+            col = np.array([str(val).encode('utf-8') for val in col])
+
+        else:  # If a numeric info piece
+
+            col = np.array(col)
+
+            # Store as float if any values are missing (NaN)
+            if col.dtype.kind not in 'iuf':
+                col = col.astype(float)
+
+        md_cols.append(col)
+
+    table = np.empty(len(metadata),
+                     dtype=[(info_piece, col.dtype)
+                            for info_piece, col in zip(info_pieces, md_cols)])
+
+    for info_piece, col in zip(info_pieces, md_cols):
+        table[info_piece] = col
+
+    with _open_mat_v73(path) as h5_file:
+        h5_file.create_dataset(var_name, data=table)
+
+    _write_mat_v73_header(path)
+
+
 def load_pickle(path):
     """Loads the .pickle file located at path
 
@@ -99,3 +486,115 @@ def load_pickle(path):
         loaded_var = pickle.load(handle)
 
     return loaded_var
+
+
+def load_mat_v73(path, var_name, expt_idxs=None):
+    """Loads an array from a v7.3 .mat file saved by save_mat_v73()
+
+    Parameters
+    ----------
+    path : str
+        The full path to the .mat file
+    var_name : str
+        The name of the var in the .mat file
+    expt_idxs : array_like
+        The indices of the expts to load, if None, loads all expts.
+        Only the chunks of these expts are read from the file
+
+    Returns
+    -------
+    arr : array_like
+        The loaded array, of shape [n_expts, ...]
+    """
+
+    h5py = _import_h5py()
+
+    with h5py.File(path, 'r') as h5_file:
+
+        dset = h5_file[var_name]
+
+        if expt_idxs is None:  # If loading all expts
+            arr = dset[()]
+
+        else:  # If loading only some of the expts
+
+            # HDF5 selections must be increasing, so read the unique
+            # expts in order, then arrange as requested
+            expt_idxs = np.asarray(expt_idxs, dtype=int).ravel()
+            unique_idxs, inverse = np.unique(expt_idxs, return_inverse=True)
+            arr = dset[..., list(unique_idxs)][..., inverse]
+
+    # Convert complex values from the compound of their parts
+    if arr.dtype.names == __V73_COMPLEX_FIELDS:
+        real_dtype = arr.dtype[__V73_COMPLEX_FIELDS[0]]
+        arr = np.ascontiguousarray(arr).view(
+            np.result_type(real_dtype, np.complex64))
+
+    # Reverse the dims back to the Python (row-major) order
+    arr = np.ascontiguousarray(arr.T)
+
+    return arr
+
+
+def load_md_v73(path, var_name, expt_idxs=None, info_pieces=None):
+    """Loads metadata from a v7.3 .mat file saved by save_md_v73()
+
+    Parameters
+    ----------
+    path : str
+        The full path to the .mat file
+    var_name : str
+        The name of the metadata table in the .mat file
+    expt_idxs : array_like
+        The indices of the expts to load, if None, loads all expts
+    info_pieces : list
+        The info pieces to load, if None, loads all info pieces. Only
+        the fields of these info pieces are read from the file
+
+    Returns
+    -------
+    metadata : list
+        List of the metadata dict for each expt
+    """
+
+    from umbmid.catalog import dtypes_dict
+
+    h5py = _import_h5py()
+
+    with h5py.File(path, 'r') as h5_file:
+
+        dset = h5_file[var_name]
+
+        if info_pieces is None:  # If loading all info pieces
+            info_pieces = list(dset.dtype.names)
+
+        if expt_idxs is None:  # If loading all expts
+            table = dset.fields(info_pieces)[()]
+
+        else:  # If loading only some of the expts
+            expt_idxs = np.asarray(expt_idxs, dtype=int).ravel()
+            unique_idxs, inverse = np.unique(expt_idxs, return_inverse=True)
+            table = dset.fields(info_pieces)[list(unique_idxs)][inverse]
+
+    if table.dtype.names is None:  # If read as a plain array
+        table = {info_pieces[0]: table}
+
+    metadata = [dict() for _ in range(len(table[info_pieces[0]]))]
+
+    for info_piece in info_pieces:
+
+        for md, val in zip(metadata, table[info_piece]):
+
+            if isinstance(val, bytes):  # Convert str's back from bytes
+                md[info_piece] = val.decode('utf-8')
+
+            # Restore the int info pieces, which were stored as floats
+            # if any values were missing (NaN)
+            elif (dtypes_dict.get(info_piece, None) == int
+                  and not np.isnan(val)):
+                md[info_piece] = int(val)
+
+            else:
+                md[info_piece] = val.item()
+
+    return metadata
@@ -0,0 +1,390 @@
+"""
+Tyson Reimer
+University of Manitoba
+October 19th, 2026
+"""
+
+import os
+import sys
+import json
+import time
+import functools
+import tracemalloc
+from socket import gethostname
+
+try:  # The resource module is not available on Windows
+    import resource
+except ImportError:
+    resource = None
+
+###############################################################################
+
+
+class _NullStage:
+    """Stage of the NullProfiler, which records nothing"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def add_bytes_read(self, n_bytes):
+        pass
+
+    def add_bytes_written(self, n_bytes):
+        pass
+
+
+class NullProfiler:
+    """Profiler that records nothing, used when profiling is disabled"""
+
+    enabled = False
+
+    __null_stage = _NullStage()
+
+    def stage(self, name):
+        return self.__null_stage
+
+    def merge_report(self, report):
+        pass
+
+    def report(self):
+        return dict()
+
+    def save_report(self, path):
+        pass
+
+
+null_profiler = NullProfiler()
+
+###############################################################################
+
+# The profiler used by profile_stage() and @profiled, set via
+# set_profiler()
+__profiler = null_profiler
+
+###############################################################################
+
+
+def _get_peak_rss():
+    """Returns the peak resident memory of this process so far, in MB"""
+
+    if resource is None:  # If not available, don't report
+        return float('nan')
+
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # The ru_maxrss is in bytes on macOS and in KB elsewhere
+    if sys.platform == 'darwin':
+        peak_rss = max_rss / 2**20
+    else:
+        peak_rss = max_rss / 2**10
+
+    return peak_rss
+
+
+def _new_totals():
+    """Returns the initial totals of a stage"""
+
+    totals = {
+        'calls': 0,
+        'wall_s': 0.0,
+        'cpu_s': 0.0,
+        'bytes_read': 0,
+        'bytes_written': 0,
+        'peak_rss_mb': 0.0,
+        'peak_traced_mb': 0.0,
+    }
+
+    return totals
+
+
+class _Stage:
+    """Context manager that records one run of a stage of a Profiler"""
+
+    def __init__(self, profiler, name):
+        """Init class _Stage
+
+        Parameters
+        ----------
+        profiler : Profiler
+            The profiler that records this stage
+        name : str
+            The name of the stage
+        """
+
+        self._profiler = profiler
+        self.name = name
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.peak_traced = 0  # Peak traced memory, if tracing memory
+
+    def add_bytes_read(self, n_bytes):
+        """Adds to the num of bytes read during this stage"""
+        self.bytes_read += n_bytes
+
+    def add_bytes_written(self, n_bytes):
+        """Adds to the num of bytes written during this stage"""
+        self.bytes_written += n_bytes
+
+    def __enter__(self):
+        self._profiler._enter_stage(self)
+        self._start_wall = time.perf_counter()
+        self._start_cpu = time.process_time()
+        return self
+
+    def __exit__(self, *args):
+        wall_time = time.perf_counter() - self._start_wall
+        cpu_time = time.process_time() - self._start_cpu
+        self._profiler._exit_stage(self, wall_time, cpu_time)
+        return False
+
+
+class Profiler:
+    """Records the wall time, CPU time, bytes and memory of each stage
+
+    Each run of a stage (ex: 'parse', 'calibrate', 'transform') is
+    recorded with the stage() context manager, and the totals of each
+    stage are reported by report(). Stages can be nested; the time of
+    a nested stage is also counted in its outer stage.
+    """
+
+    enabled = True
+
+    def __init__(self, trace_memory=False):
+        """Init class Profiler
+
+        Parameters
+        ----------
+        trace_memory : bool
+            If True, the peak memory allocated during each stage is
+            traced with tracemalloc (accurate, but slows down
+            allocation-heavy code). Otherwise, only the peak resident
+            memory of the process is reported
+        """
+
+        self.trace_memory = trace_memory
+        self._stages = dict()  # The totals of each stage
+        self._stack = []  # The stages currently running
+        self._start_time = time.perf_counter()
+
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def stage(self, name):
+        """Returns a context manager that records one run of a stage
+
+        Parameters
+        ----------
+        name : str
+            The name of the stage
+
+        Returns
+        -------
+        stage : _Stage
+            The context manager; use its add_bytes_read() and
+            add_bytes_written() to record the bytes of the stage
+        """
+        return _Stage(self, name)
+
+    def _enter_stage(self, stage):
+        """Starts recording a stage"""
+
+        if self.trace_memory:  # Start a new peak for this stage
+
+            if len(self._stack) > 0:  # Keep the peak of the outer stage
+                self._stack[-1].peak_traced = \
+                    max(self._stack[-1].peak_traced,
+                        tracemalloc.get_traced_memory()[1])
+
+            tracemalloc.reset_peak()
+
+        self._stack.append(stage)
+
+    def _exit_stage(self, stage, wall_time, cpu_time):
+        """Stops recording a stage, adding it to the totals"""
+
+        self._stack.pop()
+
+        if self.trace_memory:  # Find the peak during this stage
+
+            stage.peak_traced = max(stage.peak_traced,
+                                    tracemalloc.get_traced_memory()[1])
+
+            if len(self._stack) > 0:  # The outer stage had this peak too
+                self._stack[-1].peak_traced = \
+                    max(self._stack[-1].peak_traced, stage.peak_traced)
+
+            tracemalloc.reset_peak()
+
+        totals = self._stages.setdefault(stage.name, _new_totals())
+
+        totals['calls'] += 1
+        totals['wall_s'] += wall_time
+        totals['cpu_s'] += cpu_time
+        totals['bytes_read'] += stage.bytes_read
+        totals['bytes_written'] += stage.bytes_written
+        totals['peak_rss_mb'] = max(totals['peak_rss_mb'], _get_peak_rss())
+        totals['peak_traced_mb'] = max(totals['peak_traced_mb'],
+                                       stage.peak_traced / 2**20)
+
+    def merge_report(self, report):
+        """Adds the stage totals of a report to the totals of this one
+
+        Used to combine the reports of the profilers of worker
+        processes (see umbmid.taskgraph.run_task_graph()).
+
+        Parameters
+        ----------
+        report : dict
+            The report() of another profiler
+        """
+
+        for name, other_totals in report.get('stages', dict()).items():
+
+            totals = self._stages.setdefault(name, _new_totals())
+
+            for key, val in other_totals.items():
+
+                if key.startswith('peak_'):  # Peaks are not additive
+                    totals[key] = max(totals[key], val)
+                else:
+                    totals[key] += val
+
+    def report(self):
+        """Returns the totals of each stage, as a JSON-compatible dict
+
+        Returns
+        -------
+        report : dict
+            The total wall time, CPU time, num of calls, bytes read and
+            written, and peak memory of each stage, in the order the
+            stages were first finished, and of the full run
+        """
+
+        report = {
+            'total_wall_s': time.perf_counter() - self._start_time,
+            'peak_rss_mb': _get_peak_rss(),
+            'stages': {name: dict(totals)
+                       for name, totals in self._stages.items()},
+        }
+
+        if not self.trace_memory:  # If not tracing, don't report
+            for totals in report['stages'].values():
+                del totals['peak_traced_mb']
+
+        return report
+
+    def save_report(self, path):
+        """Saves the report() to the path as a .json file
+
+        Parameters
+        ----------
+        path : str
+            The full path to the saved .json file
+        """
+
+        with open(path, 'w') as handle:
+            json.dump(self.report(), handle, indent=2)
+
+
+###############################################################################
+
+
+def get_script_report_path(script_path):
+    """Returns the path of the .json profiling report of a script
+
+    The report is saved beside the .log file of the script (see
+    umbmid.get_script_logger()).
+
+    Parameters
+    ----------
+    script_path : str
+        Path to the script that is profiled
+
+    Returns
+    -------
+    report_path : str
+        The path of the .json report, in the output/logs/ dir
+    """
+
+    from umbmid import get_proj_path, verify_path
+
+    # Verify that the log dir exists
+    verify_path(os.path.join(get_proj_path(), 'output/logs/'))
+
+    # Find the name of the script that is profiled
+    script_name = os.path.splitext(os.path.basename(script_path))[0]
+
+    report_path = '%s/output/logs/%s_%s-profile.json' % (get_proj_path(),
+                                                         gethostname(),
+                                                         script_name)
+
+    return report_path
+
+
+def get_profiler():
+    """Returns the profiler used by profile_stage() and @profiled
+
+    Returns
+    -------
+    profiler : Profiler or NullProfiler
+        The profiler set by set_profiler(), null_profiler by default
+    """
+    return __profiler
+
+
+def set_profiler(profiler):
+    """Sets the profiler used by profile_stage() and @profiled
+
+    Parameters
+    ----------
+    profiler : Profiler or NullProfiler
+        The profiler to use, or null_profiler to disable profiling
+    """
+
+    global __profiler
+    __profiler = profiler
+
+
+def profile_stage(name):
+    """Returns a context manager recording a stage in get_profiler()
+
+    Parameters
+    ----------
+    name : str
+        The name of the stage (ex: 'parse', 'calibrate', 'fit')
+
+    Returns
+    -------
+    stage :
+        The context manager of the stage; a no-op if profiling is
+        disabled
+    """
+    return __profiler.stage(name)
+
+
+def profiled(name):
+    """Decorator that records each call of a function as a stage
+
+    Parameters
+    ----------
+    name : str
+        The name of the stage (ex: 'fit')
+    """
+
+    def decorator(func):
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+
+            if not __profiler.enabled:  # If disabled, just call func
+                return func(*args, **kwargs)
+
+            with __profiler.stage(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,353 @@
+"""
+Tyson Reimer
+University of Manitoba
+October 19th, 2026
+"""
+
+import os
+import numpy as np
+
+from umbmid import get_data_dir, verify_path, null_logger
+from umbmid.build import (import_fd_multiport_dataset, import_metadata,
+                          calibrate_fd_dataset, convert_to_idft_dataset,
+                          convert_to_iczt_dataset)
+from umbmid.catalog import load_catalog
+from umbmid.datasource import CleanStore
+from umbmid.loadsave import (save_pickle, save_mat, save_mat_chunked,
+                             save_mat_v73, save_md_v73, check_h5py)
+from umbmid.taskgraph import Task, run_task_graph
+
+###############################################################################
+
+# The possible sparams for each generation of dataset
+possible_sparams = {
+    'one': ['s11'],
+    'two': ['s11', 's21'],
+    'three': ['s11', 's21'],
+}
+
+# The prefix of the clean file names of the data in each domain
+domain_prefixes = {
+    'fd': 'fd_data',
+    'idft': 'idft_data',
+    'iczt': 'iczt_data',
+}
+
+###############################################################################
+
+
+def _import_task(gen, data_dir, store_dir, dtype):
+    """Imports the raw data of all sparams once, saving it to the store
+
+    Parameters
+    ----------
+    gen : str
+        The generation of dataset
+    data_dir : str
+        The dataset root directory (or archive of it)
+    store_dir : str
+        The dir of the CleanStore that holds the intermediates
+    dtype :
+        The complex dtype of the data
+    """
+
+    store = CleanStore(store_dir)
+
+    catalog = load_catalog(gen=gen, data_dir=data_dir)
+
+    # Import all the sparams in a single pass
+    fd_data = import_fd_multiport_dataset(gen=gen,
+                                          sparams=possible_sparams[gen],
+                                          catalog=catalog,
+                                          dtype=dtype)
+
+    store.save_array(fd_data, 'raw_fd_data')
+    store.save_metadata(import_metadata(gen=gen, catalog=catalog), 'raw_md')
+
+
+def _cal_task(gen, cal_type, store_dir):
+    """Calibrates the imported raw data, saving it to the store
+
+    Parameters
+    ----------
+    gen : str
+        The generation of dataset
+    cal_type : str
+        The type of calibration, must be in ['emp', 'adi']
+    store_dir : str
+        The dir of the CleanStore that holds the intermediates
+    """
+
+    store = CleanStore(store_dir)
+
+    cal_data, cal_md = \
+        calibrate_fd_dataset(np.asarray(store.load_array('raw_fd_data')),
+                             store.load_metadata('raw_md'),
+                             cal_type=cal_type,
+                             prune=True)
+
+    # Save the data of each sparam as its own array, so that each can
+    # be read contiguously by the transform and export tasks
+    for sparam_idx, sparam in enumerate(possible_sparams[gen]):
+        store.save_array(cal_data[:, sparam_idx, :, :],
+                         'fd_data_%s_%s' % (sparam, cal_type))
+
+    store.save_metadata(cal_md, 'md_%s' % cal_type)
+
+
+def _transform_task(domain, sparam, cal_type, store_dir, dtype, chunk_size):
+    """Converts calibrated data to the time-domain, in the store
+
+    Parameters
+    ----------
+    domain : str
+        The time-domain transform, must be in ['idft', 'iczt']
+    sparam : str
+        The sparam of the data
+    cal_type : str
+        The type of calibration of the data
+    store_dir : str
+        The dir of the CleanStore that holds the intermediates
+    dtype :
+        The complex dtype of the data
+    chunk_size : int
+        The number of expts converted at once
+    """
+
+    store = CleanStore(store_dir)
+
+    fd_data = store.load_array('fd_data_%s_%s' % (sparam, cal_type))
+
+    name = '%s_%s_%s' % (domain_prefixes[domain], sparam, cal_type)
+
+    if domain == 'idft':  # Same shape as the freq-domain data
+
+        out = store.create_array(name, shape=fd_data.shape, dtype=dtype)
+        convert_to_idft_dataset(fd_data, chunk_size=chunk_size, out=out)
+
+    else:  # If using the ICZT
+
+        out = store.create_array(name, shape=(fd_data.shape[0], 1024,
+                                              fd_data.shape[2]),
+                                 dtype=dtype)
+        convert_to_iczt_dataset(fd_data, num_time_pts=1024, dtype=dtype,
+                                chunk_size=chunk_size, out=out)
+
+    out.flush()
+
+
+def _export_task(name, var_name, store_dir, output_dir, save_v73):
+    """Exports an array in the store to the .pickle and .mat files
+
+    Parameters
+    ----------
+    name : str
+        The name of the array in the store, and of the exported files
+    var_name : str
+        The name of the var in the .mat files
+    store_dir : str
+        The dir of the CleanStore that holds the intermediates
+    output_dir : str
+        The dir of the clean files
+    save_v73 : bool
+        If True, also saves a v7.3 .mat file
+    """
+
+    data = CleanStore(store_dir).load_array(name)
+
+    save_pickle(data, os.path.join(output_dir, '%s.pickle' % name))
+    save_mat_chunked(data, var_name,
+                     os.path.join(output_dir, '%s.mat' % name))
+
+    if save_v73:  # If also saving the v7.3 .mat file
+        save_mat_v73(data, var_name,
+                     os.path.join(output_dir, '%s_v73.mat' % name))
+
+
+def _export_md_task(sparam, cal_type, store_dir, output_dir, save_v73):
+    """Exports calibrated metadata in the store to the clean files
+
+    Parameters
+    ----------
+    sparam : str
+        The sparam of the metadata files
+    cal_type : str
+        The type of calibration of the metadata
+    store_dir : str
+        The dir of the CleanStore that holds the intermediates
+    output_dir : str
+        The dir of the clean files
+    save_v73 : bool
+        If True, also saves a v7.3 .mat file
+    """
+
+    metadata = CleanStore(store_dir).load_metadata('md_%s' % cal_type)
+
+    name = 'md_list_%s_%s' % (sparam, cal_type)
+
+    save_pickle(metadata, os.path.join(output_dir, '%s.pickle' % name))
+    save_mat(metadata, 'md_%s' % sparam,
+             os.path.join(output_dir, '%s.mat' % name))
+
+    if save_v73:  # If also saving the v7.3 .mat file
+        save_md_v73(metadata, 'md_%s' % sparam,
+                    os.path.join(output_dir, '%s_v73.mat' % name))
+
+
+###############################################################################
+
+
+def make_clean_release_tasks(gens=('one', 'two', 'three'),
+                             cal_types=('emp', 'adi'),
+                             domains=('fd', 'idft', 'iczt'), data_dir=None,
+                             output_dir=None, dtype=complex, chunk_size=16,
+                             save_v73=False):
+    """Makes the task graph of a clean-data release build
+
+    For each gen, the raw data of all sparams is imported once, then
+    each calibration is computed from it, then each time-domain
+    transform from each calibration, and each array is exported to the
+    clean files as soon as it is done. The intermediates are shared
+    between the tasks as memory-mapped arrays in the
+    gen-<gen>/clean-store/ dir.
+
+    Parameters
+    ----------
+    gens : list
+        The generations of dataset to build
+    cal_types : list
+        The types of calibration to build, each in ['emp', 'adi']
+    domains : list
+        The domains of the data to build, each in ['fd', 'idft', 'iczt']
+    data_dir : str
+        The dataset root directory (or archive of it), if None, uses
+        umbmid.get_data_dir()
+    output_dir : str
+        The dir in which the gen-<gen>/clean/ files are saved, if None,
+        uses umbmid.get_data_dir()
+    dtype :
+        The complex dtype of the data, complex (complex128) or
+        np.complex64
+    chunk_size : int
+        The number of expts converted to the time-domain at once
+    save_v73 : bool
+        If True, also saves v7.3 (HDF5) .mat files
+
+    Returns
+    -------
+    tasks : list
+        The Task objects of the build, see umbmid.taskgraph
+    """
+
+    assert all(domain in domain_prefixes for domain in domains), \
+        "Error: domains must be in ['fd', 'idft', 'iczt']"
+
+    if data_dir is None:  # If no dataset root specified
+        data_dir = get_data_dir()
+
+    if output_dir is None:  # If no output dir specified
+        output_dir = get_data_dir()
+
+    tasks = []
+
+    for gen in gens:  # For each generation of dataset
+
+        store_dir = os.path.join(output_dir, 'gen-%s/clean-store/' % gen)
+        gen_output_dir = os.path.join(output_dir, 'gen-%s/clean/' % gen)
+        verify_path(output_dir)
+        verify_path(os.path.join(output_dir, 'gen-%s/' % gen))
+        verify_path(store_dir)
+        verify_path(gen_output_dir)
+
+        import_name = 'import-%s' % gen
+        tasks.append(Task(import_name, _import_task,
+                          kwargs={'gen': gen, 'data_dir': data_dir,
+                                  'store_dir': store_dir, 'dtype': dtype}))
+
+        for cal_type in cal_types:  # For each type of calibration
+
+            cal_name = 'cal-%s-%s' % (gen, cal_type)
+            tasks.append(Task(cal_name, _cal_task,
+                              kwargs={'gen': gen, 'cal_type': cal_type,
+                                      'store_dir': store_dir},
+                              deps=[import_name]))
+
+            for sparam in possible_sparams[gen]:  # For each sparam
+
+                tasks.append(Task('export-%s-md_%s_%s'
+                                  % (gen, sparam, cal_type),
+                                  _export_md_task,
+                                  kwargs={'sparam': sparam,
+                                          'cal_type': cal_type,
+                                          'store_dir': store_dir,
+                                          'output_dir': gen_output_dir,
+                                          'save_v73': save_v73},
+                                  deps=[cal_name]))
+
+                for domain in domains:  # For each domain
+
+                    # The name of the array in the store and of the
+                    # clean files, and of the var in the .mat files
+                    name = '%s_%s_%s' % (domain_prefixes[domain], sparam,
+                                         cal_type)
+                    var_name = '%s_%s' % (domain_prefixes[domain], sparam)
+
+                    if domain == 'fd':  # Made by the calibration task
+                        data_task_name = cal_name
+
+                    else:  # If a time-domain transform
+
+                        data_task_name = 'transform-%s-%s' % (gen, name)
+                        tasks.append(Task(data_task_name, _transform_task,
+                                          kwargs={'domain': domain,
+                                                  'sparam': sparam,
+                                                  'cal_type': cal_type,
+                                                  'store_dir': store_dir,
+                                                  'dtype': dtype,
+                                                  'chunk_size': chunk_size},
+                                          deps=[cal_name]))
+
+                    tasks.append(Task('export-%s-%s' % (gen, name),
+                                      _export_task,
+                                      kwargs={'name': name,
+                                              'var_name': var_name,
+                                              'store_dir': store_dir,
+                                              'output_dir': gen_output_dir,
+                                              'save_v73': save_v73},
+                                      deps=[data_task_name]))
+
+    return tasks
+
+
+def make_clean_release(gens=('one', 'two', 'three'),
+                       cal_types=('emp', 'adi'),
+                       domains=('fd', 'idft', 'iczt'), data_dir=None,
+                       output_dir=None, dtype=complex, chunk_size=16,
+                       save_v73=False, n_workers=None, logger=null_logger):
+    """Builds the clean-data release, running the tasks in parallel
+
+    See make_clean_release_tasks() for the parameters of the build.
+
+    Parameters
+    ----------
+    n_workers : int
+        The number of worker processes, if None, uses the number of
+        CPUs, if 0, runs all the tasks in this process
+    logger :
+        Logger for logging progress
+    """
+
+    if save_v73:  # Check for h5py before the build, not at the export
+        check_h5py()
+
+    tasks = make_clean_release_tasks(gens=gens, cal_types=cal_types,
+                                     domains=domains, data_dir=data_dir,
+                                     output_dir=output_dir, dtype=dtype,
+                                     chunk_size=chunk_size,
+                                     save_v73=save_v73)
+
+    logger.info('Building clean-data release of %d tasks...', len(tasks))
+
+    run_task_graph(tasks, n_workers=n_workers, logger=logger)
+
+    logger.info('Complete building clean-data release.')
@@ -0,0 +1,387 @@
+"""
+Tyson Reimer
+University of Manitoba
+October 19th, 2026
+"""
+
+import os
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+import matplotlib
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+import matplotlib.image as mpl_img
+
+from umbmid import null_logger, verify_path, ProgressReporter
+
+###############################################################################
+
+# The font rc params of the figures, using Times New Roman if available
+font_rc = {
+    'font.family': 'serif',
+    'font.serif': ['Times New Roman', 'DejaVu Serif'],
+}
+
+###############################################################################
+
+
+def _get_cmap_lut(cmap='inferno'):
+    """Returns the colormap as a lookup table of 256 RGB uint8 colors"""
+
+    lut = matplotlib.colormaps[cmap](np.linspace(0, 1, 256))[:, :3]
+
+    return np.round(lut * 255).astype(np.uint8)
+
+
+def save_image_fast(img, path, cmap='inferno', vmin=None, vmax=None,
+                    scale=1, lut=None):
+    """Saves the magnitude of a 2D array as a .png through a colormap
+
+    The array is mapped directly to the colors of the colormap and
+    written as a .png, without any axes, labels or colorbar, which is
+    much faster than rendering a figure.
+
+    Parameters
+    ----------
+    img : array_like
+        The 2D array to save (ex: a time-domain sinogram or a
+        reconstructed image); the magnitude of complex values is used
+    path : str
+        The full path to the saved .png file
+    cmap : str
+        The colormap used to display the image
+    vmin : float
+        The value mapped to the first color, if None, uses the min
+    vmax : float
+        The value mapped to the last color, if None, uses the max
+    scale : int
+        Each pixel is repeated scale times along each axis, to enlarge
+        small images
+    lut : array_like
+        The lookup table of the colormap, from _get_cmap_lut(); if
+        None, it is made from cmap
+    """
+
+    img = np.abs(img)
+
+    if lut is None:  # If no lookup table, make it
+        lut = _get_cmap_lut(cmap)
+
+    if vmin is None:
+        vmin = np.min(img)
+    if vmax is None:
+        vmax = np.max(img)
+
+    # Find the index of the color of each pixel
+    color_idxs = (img - vmin) * (255 / max(vmax - vmin, 1e-30))
+    color_idxs = np.clip(color_idxs, 0, 255).astype(np.uint8)
+
+    if scale > 1:  # Enlarge the image
+        color_idxs = np.repeat(np.repeat(color_idxs, scale, axis=0),
+                               scale, axis=1)
+
+    # Save the RGB image, with fast (low) compression
+    mpl_img.imsave(path, lut[color_idxs], pil_kwargs={'compress_level': 1})
+
+
+###############################################################################
+
+
+class SinogramRenderer:
+    """Renders sinograms or images to .png files, reusing one figure
+
+    The figure is made once, using the object-oriented interface of
+    matplotlib with the Agg backend (no pyplot global state and no
+    display), and only the image data, color limits and title are
+    updated for each rendered image.
+    """
+
+    def __init__(self, kind='sinogram', ini_t=0, fin_t=6e-9, roi_rad=None,
+                 cmap='inferno', dpi=150, figsize=(6.4, 4.8)):
+        """Init class SinogramRenderer
+
+        Parameters
+        ----------
+        kind : str
+            The kind of images rendered, 'sinogram' for time-domain
+            sinograms (time vs rotational position) or 'image' for
+            reconstructed images (x vs y)
+        ini_t : float
+            The initial time-point of the sinograms, in seconds
+        fin_t : float
+            The final time-point of the sinograms, in seconds
+        roi_rad : float
+            The radius of the region shown in the reconstructed images,
+            in cm, if None, the axes are in pixels
+        cmap : str
+            The colormap used to display the images
+        dpi : int
+            The DPI of the saved .png files
+        figsize : tuple
+            The size of the figure, in inches
+        """
+
+        assert kind in ['sinogram', 'image'], \
+            "Error: kind must be in ['sinogram', 'image']"
+
+        self.kind = kind
+        self.ini_t = ini_t
+        self.fin_t = fin_t
+        self.roi_rad = roi_rad
+        self.dpi = dpi
+
+        with matplotlib.rc_context(font_rc):
+
+            self._fig = Figure(figsize=figsize)
+            FigureCanvasAgg(self._fig)
+            self._ax = self._fig.add_subplot(111)
+
+            # Make the image with placeholder data, which is replaced
+            # by the data of each rendered image
+            self._img = self._ax.imshow(np.zeros([2, 2]), cmap=cmap)
+            self._fig.colorbar(self._img, ax=self._ax,
+                               format='%.3f').ax.tick_params(labelsize=12)
+            self._title = self._ax.set_title('', fontsize=16)
+            self._ax.tick_params(labelsize=12)
+
+            if kind == 'sinogram':
+                self._ax.set_xlabel('Rotational Position (' + r'$^\circ$'
+                                    + ')', fontsize=14)
+                self._ax.set_ylabel('Time of Response (ns)', fontsize=14)
+
+            else:
+                units = 'cm' if roi_rad is not None else 'pixels'
+                self._ax.set_xlabel('x-axis (%s)' % units, fontsize=14)
+                self._ax.set_ylabel('y-axis (%s)' % units, fontsize=14)
+
+        self._shape = None  # The shape of the last rendered image
+
+    def _set_extent(self, shape):
+        """Sets the extent and ticks of the axes for images of shape"""
+
+        if self.kind == 'sinogram':
+
+            # Along x-axis from antenna position 1 to 360 deg, along
+            # y-axis from the initial to final time, in ns
+            extent = [1, 360, self.fin_t * 1e9, self.ini_t * 1e9]
+            self._img.set_extent(extent)
+            self._ax.set_aspect(360 / ((self.fin_t - self.ini_t) * 1e9))
+
+            scan_times = np.linspace(self.ini_t, self.fin_t, shape[0]) * 1e9
+            self._ax.set_yticks([round(ii, 2)
+                                 for ii in scan_times[::max(1,
+                                                            shape[0] // 8)]])
+            self._ax.set_xticks([round(ii)
+                                 for ii in np.linspace(0, 360, 360)[::75]])
+
+        elif self.roi_rad is not None:  # If an image of known size
+            self._img.set_extent([-self.roi_rad, self.roi_rad,
+                                  -self.roi_rad, self.roi_rad])
+
+        else:  # If an image, in pixels
+            self._img.set_extent([-0.5, shape[1] - 0.5, shape[0] - 0.5,
+                                  -0.5])
+
+        self._shape = shape
+
+    def render(self, img, path, title='', vmin=None, vmax=None):
+        """Renders the magnitude of an image to a .png file
+
+        Parameters
+        ----------
+        img : array_like
+            The 2D sinogram [n_time_pts, n_ant_pos] or image to render;
+            the magnitude of complex values is used
+        path : str
+            The full path to the saved .png file
+        title : str
+            The title of the figure
+        vmin : float
+            The value at the bottom of the colormap, if None, the min
+        vmax : float
+            The value at the top of the colormap, if None, the max
+        """
+
+        img = np.abs(img)
+
+        if img.shape != self._shape:  # Update the axes for new shapes
+            self._set_extent(img.shape)
+
+        self._img.set_data(img)
+        self._img.set_clim(np.min(img) if vmin is None else vmin,
+                           np.max(img) if vmax is None else vmax)
+        self._title.set_text(title)
+
+        with matplotlib.rc_context(font_rc):
+            self._fig.savefig(path, dpi=self.dpi)
+
+    def close(self):
+        """Releases the figure"""
+        self._fig.clear()
+
+
+###############################################################################
+
+
+def _render_chunk(imgs, paths, titles, fast, renderer_kwargs, scale):
+    """Renders a chunk of images in a worker process
+
+    Returns the num of images rendered.
+    """
+
+    if fast:  # If using the fast path, make the lookup table once
+
+        lut = _get_cmap_lut(renderer_kwargs.get('cmap', 'inferno'))
+
+        for img, path in zip(imgs, paths):
+            save_image_fast(img, path, scale=scale, lut=lut)
+
+    else:  # If rendering figures, reuse one figure for the chunk
+
+        renderer = SinogramRenderer(**renderer_kwargs)
+
+        for img, path, title in zip(imgs, paths, titles):
+            renderer.render(img, path, title=title)
+
+        renderer.close()
+
+    return len(imgs)
+
+
+def _iter_chunk_args(dataset, expt_idxs, paths, titles, chunk_size, fast,
+                     renderer_kwargs, scale):
+    """Yields the args of _render_chunk() for each chunk of expts
+
+    The images of each chunk are only read (ex: from a memory-mapped
+    dataset) when the chunk is reached, and only their magnitude is
+    kept, as float32, so that at most a few chunks are in memory.
+    """
+
+    for ii in range(0, len(expt_idxs), chunk_size):  # For each chunk
+
+        imgs = np.abs(np.asarray(dataset[expt_idxs[ii:ii + chunk_size]]))
+
+        yield (imgs.astype(np.float32), paths[ii:ii + chunk_size],
+               titles[ii:ii + chunk_size], fast, renderer_kwargs, scale)
+
+
+def render_dataset(dataset, output_dir, metadata=None, expt_idxs=None,
+                   md_filter=None, kind='sinogram', fast=False,
+                   name_fmt='%s_%s.png', n_workers=None, chunk_size=16,
+                   scale=1, logger=null_logger, **renderer_kwargs):
+    """Renders a .png of each (or each selected) expt in a dataset
+
+    The expts are rendered in chunks by a pool of worker processes,
+    each of which reuses one figure (see SinogramRenderer) or, if fast,
+    writes the magnitude of each image through the colormap without
+    making a figure (see save_image_fast()).
+
+    Parameters
+    ----------
+    dataset : array_like
+        The time-domain data [n_expts, n_time_pts, n_ant_pos] (or
+        reconstructed images [n_expts, n_y, n_x]) of each expt
+    output_dir : str
+        The dir in which the .png files are saved
+    metadata : list
+        The metadata dict of each expt in the dataset; if given, the
+        files are named and titled by the unique ID of each expt
+    expt_idxs : array_like
+        The indices of the expts to render, if None, renders all (or
+        all that satisfy md_filter)
+    md_filter :
+        Function of the metadata dict of an expt that returns True if
+        the expt is to be rendered (ex: lambda md: md['n_session'] == 3)
+    kind : str
+        The kind of images, 'sinogram' or 'image'
+    fast : bool
+        If True, uses the fast path, without axes, labels or colorbar
+    name_fmt : str
+        The format of the .png file names, filled with the kind and
+        the unique ID (or index) of the expt
+    n_workers : int
+        The number of worker processes, if None, uses the num of CPUs,
+        if 0, renders in this process
+    chunk_size : int
+        The num of expts rendered by a worker at once
+    scale : int
+        The enlargement of each pixel, if fast
+    logger :
+        Logger for logging progress
+    renderer_kwargs :
+        Keyword arguments for the SinogramRenderer (ex: ini_t, fin_t,
+        cmap, dpi)
+
+    Returns
+    -------
+    paths : list
+        The paths of the saved .png files
+    """
+
+    if expt_idxs is None:  # If no expts specified, use all
+        expt_idxs = range(np.shape(dataset)[0])
+
+    if md_filter is not None:  # Keep the expts that satisfy the filter
+
+        assert metadata is not None, \
+            'Error: metadata is required to use md_filter'
+
+        expt_idxs = [expt_idx for expt_idx in expt_idxs
+                     if md_filter(metadata[expt_idx])]
+
+    expt_idxs = list(expt_idxs)
+
+    verify_path(output_dir)
+
+    # Find the label (unique ID, if known) of each expt
+    if metadata is not None:
+        labels = ['id%d' % metadata[expt_idx]['id'] for expt_idx in expt_idxs]
+    else:
+        labels = ['%05d' % expt_idx for expt_idx in expt_idxs]
+
+    paths = [os.path.join(output_dir, name_fmt % (kind, label))
+             for label in labels]
+    titles = ['%s %s' % (label.upper(), kind.capitalize())
+              for label in labels]
+
+    renderer_kwargs['kind'] = kind
+
+    if n_workers is None:  # If no num of workers, use one per CPU
+        n_workers = os.cpu_count() or 1
+
+    progress = ProgressReporter(logger, n_total=len(expt_idxs),
+                                desc='\tRendering %ss' % kind)
+
+    # The args of each chunk, made as the chunks are reached
+    chunk_args = _iter_chunk_args(dataset, expt_idxs, paths, titles,
+                                  chunk_size, fast, renderer_kwargs, scale)
+
+    if n_workers == 0:  # If rendering in this process
+        for args in chunk_args:
+            progress.update(_render_chunk(*args))
+
+    else:  # If rendering in a pool of worker processes
+
+        with ProcessPoolExecutor(max_workers=n_workers) as pool:
+
+            pending = set()  # The chunks submitted but not yet done
+
+            for args in chunk_args:
+
+                # Keep at most two chunks per worker in flight, so that
+                # the chunks are not all read into memory at once
+                if len(pending) >= 2 * n_workers:
+                    done, pending = wait(pending,
+                                         return_when=FIRST_COMPLETED)
+                    for future in done:
+                        progress.update(future.result())
+
+                pending.add(pool.submit(_render_chunk, *args))
+
+            for future in pending:  # Wait for the remaining chunks
+                progress.update(future.result())
+
+    progress.close()
+
+    return paths
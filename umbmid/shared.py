@@ -0,0 +1,320 @@
+"""
+Tyson Reimer
+University of Manitoba
+October 19th, 2026
+"""
+
+import os
+import json
+import time
+import pickle
+import inspect
+import tempfile
+from multiprocessing import shared_memory, resource_tracker
+
+import numpy as np
+
+from umbmid import null_logger
+
+###############################################################################
+
+# The name of the registry file of the shared datasets, in the temp dir
+__REGISTRY_FNAME = 'umbmid-shared-datasets.json'
+
+# The shared memory segments attached by this process, by segment name,
+# so that the views of each segment stay valid for the process lifetime
+__attached = dict()
+
+###############################################################################
+
+
+def _get_registry_path(registry_path=None):
+    """Returns the path to the registry file of the shared datasets"""
+
+    if registry_path is None:  # If no path, use the default
+        registry_path = os.path.join(tempfile.gettempdir(),
+                                     __REGISTRY_FNAME)
+
+    return registry_path
+
+
+def _read_registry(registry_path):
+    """Returns the registry dict, empty if there is no registry file"""
+
+    if not os.path.isfile(registry_path):
+        return dict()
+
+    with open(registry_path, 'r') as handle:
+        return json.load(handle)
+
+
+def _write_registry(registry_path, registry):
+    """Writes the registry dict, through a temp file and a rename"""
+
+    tmp_path = '%s.%d.tmp' % (registry_path, os.getpid())
+
+    with open(tmp_path, 'w') as handle:
+        json.dump(registry, handle, indent=2)
+
+    os.replace(tmp_path, registry_path)
+
+
+def _attach_segment(shm_name, untrack=True):
+    """Attaches to a shared memory segment made by another process
+
+    On POSIX, the resource tracker of an attaching process unlinks the
+    segment when that process exits (before Python 3.13, which adds
+    track=False), which would remove it from the server and every other
+    client, so the segment is not tracked by this process.
+
+    Parameters
+    ----------
+    shm_name : str
+        The name of the segment
+    untrack : bool
+        If True, the segment is not tracked by this process; False if
+        this process made the segment, so that it is still unlinked
+        when this process exits
+
+    Returns
+    -------
+    shm : shared_memory.SharedMemory
+        The attached segment, cached for the process lifetime
+    """
+
+    if shm_name in __attached:  # If already attached, reuse it
+        return __attached[shm_name]
+
+    if (untrack and 'track'
+            in inspect.signature(shared_memory.SharedMemory).parameters):
+        shm = shared_memory.SharedMemory(name=shm_name, track=False)
+
+    else:
+        shm = shared_memory.SharedMemory(name=shm_name)
+
+        # Stop the tracker unlinking it at exit
+        if untrack and os.name == 'posix':
+            resource_tracker.unregister(shm._name, 'shared_memory')
+
+    __attached[shm_name] = shm
+
+    return shm
+
+
+###############################################################################
+
+
+class DatasetServer:
+    """Holds datasets in shared memory for other processes to use
+
+    Each published dataset (ex: a clean fd_data array) is copied once
+    into a shared memory segment, and its metadata is pickled into a
+    second segment. Their names, shapes and dtypes are written to a
+    registry file, so that client processes on the same node can get
+    read-only views of them by name (see load_shared_dataset()),
+    instead of each loading a private copy. The segments are removed
+    by close(), or when the server process exits.
+    """
+
+    def __init__(self, registry_path=None, logger=null_logger):
+        """Init class DatasetServer
+
+        Parameters
+        ----------
+        registry_path : str
+            The path to the registry file, if None, uses a file in the
+            temp dir; clients must use the same path
+        logger :
+            The logger
+        """
+
+        self.registry_path = _get_registry_path(registry_path)
+        self.logger = logger
+
+        # The data and metadata segments of each published dataset
+        self._segments = dict()
+
+    def publish(self, name, data, metadata=None, chunk_size=64):
+        """Copies a dataset into shared memory and registers it
+
+        Parameters
+        ----------
+        name : str
+            The name of the dataset, used by the clients
+        data : array_like
+            The data of the dataset (ex: [n_expts, n_freqs, n_ant_pos]);
+            may be memory-mapped, as it is copied in chunks
+        metadata :
+            The metadata of the dataset (ex: the list of the metadata
+            dict of each expt), must be picklable
+        chunk_size : int
+            The num of entries along the first axis copied at once
+        """
+
+        assert np.dtype(data.dtype) != object, \
+            'Error: object arrays cannot be shared'
+        assert np.ndim(data) >= 1, 'Error: data must have at least 1 dim'
+
+        if name in self._segments:  # If re-publishing, remove the old
+            self.unpublish(name)
+
+        shape = tuple(np.shape(data))
+        dtype = np.dtype(data.dtype)
+
+        data_shm = shared_memory.SharedMemory(
+            create=True, size=max(int(np.prod(shape)) * dtype.itemsize, 1))
+        shared_data = np.ndarray(shape, dtype=dtype, buffer=data_shm.buf)
+
+        for start in range(0, shape[0], chunk_size):  # For each chunk
+            shared_data[start:start + chunk_size] = \
+                data[start:start + chunk_size]
+
+        del shared_data  # Release the view, so the segment can close
+
+        md_bytes = pickle.dumps(metadata, protocol=pickle.HIGHEST_PROTOCOL)
+        md_shm = shared_memory.SharedMemory(create=True,
+                                            size=max(len(md_bytes), 1))
+        md_shm.buf[:len(md_bytes)] = md_bytes
+
+        self._segments[name] = (data_shm, md_shm)
+
+        registry = _read_registry(self.registry_path)
+        registry[name] = {
+            'data_shm': data_shm.name,
+            'shape': list(shape),
+            'dtype': dtype.str,
+            'md_shm': md_shm.name,
+            'md_bytes': len(md_bytes),
+            'pid': os.getpid(),
+        }
+        _write_registry(self.registry_path, registry)
+
+        self.logger.info('\tPublished %s: shape %s, %s, %.1f MB'
+                         % (name, shape, dtype, data_shm.size / 2**20))
+
+    def unpublish(self, name):
+        """Removes a dataset from shared memory and from the registry
+
+        Clients that attached to the dataset keep their views until
+        they exit, but new clients can no longer attach to it.
+
+        Parameters
+        ----------
+        name : str
+            The name of the dataset
+        """
+
+        registry = _read_registry(self.registry_path)
+
+        if registry.get(name, {}).get('pid') == os.getpid():
+            del registry[name]
+            _write_registry(self.registry_path, registry)
+
+        for shm in self._segments.pop(name):
+            shm.close()
+            shm.unlink()
+
+    def list_datasets(self):
+        """Returns the sorted names of the datasets of this server"""
+        return sorted(self._segments.keys())
+
+    def serve_forever(self, poll_interval=1.0):
+        """Keeps the datasets in shared memory until interrupted
+
+        Parameters
+        ----------
+        poll_interval : float
+            The time, in seconds, between checks for an interrupt
+        """
+
+        try:
+            while True:
+                time.sleep(poll_interval)
+
+        except KeyboardInterrupt:
+            self.logger.info('\tInterrupted, removing shared datasets...')
+
+        finally:
+            self.close()
+
+    def close(self):
+        """Removes every dataset of this server"""
+
+        for name in self.list_datasets():
+            self.unpublish(name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+        return False
+
+
+###############################################################################
+
+
+def list_shared_datasets(registry_path=None):
+    """Returns the sorted names of the registered shared datasets
+
+    Parameters
+    ----------
+    registry_path : str
+        The path to the registry file, if None, uses the default
+
+    Returns
+    -------
+    names : list
+        The names of the datasets in the registry
+    """
+    return sorted(_read_registry(_get_registry_path(registry_path)).keys())
+
+
+def load_shared_dataset(name, registry_path=None):
+    """Returns a read-only view of a shared dataset, and its metadata
+
+    The data is not copied: the returned array is a view of the shared
+    memory of the DatasetServer, so it uses no new memory.
+
+    Parameters
+    ----------
+    name : str
+        The name of the dataset
+    registry_path : str
+        The path to the registry file, if None, uses the default
+
+    Returns
+    -------
+    data : array_like
+        The read-only view of the data of the dataset
+    metadata :
+        The metadata of the dataset (a private copy)
+    """
+
+    registry = _read_registry(_get_registry_path(registry_path))
+
+    assert name in registry, \
+        'Error: no shared dataset %s, datasets are: %s' \
+        % (name, sorted(registry.keys()))
+
+    info = registry[name]
+
+    # If this process is the server, it still owns the segments
+    untrack = info['pid'] != os.getpid()
+
+    try:
+        data_shm = _attach_segment(info['data_shm'], untrack=untrack)
+        md_shm = _attach_segment(info['md_shm'], untrack=untrack)
+
+    except FileNotFoundError:
+        raise FileNotFoundError('Shared dataset %s is registered, but its '
+                                'server (pid %d) is no longer running'
+                                % (name, info['pid']))
+
+    data = np.ndarray(tuple(info['shape']), dtype=np.dtype(info['dtype']),
+                      buffer=data_shm.buf)
+    data.flags.writeable = False
+
+    metadata = pickle.loads(md_shm.buf[:info['md_bytes']])
+
+    return data, metadata
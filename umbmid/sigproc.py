@@ -9,11 +9,12 @@ import numpy as np
 ###############################################################################
 
 
-def iczt(fd_data, ini_t, fin_t, n_time_pts, ini_f, fin_f):
+def iczt(fd_data, ini_t, fin_t, n_time_pts, ini_f, fin_f, dtype=complex):
     """Compute the ICZT of the fd_data, transforming to the time-domain.
 
-    NOTE: Currently supports 1D or 2D fd_data arrays, and will perform
-    the transform along the 0th axis of a 2D array
+    NOTE: Currently supports 1D, 2D or 3D fd_data arrays, and will
+    perform the transform along the 0th axis of a 2D array, or along
+    the 1st axis of a 3D array (a batch of 2D arrays, one per expt)
 
     Parameters
     ----------
@@ -33,6 +34,9 @@ def iczt(fd_data, ini_t, fin_t, n_time_pts, ini_f, fin_f):
         The initial frequency used in the scan, in Hz
     fin_f : float
         The final frequency used in the scan, in Hz
+    dtype :
+        The complex dtype used to compute the transform and of the
+        returned array, complex (complex128) or np.complex64
 
     Returns
     -------
@@ -40,7 +44,8 @@ def iczt(fd_data, ini_t, fin_t, n_time_pts, ini_f, fin_f):
         Array of the transformed data
     """
 
-    n_freqs = fd_data.shape[0]  # Find the number of frequencies use
+    # Find the number of frequencies used
+    n_freqs = fd_data.shape[0] if np.ndim(fd_data) < 3 else fd_data.shape[1]
 
     # Find the conversion factor to convert from time-of-response to
     # angle around the unit circle
@@ -66,23 +71,13 @@ def iczt(fd_data, ini_t, fin_t, n_time_pts, ini_f, fin_f):
     z_vals = exp_theta_naught * exp_phi_naught**time_pts
     zs_power = np.power(z_vals[None, :], dummy_vec[:, None])
 
-    # If computing over a 2D array
-    if len(fd_data.shape) > 1:
+    # Compute the kernel in double-precision, then convert to the
+    # working dtype, and include the 1 / n_freqs normalization
+    zs_power = (zs_power / n_freqs).astype(dtype)
 
-        # Init array to return
-        td_data = np.zeros([n_time_pts, fd_data.shape[1]], dtype=complex)
-
-        # For each antenna position
-        for ant_pos in range(np.size(fd_data, axis=1)):
-
-            # Find the ICZT
-            td_data[:, ant_pos] = np.sum(fd_data[:, ant_pos][:, None] *
-                                         zs_power, axis=0) / n_freqs
-
-    else:  # If the fd_data is a 1D array
-
-        # Find the ICZT
-        td_data = np.sum(fd_data[:, None] * zs_power, axis=0) / n_freqs
+    # Find the ICZT at every antenna position (of every expt in a 3D
+    # array) at once as a single matrix product in the working dtype
+    td_data = zs_power.T @ np.asarray(fd_data, dtype=dtype)
 
     # Apply phase compensation
     td_data = phase_compensate(td_data, ini_f=ini_f, ini_t=ini_t, fin_t=fin_t,
@@ -173,19 +168,21 @@ def phase_compensate(td_data, ini_f, ini_t, fin_t, n_time_pts):
 
     n_dim = len(np.shape(td_data))
 
-    assert n_dim in [1, 2], "td_data must be 1D or 2D arr"
+    assert n_dim in [1, 2, 3], "td_data must be 1D, 2D or 3D arr"
 
     # Create vector of the time points used to represent the td_data
     time_vec = np.linspace(ini_t, fin_t, n_time_pts)
 
-    # Phase correction factor
+    # Phase correction factor, in the dtype of the td_data (if
+    # complex) so that single-precision data stays single-precision
     phase_fac = np.exp(1j * 2 * np.pi * ini_f * time_vec)
+    phase_fac = phase_fac.astype(np.result_type(td_data, np.complex64))
 
     if n_dim == 1:  # If td_data was 1D arr
 
         compensated_td_data = td_data * phase_fac  # Apply to measured data
 
-    else:  # If td_data was 2D arr
+    else:  # If td_data was 2D arr (or 3D arr of 2D arrs)
 
         compensated_td_data = td_data * phase_fac[:, None]
 
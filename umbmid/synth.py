@@ -0,0 +1,587 @@
+"""
+Tyson Reimer
+University of Manitoba
+October 19th, 2026
+"""
+
+import os
+import shutil
+import datetime
+import numpy as np
+
+from umbmid import null_logger, verify_path
+from umbmid.catalog import dtypes_dict, sparam_strs
+from umbmid.antennas import (get_phase_delay_rad, get_ant_xys, ini_ant_angs,
+                             multi_ant_offset)
+
+###############################################################################
+
+__SPEED_OF_LIGHT = 2.99792458e8  # The speed of light in air, in m/s
+
+# The delays (in seconds) and amplitudes of the reflections internal
+# to the antennas/cables, which are present in every scan (including
+# empty-chamber scans)
+__SYS_DELAYS = np.array([0.4e-9, 1.1e-9, 1.9e-9])
+__SYS_AMPS = np.array([0.3, 0.08, 0.02])
+
+# The reflection amplitudes of the point scatterers used to model the
+# adipose shell, the fibroglandular shell, and a tumor of 1 cm radius
+__ADI_AMP = 0.01
+__FIB_AMP = 0.02
+__TUM_AMP = 0.01
+
+__N_ADI_PTS = 36  # Number of points used to model the adipose shell
+__N_FIB_PTS = 8  # Number of points used to model the fib shell
+
+# The radius of each adipose shell, in cm, and the adipose and
+# fibroglandular volumes of each phantom component, in cm^3
+__ADI_RADS = {'A1': 6.0, 'A2': 5.0, 'A3': 5.5, 'A4': 6.5, 'A5': 4.5}
+__ADI_VOLS = {'A1': 850.0, 'A2': 520.0, 'A3': 660.0, 'A4': 1020.0,
+              'A5': 400.0}
+__FIB_VOLS = {'F1': 140.0, 'F2': 95.0, 'F3': 180.0, 'F4': 60.0,
+              'F5': 120.0, 'F6': 210.0}
+
+###############################################################################
+
+
+def _make_scatter_resp(tx_xs, tx_ys, rx_xs, rx_ys, scat_xs, scat_ys,
+                       scat_amps, freqs):
+    """Get the freq-domain response of point scatterers at each position
+
+    Parameters
+    ----------
+    tx_xs : array_like
+        The x-positions of the transmitting antenna at each scan
+        position, in meters
+    tx_ys : array_like
+        The y-positions of the transmitting antenna at each scan
+        position, in meters
+    rx_xs : array_like
+        The x-positions of the receiving antenna at each scan
+        position, in meters
+    rx_ys : array_like
+        The y-positions of the receiving antenna at each scan
+        position, in meters
+    scat_xs : array_like
+        The x-positions of each point scatterer, in meters
+    scat_ys : array_like
+        The y-positions of each point scatterer, in meters
+    scat_amps : array_like
+        The reflection amplitude of each point scatterer
+    freqs : array_like
+        The frequencies used in the scan, in Hz
+
+    Returns
+    -------
+    resp : array_like
+        The response of the point scatterers, of shape
+        [n_freqs, n_ant_pos]
+    """
+
+    # Find the distance from each antenna position to each scatterer
+    tx_dists = np.sqrt((tx_xs[:, None] - scat_xs[None, :])**2
+                       + (tx_ys[:, None] - scat_ys[None, :])**2)
+    rx_dists = np.sqrt((rx_xs[:, None] - scat_xs[None, :])**2
+                       + (rx_ys[:, None] - scat_ys[None, :])**2)
+
+    # Find the time-of-response and the spreading loss of each
+    # scatterer at each antenna position
+    resp_times = (tx_dists + rx_dists) / __SPEED_OF_LIGHT
+    resp_amps = scat_amps[None, :] * 0.01 / (tx_dists * rx_dists)
+
+    # Sum the contribution of each scatterer at each frequency
+    resp = np.sum(resp_amps[None, :, :]
+                  * np.exp(-2j * np.pi * freqs[:, None, None]
+                           * resp_times[None, :, :]),
+                  axis=2)
+
+    return resp
+
+
+def make_synth_scan(md, gen='one', sparams='s11', n_freqs=1001, ini_f=1e9,
+                    fin_f=8e9, n_ant_pos=72, noise_std=1e-4):
+    """Make the freq-domain s-params of a synthetic scan
+
+    Models the antennas as moving on the documented scan geometry and
+    models the phantom as a set of point scatterers: a ring of points
+    for the adipose shell, a cluster of points for the fibroglandular
+    shell, and a single point for the tumor. Components that are not
+    present in the metadata (e.g., NaN tum_rad) are omitted. The
+    internal antenna/cable reflections are present in every scan.
+
+    Parameters
+    ----------
+    md : dict
+        The metadata dict of the scan, as would be returned by
+        umbmid.build.import_metadata()
+    gen : str
+        The generation of data, must be in ['one', 'two', 'three']
+    sparams : str
+        The sparams to make, must be in ['s11', 's21']
+    n_freqs : int
+        The number of frequencies used in the scan
+    ini_f : float
+        The initial frequency used in the scan, in Hz
+    fin_f : float
+        The final frequency used in the scan, in Hz
+    n_ant_pos : int
+        The number of antenna positions used in the scan
+    noise_std : float
+        The standard deviation of the complex white noise added to the
+        s-params
+
+    Returns
+    -------
+    fd_data : array_like
+        The synthetic s-params in the frequency domain, of shape
+        [n_freqs, n_ant_pos], as if the scan were performed clockwise
+    """
+
+    assert gen in ['one', 'two', 'three'], \
+        "Error: gen must be in ['one', 'two', 'three']"
+
+    assert sparams in ['s11', 's21'], \
+        "Error: sparams must be in ['s11', 's21']"
+
+    freqs = np.linspace(ini_f, fin_f, n_freqs)  # The scan frequencies
+
+    # Find the antenna trajectory radius, accounting for phase delay
+    ant_rad = get_phase_delay_rad(md['ant_rad'] / 100)
+
+    # Find the antenna positions for the transmitting antenna
+    tx_xs, tx_ys = get_ant_xys(ini_ant_angs[gen], ant_rad,
+                               n_ant_pos=n_ant_pos)
+
+    if sparams in ['s11']:  # If monostatic, tx is also rx
+        rx_xs, rx_ys = tx_xs, tx_ys
+
+    else:  # If multistatic, rx is the port B antenna
+        rx_xs, rx_ys = get_ant_xys(ini_ant_angs[gen] + multi_ant_offset,
+                                   ant_rad, n_ant_pos=n_ant_pos)
+
+    # Make the internal reflections, present in every scan
+    fd_data = np.sum(__SYS_AMPS[None, :]
+                     * np.exp(-2j * np.pi * freqs[:, None]
+                              * __SYS_DELAYS[None, :]), axis=1)
+    fd_data = fd_data[:, None] * np.ones([1, n_ant_pos])
+
+    if sparams in ['s21']:  # If multistatic, add the direct coupling
+        fd_data = 0.1 * fd_data
+
+    # Init lists for the positions/amplitudes of the scatterers, in cm
+    scat_xs, scat_ys, scat_amps = [], [], []
+
+    adi_id = md['phant_id'][:2]  # Get the adipose shell ID
+
+    if adi_id != '':  # If an adipose shell was in the scan
+
+        # Get the center of the adipose shell
+        adi_x = 0.0 if np.isnan(md['adi_x']) else md['adi_x']
+        adi_y = 0.0 if np.isnan(md['adi_y']) else md['adi_y']
+
+        # Model the adipose shell as a ring of points
+        ring_angs = np.linspace(0, 2 * np.pi, __N_ADI_PTS, endpoint=False)
+        scat_xs += list(adi_x + __ADI_RADS[adi_id] * np.cos(ring_angs))
+        scat_ys += list(adi_y + __ADI_RADS[adi_id] * np.sin(ring_angs))
+        scat_amps += [__ADI_AMP] * __N_ADI_PTS
+
+        if 'F' in md['phant_id']:  # If a fib shell was in the scan
+
+            # Get the center of the fib shell, wrt the chamber center
+            fib_x = adi_x + (0.0 if np.isnan(md['fib_x']) else md['fib_x'])
+            fib_y = adi_y + (0.0 if np.isnan(md['fib_y']) else md['fib_y'])
+
+            # Model the fib shell as a small cluster of points
+            clust_angs = (np.linspace(0, 2 * np.pi, __N_FIB_PTS,
+                                      endpoint=False)
+                          + np.deg2rad(md['fib_ang']))
+            scat_xs += list(fib_x + 1.5 * np.cos(clust_angs))
+            scat_ys += list(fib_y + 1.5 * np.sin(clust_angs))
+            scat_amps += [__FIB_AMP] * __N_FIB_PTS
+
+    if not np.isnan(md['tum_rad']):  # If a tumor was in the scan
+
+        # Model the tumor as a point, amplitude scaling with its size
+        scat_xs.append(md['tum_x'])
+        scat_ys.append(md['tum_y'])
+        scat_amps.append(__TUM_AMP * md['tum_rad']**2)
+
+    if len(scat_xs) > 0:  # If there were any scatterers in the scan
+
+        # Add the response of the scatterers, converting cm to m
+        fd_data = fd_data + _make_scatter_resp(tx_xs, tx_ys, rx_xs, rx_ys,
+                                               np.array(scat_xs) / 100,
+                                               np.array(scat_ys) / 100,
+                                               np.array(scat_amps),
+                                               freqs)
+
+    # Add complex white noise
+    fd_data = fd_data + noise_std * (np.random.randn(*fd_data.shape)
+                                     + 1j * np.random.randn(*fd_data.shape))
+
+    return fd_data
+
+
+def save_synth_txt(fd_data, path):
+    """Save freq-domain s-params to a raw .txt file
+
+    Writes the s-params in the format read by
+    umbmid.loadsave.load_fd_data(), i.e., one row per frequency and
+    alternating columns of the real and imaginary parts at each
+    antenna position.
+
+    Parameters
+    ----------
+    fd_data : array_like
+        The s-params in the frequency domain, of shape
+        [n_freqs, n_ant_pos]
+    path : str
+        The full path to the .txt file to be saved
+    """
+
+    # Interleave the real and imaginary parts into columns
+    raw_data = np.zeros([fd_data.shape[0], 2 * fd_data.shape[1]])
+    raw_data[:, 0::2] = np.real(fd_data)
+    raw_data[:, 1::2] = np.imag(fd_data)
+
+    np.savetxt(path, raw_data, fmt='%.8e', delimiter='\t')
+
+
+def _format_md_val(val, info_piece):
+    """Format a metadata value as a str for a -metadata.csv file
+
+    Parameters
+    ----------
+    val :
+        The value of the info piece
+    info_piece : str
+        The info piece, must be in dtypes_dict
+
+    Returns
+    -------
+    val_str : str
+        The value as a str, or the empty str if the value is missing
+    """
+
+    if dtypes_dict[info_piece] == str:  # If the info piece is a str
+        val_str = val
+
+    elif np.isnan(val):  # If the numeric value is missing
+        val_str = ''
+
+    elif dtypes_dict[info_piece] == int:  # If the info piece is an int
+        val_str = '%d' % val
+
+    else:  # If the info piece is a float
+        val_str = '%.2f' % val
+
+    return val_str
+
+
+def make_synth_session_md(n_session, ini_id, date, n_adi=2, n_expts_per_adi=6,
+                          tum_frac=0.5, tum_rads=(1.0, 2.0, 3.0),
+                          tum_rad_probs=None, birads_dict=None,
+                          ant_rad=21.0):
+    """Make the metadata of each expt in a synthetic session
+
+    Each session begins with an empty-chamber scan. For each adipose
+    shell used in the session, an adipose-only reference scan is
+    followed by n_expts_per_adi scans of adipose/fibroglandular
+    phantoms, with a tumor present in each of these scans with
+    probability tum_frac.
+
+    Parameters
+    ----------
+    n_session : int
+        The number of the session
+    ini_id : int
+        The unique ID of the first expt in the session
+    date : str
+        The date of the session, format YEAR-MONTH-DAY
+    n_adi : int
+        The number of adipose shells used in the session
+    n_expts_per_adi : int
+        The number of adipose/fibroglandular scans performed for each
+        adipose shell
+    tum_frac : float
+        The probability that each adipose/fibroglandular scan contains
+        a tumor
+    tum_rads : tuple
+        The possible tumor radii, in cm
+    tum_rad_probs : array_like
+        The probability of each of the tum_rads, if None, uses a
+        uniform distribution
+    birads_dict : dict
+        The BI-RADS class of each phantom (key ex: 'A2F3'), if None,
+        all phantoms are of BI-RADS class 1
+    ant_rad : float
+        The radius of the antenna trajectory in the session, in cm
+
+    Returns
+    -------
+    session_md : list
+        List of the metadata dict for each expt in the session
+    """
+
+    # Find the keys that are not explicitly set here, to be missing
+    md_template = dict()
+    for info_piece in dtypes_dict.keys():
+        if dtypes_dict[info_piece] == str:
+            md_template[info_piece] = ''
+        else:
+            md_template[info_piece] = np.NaN
+
+    md_template['date'] = date
+    md_template['n_session'] = n_session
+    md_template['ant_rad'] = ant_rad
+    md_template['ant_z'] = 0.0
+
+    # Make the empty-chamber reference scan
+    emp_md = dict(md_template)
+    emp_md['n_expt'] = 1
+    emp_md['id'] = ini_id
+
+    session_md = [emp_md]
+
+    # Choose the adipose shells used in this session
+    adi_ids = np.random.choice(list(__ADI_RADS.keys()), size=n_adi,
+                               replace=False)
+
+    for adi_id in adi_ids:  # For each adipose shell in the session
+
+        # Choose the position of the adipose shell
+        adi_x, adi_y = np.round(np.random.uniform(-1, 1, size=2), 1)
+
+        # Make the adipose-only reference scan
+        adi_md = dict(md_template)
+        adi_md['n_expt'] = len(session_md) + 1
+        adi_md['id'] = ini_id + len(session_md)
+        adi_md['phant_id'] = adi_id
+        adi_md['adi_vol'] = __ADI_VOLS[adi_id]
+        adi_md['emp_ref_id'] = ini_id
+        adi_md['adi_x'] = adi_x
+        adi_md['adi_y'] = adi_y
+
+        session_md.append(adi_md)
+
+        adi_ref_id = adi_md['id']  # Store the ID of the adi ref scan
+
+        for _ in range(n_expts_per_adi):  # For each fib scan
+
+            # Choose the fibroglandular shell and its position
+            fib_id = np.random.choice(list(__FIB_VOLS.keys()))
+
+            expt_md = dict(adi_md)
+            expt_md['n_expt'] = len(session_md) + 1
+            expt_md['id'] = ini_id + len(session_md)
+            expt_md['phant_id'] = adi_id + fib_id
+            expt_md['fib_vol'] = __FIB_VOLS[fib_id]
+            expt_md['adi_ref_id'] = adi_ref_id
+            expt_md['fib_ang'] = float(np.random.choice([0, 60, 120, 180,
+                                                         240, 300]))
+            expt_md['fib_x'], expt_md['fib_y'] = \
+                np.round(np.random.uniform(-1, 1, size=2), 1)
+
+            if birads_dict is not None:
+                expt_md['birads'] = birads_dict[adi_id + fib_id]
+            else:
+                expt_md['birads'] = 1
+
+            if np.random.random() < tum_frac:  # If containing a tumor
+
+                tum_rad = np.random.choice(tum_rads, p=tum_rad_probs)
+
+                # Choose the tumor position within the adipose shell
+                tum_ang = np.random.uniform(0, 2 * np.pi)
+                tum_pos_rad = np.random.uniform(0, max(__ADI_RADS[adi_id]
+                                                       - tum_rad - 0.5, 0))
+
+                expt_md['tum_rad'] = tum_rad
+                expt_md['tum_diam'] = 2 * tum_rad
+                expt_md['tum_shape'] = 'sphere'
+                expt_md['tum_x'] = np.round(adi_x + tum_pos_rad
+                                            * np.cos(tum_ang), 1)
+                expt_md['tum_y'] = np.round(adi_y + tum_pos_rad
+                                            * np.sin(tum_ang), 1)
+                expt_md['tum_z'] = np.round(np.random.uniform(-3, -1), 1)
+                expt_md['tum_in_fib'] = int(tum_pos_rad < 2)
+
+            session_md.append(expt_md)
+
+    return session_md
+
+
+def make_synth_dataset(data_dir, gen='one', n_sessions=10, n_adi=2,
+                       n_expts_per_adi=6, tum_frac=0.5,
+                       tum_rads=(1.0, 2.0, 3.0), tum_rad_probs=None,
+                       birads_probs=None, ccw_frac=0.5, n_freqs=1001,
+                       ini_f=1e9, fin_f=8e9, n_ant_pos=72, noise_std=1e-4,
+                       ini_date='2019-07-01', rand_seed=0, overwrite=False,
+                       logger=null_logger):
+    """Make a synthetic raw dataset in the UM-BMID folder structure
+
+    Writes the raw session folders to data_dir/gen-<gen>/raw/, with
+    each session folder containing a -metadata.csv file and the
+    Mono (and Multi, for gen-two and gen-three) .txt files of each
+    expt, so that the synthetic dataset can be loaded with
+    umbmid.build in the same way as the real dataset. The
+    gen-<gen>/raw/ folder must be missing or empty, unless overwrite
+    is True, as the files of a previous dataset (ex: made with another
+    seed) would otherwise be mixed with the new files.
+
+    Parameters
+    ----------
+    data_dir : str
+        The dataset root directory, in which the gen-<gen>/raw/ folder
+        will be made
+    gen : str
+        The generation of data, must be in ['one', 'two', 'three']
+    n_sessions : int
+        The number of experimental sessions to make
+    n_adi : int
+        The number of adipose shells used in each session
+    n_expts_per_adi : int
+        The number of adipose/fibroglandular scans performed for each
+        adipose shell in each session
+    tum_frac : float
+        The probability that each adipose/fibroglandular scan contains
+        a tumor
+    tum_rads : tuple
+        The possible tumor radii, in cm
+    tum_rad_probs : array_like
+        The probability of each of the tum_rads, if None, uses a
+        uniform distribution
+    birads_probs : array_like
+        The probability of each BI-RADS class [1, 2, 3, 4] for each
+        phantom, if None, uses a uniform distribution
+    ccw_frac : float
+        The probability that each scan is performed counterclockwise
+    n_freqs : int
+        The number of frequencies used in each scan
+    ini_f : float
+        The initial frequency used in each scan, in Hz
+    fin_f : float
+        The final frequency used in each scan, in Hz
+    n_ant_pos : int
+        The number of antenna positions used in each scan
+    noise_std : float
+        The standard deviation of the complex white noise added to the
+        s-params
+    ini_date : str
+        The date of the first session, format YEAR-MONTH-DAY. Each
+        subsequent session is performed on the following day.
+    rand_seed : int
+        The seed used for the random number generator
+    overwrite : bool
+        If True, an existing gen-<gen>/raw/ folder is removed before
+        the new dataset is written
+    logger :
+        Logger for logging progress
+
+    Returns
+    -------
+    metadata : list
+        List of the metadata dict for each expt in the dataset
+    """
+
+    assert gen in ['one', 'two', 'three'], \
+        "Error: gen must be in ['one', 'two', 'three']"
+
+    assert 0 <= tum_frac <= 1, 'Error: tum_frac must be between 0 and 1'
+    assert 0 <= ccw_frac <= 1, 'Error: ccw_frac must be between 0 and 1'
+
+    np.random.seed(rand_seed)  # Set the seed
+
+    if gen in ['one']:  # If the first generation, only S11
+        possible_sparams = ['s11']
+    else:  # If the second or third generation
+        possible_sparams = ['s11', 's21']
+
+    # Assign a BI-RADS class to each possible phantom
+    birads_dict = dict()
+    for adi_id in __ADI_RADS.keys():
+        for fib_id in __FIB_VOLS.keys():
+            birads_dict[adi_id + fib_id] = int(np.random.choice(
+                [1, 2, 3, 4], p=birads_probs))
+
+    # Make the raw dir for this generation of data
+    verify_path(data_dir)
+    verify_path(os.path.join(data_dir, 'gen-%s/' % gen))
+    raw_dir = os.path.join(data_dir, 'gen-%s/raw/' % gen)
+
+    if os.path.isdir(raw_dir) and len(os.listdir(raw_dir)) > 0:
+
+        assert overwrite, \
+            'Error: %s is not empty, use overwrite=True to replace it' \
+            % raw_dir
+
+        logger.info('Removing the existing %s...', raw_dir)
+        shutil.rmtree(raw_dir)
+
+    verify_path(raw_dir)
+
+    ini_date = datetime.date.fromisoformat(ini_date)
+
+    metadata = []  # Init list to return
+
+    for n_session in range(1, n_sessions + 1):  # For each session
+
+        date = (ini_date + datetime.timedelta(days=n_session - 1)).isoformat()
+
+        logger.info('Making session [%4d / %4d]:\t%s...', n_session,
+                    n_sessions, date)
+
+        # Make the metadata of each expt in this session
+        session_md = make_synth_session_md(n_session=n_session,
+                                           ini_id=len(metadata) + 1,
+                                           date=date,
+                                           n_adi=n_adi,
+                                           n_expts_per_adi=n_expts_per_adi,
+                                           tum_frac=tum_frac,
+                                           tum_rads=tum_rads,
+                                           tum_rad_probs=tum_rad_probs,
+                                           birads_dict=birads_dict,
+                                           ant_rad=21.0)
+
+        session_dir = os.path.join(raw_dir, date)
+        verify_path(session_dir)
+
+        # Write the -metadata.csv file for this session
+        md_keys = list(dtypes_dict.keys())
+        with open(os.path.join(session_dir, '%s-metadata.csv' % date),
+                  'w') as md_file:
+            md_file.write(','.join(md_keys) + '\n')
+            for expt_md in session_md:
+                md_file.write(','.join([_format_md_val(expt_md[md_key],
+                                                       md_key)
+                                        for md_key in md_keys]) + '\n')
+
+        for expt_md in session_md:  # For each expt in the session
+
+            # Determine the rotation direction of this scan
+            if np.random.random() < ccw_frac:
+                rot_str = 'foC'
+            else:
+                rot_str = 'faW'
+
+            for sparams in possible_sparams:  # For each sparam
+
+                fd_data = make_synth_scan(expt_md, gen=gen, sparams=sparams,
+                                          n_freqs=n_freqs, ini_f=ini_f,
+                                          fin_f=fin_f, n_ant_pos=n_ant_pos,
+                                          noise_std=noise_std)
+
+                # If counterclockwise, store in counterclockwise order
+                if rot_str in ['foC']:
+                    fd_data = np.flip(fd_data, axis=1)
+
+                expt_fname = ('%s_expt%02d_(%s_z0_a2000k_l%d)_%s.txt'
+                              % (sparam_strs[sparams], expt_md['n_expt'],
+                                 rot_str, n_ant_pos, date))
+
+                save_synth_txt(fd_data, os.path.join(session_dir,
+                                                     expt_fname))
+
+        metadata += session_md
+
+    return metadata
@@ -0,0 +1,177 @@
+"""
+Tyson Reimer
+University of Manitoba
+October 19th, 2026
+"""
+
+import os
+import time
+from concurrent.futures import (ProcessPoolExecutor, wait,
+                                FIRST_COMPLETED)
+
+from umbmid import null_logger
+from umbmid.profiling import Profiler, get_profiler, set_profiler
+
+###############################################################################
+
+
+class Task:
+    """A task in a task graph, which runs once all its deps are done
+
+    The func must be defined at the top level of a module, so that it
+    can be sent to a worker process, and the tasks should share large
+    intermediates through files (ex: a CleanStore) rather than through
+    their return values, which are sent back to the main process.
+    """
+
+    def __init__(self, name, func, kwargs=None, deps=()):
+        """Init class Task
+
+        Parameters
+        ----------
+        name : str
+            The unique name of the task
+        func :
+            The function that performs the task
+        kwargs : dict
+            The keyword arguments passed to func
+        deps : list
+            The names of the tasks that must be done before this task
+            is started
+        """
+
+        self.name = name
+        self.func = func
+        self.kwargs = dict() if kwargs is None else kwargs
+        self.deps = list(deps)
+
+
+###############################################################################
+
+
+def _run_task(func, kwargs, profile, trace_memory):
+    """Runs a task in a worker process, profiling it if profile
+
+    Returns the result of the task and the report of its profiler, so
+    that the stages of the task are merged into the profiler of the
+    main process.
+    """
+
+    if profile:  # If profiling, use a new profiler in this worker
+        profiler = Profiler(trace_memory=trace_memory)
+        set_profiler(profiler)
+
+    result = func(**kwargs)
+
+    return result, (profiler.report() if profile else dict())
+
+
+def _check_task_graph(tasks):
+    """Asserts that the task names are unique and the deps are valid"""
+
+    names = [task.name for task in tasks]
+
+    assert len(set(names)) == len(names), 'Error: task names must be unique'
+
+    for task in tasks:
+        for dep in task.deps:
+            assert dep in names, \
+                'Error: task %s depends on unknown task %s' % (task.name, dep)
+
+
+def run_task_graph(tasks, n_workers=None, logger=null_logger):
+    """Runs the tasks in a process pool, each once its deps are done
+
+    Each task is started as soon as all of its deps are done and a
+    worker is free, so that independent tasks (ex: writing one file
+    while converting another dataset) run at the same time. Ready
+    tasks are started in the order they appear in tasks. If profiling
+    is enabled (see umbmid.profiling), the stages recorded in the
+    worker processes are merged into the profiler of this process.
+
+    Parameters
+    ----------
+    tasks : list
+        The Task objects to run
+    n_workers : int
+        The number of worker processes, if None, uses the number of
+        CPUs. If 0, the tasks are run one at a time in this process
+        (useful for debugging)
+    logger :
+        Logger for logging progress
+
+    Returns
+    -------
+    results : dict
+        The return value of each task, by task name
+    """
+
+    _check_task_graph(tasks)
+
+    if n_workers is None:  # If no num of workers, use one per CPU
+        n_workers = os.cpu_count() or 1
+
+    pending = list(tasks)  # The tasks that have not been started
+    results = dict()  # The results of the done tasks
+
+    start_time = time.time()
+
+    if n_workers == 0:  # If running the tasks in this process
+
+        while len(pending) > 0:
+
+            # Find the first task whose deps are done
+            ready = [task for task in pending
+                     if all(dep in results for dep in task.deps)]
+
+            assert len(ready) > 0, 'Error: task graph has a cycle'
+
+            task = ready[0]
+            pending.remove(task)
+
+            logger.info('\tRunning task %s...', task.name)
+            results[task.name] = task.func(**task.kwargs)
+
+        return results
+
+    profiler = get_profiler()
+
+    running = dict()  # The task name of each running future
+
+    with ProcessPoolExecutor(max_workers=n_workers) as pool:
+
+        while len(pending) > 0 or len(running) > 0:
+
+            # Start every task whose deps are done, while keeping at
+            # most one queued task per worker
+            for task in list(pending):
+
+                if len(running) >= 2 * n_workers:
+                    break
+
+                if all(dep in results for dep in task.deps):
+                    pending.remove(task)
+                    running[pool.submit(
+                        _run_task, task.func, task.kwargs, profiler.enabled,
+                        getattr(profiler, 'trace_memory', False))] = task.name
+                    logger.debug('\tStarted task %s', task.name)
+
+            assert len(running) > 0, 'Error: task graph has a cycle'
+
+            # Wait for at least one of the running tasks to finish
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+
+            for future in done:  # For each finished task
+
+                name = running.pop(future)
+
+                # Get the result, which raises any error from the task
+                results[name], report = future.result()
+
+                profiler.merge_report(report)
+
+                logger.info('\tFinished task %s [%d / %d], %.1f s elapsed',
+                            name, len(results), len(tasks),
+                            time.time() - start_time)
+
+    return results
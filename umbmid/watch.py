@@ -0,0 +1,347 @@
+"""
+Tyson Reimer
+University of Manitoba
+October 19th, 2026
+"""
+
+import os
+import io
+import time
+import numpy as np
+
+from umbmid import null_logger
+from umbmid.catalog import parse_session_md, sparam_strs
+from umbmid.datasource import CleanStore
+from umbmid.loadsave import parse_fd_data
+from umbmid.profiling import profile_stage
+
+###############################################################################
+
+
+class SessionWatcher:
+    """Processes the scans of a session dir as their files land
+
+    The session dir is polled for new Mono/Multi .txt files and for
+    updates to its -metadata.csv file. Each .txt file is parsed once
+    its size and modification time stop changing (so that files still
+    being written are not read), and each expt is calibrated as soon as
+    its metadata, the files of all its sparams, and its reference scan
+    are present. The calibrated expts are appended to a CleanStore as
+    parts (see CleanStore.append_part()), with their metadata, as done
+    by umbmid.build.calibrate_fd_dataset() with prune=True.
+    """
+
+    def __init__(self, session_dir, store_dir, sparams=('s11',),
+                 cal_type='emp', dtype=complex, settle_time=1.0,
+                 logger=null_logger):
+        """Init class SessionWatcher
+
+        Parameters
+        ----------
+        session_dir : str
+            The path to the session dir (ex:
+            datasets/gen-three/raw/2021-01-01/), holding the .txt files
+            and the -metadata.csv file of the session
+        store_dir : str
+            The dir of the CleanStore to which the calibrated expts are
+            appended
+        sparams : tuple
+            The sparams of each expt, each in ['s11', 's21']
+        cal_type : str
+            The type of calibration, must be in ['emp', 'adi']
+        dtype :
+            The complex dtype of the parsed data
+        settle_time : float
+            The time, in seconds, that a file must be unchanged before
+            it is read
+        logger :
+            The logger
+        """
+
+        assert cal_type in ['emp', 'adi'], \
+            "Error: cal_type must be in ['emp', 'adi']"
+
+        for sparam in sparams:
+            assert sparam in sparam_strs, \
+                "Error: each sparam must be in ['s11', 's21']"
+
+        self.session_dir = session_dir
+        self.session = os.path.basename(os.path.normpath(session_dir))
+        self.sparams = tuple(sparams)
+        self.cal_str = '%s_ref_id' % cal_type
+        self.dtype = dtype
+        self.settle_time = settle_time
+        self.logger = logger
+
+        self.store = CleanStore(store_dir)
+
+        # The name of the appended parts in the store, with the same
+        # name as in the clean files (ex: 'fd_data_s11_emp')
+        self.name = 'fd_data_%s_%s' % ('_'.join(self.sparams), cal_type)
+
+        # The (size, mtime_ns, time first seen) of each .txt file not
+        # yet parsed, and of the -metadata.csv file, and the mtime_ns
+        # of the -metadata.csv file when it was last parsed
+        self._file_stats = dict()
+        self._md_stats = None
+        self._md_mtime = None
+
+        # The parsed (clockwise) data of each sparam of each expt, and
+        # the metadata dict of each expt, by expt number
+        self._scans = dict()
+        self._mds = dict()
+
+        # The unique IDs of the expts already in the store, so that
+        # restarting the watcher does not append them again
+        self._done_ids = set()
+        for part_name in self.store.list_parts(self.name):
+            self._done_ids.update(
+                self.store.load_metadata_cols(part_name, ['id'])['id']
+                .tolist())
+
+        # The expt numbers that are done (appended, or not kept)
+        self._done_expts = set()
+
+    def _get_md_path(self):
+        """Returns the path to the -metadata.csv file of the session"""
+        return os.path.join(self.session_dir,
+                            '%s-metadata.csv' % self.session)
+
+    def _update_metadata(self):
+        """Parses the -metadata.csv file again, if it has changed
+
+        As for the .txt files, the -metadata.csv file is only read once
+        its size and modification time have not changed for
+        settle_time. If it cannot be parsed (ex: a row is still being
+        written), it is read again at the next poll.
+        """
+
+        md_path = self._get_md_path()
+
+        if not os.path.isfile(md_path):  # If no metadata yet
+            return
+
+        md_stat = os.stat(md_path)
+        size_mtime = (md_stat.st_size, md_stat.st_mtime_ns)
+
+        if md_stat.st_mtime_ns == self._md_mtime:  # If unchanged
+            return
+
+        # If new or changed, wait for it to stop changing
+        if self._md_stats is None or self._md_stats[:2] != size_mtime:
+            self._md_stats = size_mtime + (time.time(),)
+            return
+
+        if time.time() - self._md_stats[2] < self.settle_time:
+            return
+
+        with open(md_path, 'rb') as handle:
+            raw_md = handle.read().decode('utf-8')
+
+        try:
+            session_md = np.genfromtxt(io.StringIO(raw_md), delimiter=',',
+                                       dtype=str)
+
+            if np.ndim(session_md) < 2:  # If only the header row so far
+                return
+
+            expt_mds = parse_session_md(session_md, metadata_path=md_path)
+
+        except (ValueError, IndexError, AssertionError) as err:
+            self.logger.warning('\tCould not parse %s, retrying at the '
+                                'next poll: %s' % (md_path, err))
+            self._md_stats = None  # Wait for it to settle again
+            return
+
+        self._md_mtime = md_stat.st_mtime_ns
+
+        for expt_md in expt_mds:
+            self._mds[expt_md['n_expt']] = expt_md
+
+        for expt_md in parse_session_md(session_md, metadata_path=md_path):
+            self._mds[expt_md['n_expt']] = expt_md
+
+    def _get_landed_files(self):
+        """Returns the .txt files that have stopped changing
+
+        Returns
+        -------
+        landed : list
+            The (file name, sparam) of each .txt file, not yet parsed,
+            whose size and modification time have not changed for
+            settle_time
+        """
+
+        landed = []
+        now = time.time()
+
+        for fname in sorted(os.listdir(self.session_dir)):
+
+            if fname in self._file_stats and self._file_stats[fname] is None:
+                continue  # If already parsed, skip it
+
+            # Find the type of sparam in this file, if any
+            file_sparams = [sparam for sparam in self.sparams
+                            if sparam_strs[sparam] in fname]
+
+            if len(file_sparams) != 1 or not fname.endswith('.txt'):
+                continue
+
+            file_stat = os.stat(os.path.join(self.session_dir, fname))
+            size_mtime = (file_stat.st_size, file_stat.st_mtime_ns)
+
+            # If new or changed, wait for it to stop changing
+            if (fname not in self._file_stats
+                    or self._file_stats[fname][:2] != size_mtime):
+                self._file_stats[fname] = size_mtime + (now,)
+
+            elif now - self._file_stats[fname][2] >= self.settle_time:
+                landed.append((fname, file_sparams[0]))
+
+        return landed
+
+    def _parse_file(self, fname, sparam):
+        """Parses a landed .txt file, storing the data of its expt"""
+
+        with open(os.path.join(self.session_dir, fname), 'rb') as handle:
+            raw_data = handle.read()
+
+        with profile_stage('parse') as stage:
+            stage.add_bytes_read(len(raw_data))
+            expt_data = parse_fd_data(raw_data, dtype=self.dtype)
+
+        if '(foC' in fname.split('_'):  # If counterclockwise, flip it
+            expt_data = np.flip(expt_data, axis=1)
+
+        # Find the expt number from the file name (ex: 'expt01')
+        n_expt = int(fname.split('_')[1].lower().replace('expt', ''))
+
+        self._scans.setdefault(n_expt, dict())[sparam] = expt_data
+        self._file_stats[fname] = None  # Mark as parsed
+
+        self.logger.debug('\tParsed %s' % fname)
+
+    def _get_expt_data(self, n_expt):
+        """Returns the data of every sparam of an expt, or None"""
+
+        scans = self._scans.get(n_expt, dict())
+
+        if any(sparam not in scans for sparam in self.sparams):
+            return None
+
+        return np.stack([scans[sparam] for sparam in self.sparams])
+
+    def _get_ready_expts(self):
+        """Calibrates the expts whose data and reference are present
+
+        Returns
+        -------
+        cal_data : list
+            The calibrated data of each ready expt, [n_sparams, n_freqs,
+            n_ant_pos]
+        cal_mds : list
+            The metadata dict of each ready expt
+        """
+
+        # The expt number of each unique ID in the session
+        expt_ids = {md['id']: n_expt for n_expt, md in self._mds.items()}
+
+        cal_data, cal_mds = [], []
+
+        for n_expt in sorted(self._mds.keys()):
+
+            if n_expt in self._done_expts:
+                continue
+
+            expt_md = self._mds[n_expt]
+            ref_id = expt_md[self.cal_str]
+
+            # If not kept in the pruned dataset (see
+            # umbmid.build.calibrate_fd_dataset()), or already stored
+            if ('F' not in expt_md['phant_id'] or np.isnan(ref_id)
+                    or expt_md['id'] in self._done_ids):
+                self._done_expts.add(n_expt)
+                continue
+
+            expt_data = self._get_expt_data(n_expt)
+
+            if expt_data is None or ref_id not in expt_ids:
+                continue  # If the expt or its ref has not landed
+
+            ref_data = self._get_expt_data(expt_ids[ref_id])
+
+            if ref_data is None:  # If the ref has not landed
+                continue
+
+            cal_data.append(expt_data - ref_data)
+            cal_mds.append(expt_md)
+
+            self._done_expts.add(n_expt)
+            self._done_ids.add(expt_md['id'])
+
+        return cal_data, cal_mds
+
+    def poll(self):
+        """Processes the files that landed since the last poll
+
+        Returns
+        -------
+        n_appended : int
+            The num of calibrated expts appended to the store
+        """
+
+        self._update_metadata()
+
+        for fname, sparam in self._get_landed_files():
+            self._parse_file(fname, sparam)
+
+        cal_data, cal_mds = self._get_ready_expts()
+
+        if len(cal_data) > 0:  # Append the ready expts as one part
+
+            part_name = self.store.append_part(np.array(cal_data), cal_mds,
+                                               self.name)
+
+            self.logger.info('\tAppended %d expts of session %s to %s'
+                             % (len(cal_data), self.session, part_name))
+
+        return len(cal_data)
+
+    def run(self, poll_interval=1.0, timeout=None, stop_event=None):
+        """Polls the session dir until stopped
+
+        Parameters
+        ----------
+        poll_interval : float
+            The time, in seconds, between polls
+        timeout : float
+            If not None, stops after this time, in seconds
+        stop_event : threading.Event
+            If not None, stops once this event is set
+
+        Returns
+        -------
+        n_appended : int
+            The total num of calibrated expts appended to the store
+        """
+
+        start_time = time.perf_counter()
+        n_appended = 0
+
+        while True:
+
+            n_appended += self.poll()
+
+            if stop_event is not None and stop_event.is_set():
+                break
+
+            if (timeout is not None
+                    and time.perf_counter() - start_time >= timeout):
+                break
+
+            if stop_event is not None:  # Wake up early if stopped
+                stop_event.wait(poll_interval)
+            else:
+                time.sleep(poll_interval)
+
+        return n_appended